@@ -14,6 +14,7 @@ sys.path.insert(0, project_root)
 import numpy as np
 
 from src.basic.data_setup import ratings, users, movies
+from src.utils.seen_filter import SeenItemsFilter
 
 class RegularizedMatrixFactorization:
     """
@@ -39,6 +40,7 @@ class RegularizedMatrixFactorization:
         self.num_epochs = num_epochs
         self.num_users = len(users)
         self.num_movies = len(movies)
+        self.seen_filter = SeenItemsFilter.from_ratings(num_users=self.num_users, num_movies=self.num_movies)
         
         # Calculate global mean
         self.global_mean = np.mean([rating for user_ratings in ratings.values() 
@@ -115,25 +117,28 @@ class RegularizedMatrixFactorization:
             print(f"\nMovie Biases (Regularized):\n{self.movie_biases}")
             print("--------------------------")
     
-    def get_recommendations(self, user_id, num_recommendations=3):
+    def get_recommendations(self, user_id, num_recommendations=3, seen_filter=None):
         """
         Get movie recommendations for a user.
         
         Args:
             user_id (int): User ID
             num_recommendations (int): Number of recommendations to return
+            seen_filter (SeenItemsFilter): Movies to exclude; defaults to the
+                movies the user has already rated
             
         Returns:
             list: List of (movie_id, predicted_rating, movie_title) tuples
         """
-        user_ratings = ratings.get(user_id, {})
+        if seen_filter is None:
+            seen_filter = self.seen_filter
+        seen = seen_filter.mask(user_id, self.num_movies)
         recommendations = []
         
-        for movie_id in range(self.num_movies):
-            if movie_id not in user_ratings:  # Only recommend unwatched movies
-                predicted_rating = self.predict_rating(user_id, movie_id)
-                movie_title = movies[movie_id]
-                recommendations.append((movie_id, predicted_rating, movie_title))
+        for movie_id in np.flatnonzero(~seen).tolist():  # Only recommend unwatched movies
+            predicted_rating = self.predict_rating(user_id, movie_id)
+            movie_title = movies[movie_id]
+            recommendations.append((movie_id, predicted_rating, movie_title))
         
         # Sort by predicted rating (descending)
         recommendations.sort(key=lambda x: x[1], reverse=True)
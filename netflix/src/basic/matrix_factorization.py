@@ -7,6 +7,7 @@ import numpy as np
 
 # ✅ FIX IMPORT — relative import from the same directory
 from .data_setup import ratings, users, movies
+from ..utils.seen_filter import SeenItemsFilter
 
 
 class BasicMatrixFactorization:
@@ -28,6 +29,7 @@ class BasicMatrixFactorization:
         self.num_epochs = num_epochs
         self.num_users = len(users)
         self.num_movies = len(movies)
+        self.seen_filter = SeenItemsFilter.from_ratings(num_users=self.num_users, num_movies=self.num_movies)
 
         # Initialize matrices
         self.P = np.random.rand(self.num_users, self.num_factors)
@@ -64,16 +66,17 @@ class BasicMatrixFactorization:
             print(f"\nRefined User-Feature Matrix (P):\n{self.P}")
             print(f"\nRefined Movie-Feature Matrix (Q):\n{self.Q}")
 
-    def get_recommendations(self, user_id, num_recommendations=3):
+    def get_recommendations(self, user_id, num_recommendations=3, seen_filter=None):
         """Get movie recommendations for a user."""
-        user_ratings = ratings.get(user_id, {})
+        if seen_filter is None:
+            seen_filter = self.seen_filter
+        seen = seen_filter.mask(user_id, self.num_movies)
         recommendations = []
 
-        for movie_id in range(self.num_movies):
-            if movie_id not in user_ratings:
-                predicted_rating = self.predict_rating(user_id, movie_id)
-                movie_title = movies[movie_id]
-                recommendations.append((movie_id, predicted_rating, movie_title))
+        for movie_id in np.flatnonzero(~seen).tolist():
+            predicted_rating = self.predict_rating(user_id, movie_id)
+            movie_title = movies[movie_id]
+            recommendations.append((movie_id, predicted_rating, movie_title))
 
         recommendations.sort(key=lambda x: x[1], reverse=True)
         return recommendations[:num_recommendations]
@@ -0,0 +1,298 @@
+"""
+Columnar Metadata Store
+This module keeps user profiles and movie metadata as struct-of-arrays columns
+instead of nested dictionaries, with vectorized filters for candidate pre-filtering.
+"""
+
+import operator
+import sys
+
+import numpy as np
+
+_COMPARISONS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+
+class Vocabulary:
+    """Dictionary encoding between category strings and dense int32 codes."""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, value):
+        """Return the code for a value, adding it to the vocabulary if new."""
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def lookup(self, values):
+        """Return the codes of the known values (unknown values are skipped)."""
+        return np.array([self.codes[v] for v in values if v in self.codes], dtype=np.int32)
+
+    @property
+    def nbytes(self):
+        # The strings themselves plus the list and the string -> code dict
+        return (sum(sys.getsizeof(v) for v in self.values)
+                + sys.getsizeof(self.values) + sys.getsizeof(self.codes))
+
+
+class NumericColumn:
+    """A fixed-dtype column with one value per row."""
+
+    def __init__(self, values, dtype):
+        self.data = np.asarray(values, dtype=dtype)
+
+    def row(self, index):
+        return self.data[index].item()
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+
+class CategoricalColumn:
+    """A dictionary-encoded string column with one value per row."""
+
+    def __init__(self, values):
+        self.vocabulary = Vocabulary()
+        self.codes = np.array([self.vocabulary.encode(v) for v in values], dtype=np.int32)
+
+    def row(self, index):
+        return self.vocabulary.values[self.codes[index]]
+
+    def isin(self, values):
+        return np.isin(self.codes, self.vocabulary.lookup(values))
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.vocabulary.nbytes
+
+
+class ListColumn:
+    """
+    A variable-length list column stored as one flat code array plus offsets.
+
+    Row i owns codes[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, rows):
+        self.vocabulary = Vocabulary()
+        lengths = np.array([len(r) for r in rows], dtype=np.int64)
+        self.offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.offsets[1:])
+        self.codes = np.array([self.vocabulary.encode(v) for r in rows for v in r], dtype=np.int32)
+
+    def row(self, index):
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return [self.vocabulary.values[c] for c in self.codes[start:end]]
+
+    def isin(self, values):
+        """Rows containing at least one of the given values."""
+        hits = np.isin(self.codes, self.vocabulary.lookup(values)).astype(np.int64)
+        # Prefix sums turn "any hit in row" into one subtraction per row
+        cumulative = np.concatenate(([0], np.cumsum(hits)))
+        return cumulative[self.offsets[1:]] > cumulative[self.offsets[:-1]]
+
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.codes.nbytes + self.vocabulary.nbytes
+
+
+class MapColumn(ListColumn):
+    """A per-row {key: number} column: list-encoded keys with a parallel value array."""
+
+    def __init__(self, rows, dtype=np.float64):
+        super().__init__([list(r.keys()) for r in rows])
+        self.values = np.array([v for r in rows for v in r.values()], dtype=dtype)
+
+    def row(self, index):
+        start, end = self.offsets[index], self.offsets[index + 1]
+        keys = [self.vocabulary.values[c] for c in self.codes[start:end]]
+        return dict(zip(keys, self.values[start:end].tolist()))
+
+    @property
+    def nbytes(self):
+        return super().nbytes + self.values.nbytes
+
+
+def _numeric_dtype(values, field):
+    """
+    Pick one dtype that holds every value exactly.
+
+    Booleans stay bool, integers become int32 (int64 when out of range) and
+    any float makes the whole column float64. None, mixed bool/number and
+    non-numeric values are rejected rather than silently cast.
+    """
+    kinds = set()
+    for value in values:
+        if isinstance(value, (bool, np.bool_)):
+            kinds.add(bool)
+        elif isinstance(value, (int, np.integer)):
+            kinds.add(int)
+        elif isinstance(value, (float, np.floating)):
+            kinds.add(float)
+        else:
+            raise TypeError(f"Field {field!r}: unsupported value {value!r} in a numeric column")
+    if bool in kinds:
+        if kinds != {bool}:
+            raise TypeError(f"Field {field!r}: mixes booleans with numbers")
+        return np.bool_
+    if float in kinds:
+        return np.float64
+    info = np.iinfo(np.int32)
+    if values and not (info.min <= min(values) and max(values) <= info.max):
+        return np.int64
+    return np.int32
+
+
+def _infer_column(values, field=None):
+    """Pick a column type from the Python values of one field, checking every value."""
+    if any(v is None for v in values):
+        raise ValueError(f"Field {field!r}: None values are not supported")
+    if not values:
+        return NumericColumn(values, np.float64)
+    sample = values[0]
+    if isinstance(sample, dict):
+        if not all(isinstance(v, dict) for v in values):
+            raise TypeError(f"Field {field!r}: mixes dicts with other types")
+        return MapColumn(values, _numeric_dtype([v for r in values for v in r.values()], field))
+    if isinstance(sample, (list, tuple)):
+        if not all(isinstance(v, (list, tuple)) for v in values):
+            raise TypeError(f"Field {field!r}: mixes lists with other types")
+        return ListColumn(values)
+    if isinstance(sample, str):
+        if not all(isinstance(v, str) for v in values):
+            raise TypeError(f"Field {field!r}: mixes strings with other types")
+        return CategoricalColumn(values)
+    return NumericColumn(values, _numeric_dtype(values, field))
+
+
+class ColumnarStore:
+    """
+    Struct-of-arrays storage for entity records with O(1) row lookup by ID.
+
+    Numeric fields become fixed-dtype NumPy columns, strings are
+    dictionary-encoded, and lists or dicts are stored as offset-indexed
+    flat arrays. Filters return boolean row masks so they can be combined
+    with & and | before selecting IDs.
+    """
+
+    def __init__(self, records):
+        """
+        Initialize the store from {entity_id: {field: value}} records.
+
+        Args:
+            records (dict): Entity records; every record must have the same fields
+        """
+        self.ids = list(records.keys())
+        self.id_index = {entity_id: row for row, entity_id in enumerate(self.ids)}
+
+        fields = list(next(iter(records.values()), {}).keys())
+        self.columns = {
+            field: _infer_column([record[field] for record in records.values()], field)
+            for field in fields
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, entity_id):
+        return entity_id in self.id_index
+
+    def get(self, entity_id, default=None):
+        """
+        Rebuild the record for one entity.
+
+        Args:
+            entity_id: Entity ID
+            default: Value returned when the ID is unknown
+
+        Returns:
+            dict: The record as {field: value}
+        """
+        row = self.id_index.get(entity_id)
+        if row is None:
+            return default
+        return {field: column.row(row) for field, column in self.columns.items()}
+
+    def column(self, field):
+        """Return the raw NumPy array backing a numeric field."""
+        return self.columns[field].data
+
+    def compare(self, field, op, value):
+        """
+        Compare a numeric column against a scalar.
+
+        Args:
+            field (str): Numeric field name
+            op (str): One of <, <=, >, >=, ==, !=
+            value: Scalar to compare with
+
+        Returns:
+            np.ndarray: Boolean row mask
+        """
+        return _COMPARISONS[op](self.columns[field].data, value)
+
+    def isin(self, field, values):
+        """
+        Match rows whose categorical value (or any list element) is in values.
+
+        Returns:
+            np.ndarray: Boolean row mask
+        """
+        return self.columns[field].isin(values)
+
+    def select(self, mask):
+        """Return the entity IDs of the rows selected by a mask."""
+        return [self.ids[row] for row in np.flatnonzero(mask)]
+
+    @property
+    def nbytes(self):
+        """Approximate bytes held by the columns, the IDs and the ID index."""
+        return (sum(column.nbytes for column in self.columns.values())
+                + sys.getsizeof(self.ids) + sum(sys.getsizeof(entity_id) for entity_id in self.ids)
+                + sys.getsizeof(self.id_index))
+
+    def memory_report(self, records=None):
+        """
+        Compare columnar memory with the nested-dict representation.
+
+        Args:
+            records (dict): The original records, for the dict-side estimate
+
+        Returns:
+            dict: Byte counts per column, in total and per entity
+        """
+        report = {
+            'columns': {field: column.nbytes for field, column in self.columns.items()},
+            'total_bytes': self.nbytes,
+            'bytes_per_entity': self.nbytes / max(len(self), 1)
+        }
+        if records is not None:
+            dict_bytes = deep_sizeof(records)
+            report['dict_bytes'] = dict_bytes
+            report['dict_bytes_per_entity'] = dict_bytes / max(len(records), 1)
+        return report
+
+
+def deep_sizeof(obj):
+    """Estimate the memory of nested dicts and lists of Python objects."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k) + deep_sizeof(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_sizeof(v) for v in obj)
+    return size
@@ -3,11 +3,18 @@ Hash Table Performance Demonstration
 This module demonstrates the performance benefits of hash tables vs. linear search.
 """
 
+import os
+import sys
 import time
 import random
 import matplotlib.pyplot as plt
 import numpy as np
 
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from src.utils.columnar_store import ColumnarStore
+
 def compare_search_performance(size=1_000_000):
     """
     Compare the performance of list search vs dictionary lookup.
@@ -261,6 +268,43 @@ def demonstrate_hash_table_use_cases():
     print(f"  Recommendation lookup: {lookup_time:.8f} seconds")
     print(f"  Recommendations: {recommendations}")
 
+    # 4. Columnar storage for the same entities
+    print("\n4. Columnar Metadata Store:")
+    movie_store = ColumnarStore(movie_metadata)
+    user_store = ColumnarStore(user_profiles)
+
+    start_time = time.time()
+    movie_info = movie_store.get('movie_1')
+    lookup_time = time.time() - start_time
+    print(f"  Columnar row lookup: {lookup_time:.8f} seconds")
+    print(f"  Movie info: {movie_info}")
+    print(f"  User profile: {user_store.get('user_456')}")
+
+    # Candidate pre-filtering runs over whole columns at once
+    mask = movie_store.isin('genre', ['comedy']) & movie_store.compare('duration', '<', 100)
+    print(f"  Comedies under 100 minutes: {movie_store.select(mask)}")
+
+    # At catalog scale the savings over nested dicts become visible
+    genres = ['action', 'adventure', 'comedy', 'romance', 'drama', 'sci-fi', 'thriller']
+    catalog = {
+        f'movie_{i}': {
+            'title': f'Title {i}',
+            'genre': random.sample(genres, 2),
+            'rating': round(random.uniform(1, 5), 1),
+            'duration': random.randint(80, 180)
+        }
+        for i in range(50_000)
+    }
+    catalog_store = ColumnarStore(catalog)
+    report = catalog_store.memory_report(catalog)
+    print(f"  {len(catalog):,} movies as nested dicts: {report['dict_bytes_per_entity']:.0f} bytes/movie")
+    print(f"  {len(catalog):,} movies as columns: {report['bytes_per_entity']:.0f} bytes/movie")
+
+    start_time = time.time()
+    mask = catalog_store.isin('genre', ['sci-fi', 'thriller']) & catalog_store.compare('duration', '<', 120)
+    filter_time = time.time() - start_time
+    print(f"  Vectorized filter matched {mask.sum():,} movies in {filter_time:.6f} seconds")
+
 def main():
     """Main demonstration function."""
     print("=" * 60)
@@ -0,0 +1,260 @@
+"""
+Multi-Model Registry
+This module serves several model variants from one process, loading checkpoints
+lazily and evicting least-recently-used models when a memory budget is exceeded.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from src.utils.model_delta import MODEL_ARRAYS, load_snapshot
+
+
+def model_nbytes(model):
+    """
+    Estimate the resident bytes of a model from its learned arrays.
+
+    Args:
+        model: A matrix factorization model
+
+    Returns:
+        int: Total bytes of P, Q and the bias arrays
+    """
+    return sum(getattr(model, name).nbytes for name in MODEL_ARRAYS if hasattr(model, name))
+
+
+class _Entry:
+    """Bookkeeping for one registered model variant."""
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.model = None
+        self.nbytes = 0
+        self.load_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds = []
+
+
+class ModelRegistry:
+    """
+    Lazily loaded, memory-bounded collection of named models.
+
+    Models are loaded on first request from a snapshot directory (see
+    src.utils.model_delta.save_snapshot) or a custom loader function. Once
+    the resident bytes exceed the budget, the least-recently-used models
+    are evicted until the total fits again. A model larger than the whole
+    budget is still served, but evicts everything else.
+    """
+
+    def __init__(self, memory_budget_bytes, mmap_mode=None):
+        """
+        Initialize the registry.
+
+        Args:
+            memory_budget_bytes (int): Upper bound on resident model bytes
+            mmap_mode (str): Passed to load_snapshot; None reads arrays into memory
+        """
+        self.memory_budget_bytes = memory_budget_bytes
+        self.mmap_mode = mmap_mode
+        self._entries = {}
+        self._resident = OrderedDict()  # name -> entry, least recently used first
+        self._lock = threading.Lock()
+
+    def register(self, name, checkpoint_dir=None, loader=None):
+        """
+        Register a model variant without loading it.
+
+        Args:
+            name (str): Variant name, e.g. 'eu-regularized'
+            checkpoint_dir (str): Snapshot directory to load from
+            loader (callable): Zero-argument function returning a model,
+                used instead of checkpoint_dir
+        """
+        if (checkpoint_dir is None) == (loader is None):
+            raise ValueError("Provide exactly one of checkpoint_dir or loader")
+        if loader is None:
+            loader = lambda: load_snapshot(checkpoint_dir, mmap_mode=self.mmap_mode)
+        with self._lock:
+            if name in self._entries:
+                raise KeyError(f"Model {name!r} is already registered")
+            self._entries[name] = _Entry(name, loader)
+
+    def unregister(self, name):
+        """Evict and forget a model variant."""
+        with self._lock:
+            entry = self._entries.pop(name)
+            self._resident.pop(name, None)
+            entry.model = None
+
+    def get(self, name):
+        """
+        Return a model, loading it on first use.
+
+        Args:
+            name (str): Registered variant name
+
+        Returns:
+            object: The loaded model
+        """
+        with self._lock:
+            entry = self._entries[name]
+            if entry.model is not None:
+                entry.hits += 1
+                self._resident.move_to_end(name)
+                return entry.model
+
+        # Load outside the registry lock so other variants stay servable;
+        # the per-entry lock makes concurrent first requests share one load
+        with entry.load_lock:
+            with self._lock:
+                if entry.model is not None:
+                    entry.hits += 1
+                    self._resident.move_to_end(name)
+                    return entry.model
+                entry.misses += 1
+
+            start_time = time.perf_counter()
+            model = entry.loader()
+            load_seconds = time.perf_counter() - start_time
+
+            with self._lock:
+                entry.model = model
+                entry.nbytes = model_nbytes(model)
+                entry.load_seconds.append(load_seconds)
+                self._resident[name] = entry
+                self._resident.move_to_end(name)
+                self._evict_over_budget(keep=name)
+            return model
+
+    def prewarm(self, names=None):
+        """
+        Load models ahead of traffic, e.g. during a deploy.
+
+        Args:
+            names (iterable): Variants to load, most important last so they
+                are the last to be evicted; defaults to every registered model
+
+        Returns:
+            dict: Name -> load latency in seconds (0.0 if already resident)
+        """
+        if names is None:
+            names = list(self._entries)
+        latencies = {}
+        for name in names:
+            loads_before = len(self._entries[name].load_seconds)
+            self.get(name)
+            entry = self._entries[name]
+            latencies[name] = entry.load_seconds[-1] if len(entry.load_seconds) > loads_before else 0.0
+        return latencies
+
+    def evict(self, name):
+        """Drop a model from memory; it will be reloaded on next use."""
+        with self._lock:
+            entry = self._resident.pop(name, None)
+            if entry is not None:
+                entry.model = None
+                entry.nbytes = 0
+                entry.evictions += 1
+
+    def _evict_over_budget(self, keep):
+        # Caller holds self._lock
+        while self.resident_bytes > self.memory_budget_bytes:
+            victim = next((n for n in self._resident if n != keep), None)
+            if victim is None:
+                break
+            entry = self._resident.pop(victim)
+            entry.model = None
+            entry.nbytes = 0
+            entry.evictions += 1
+
+    @property
+    def resident_bytes(self):
+        """Bytes held by the currently loaded models."""
+        return sum(entry.nbytes for entry in self._resident.values())
+
+    def resident_models(self):
+        """Names of loaded models, least recently used first."""
+        with self._lock:
+            return list(self._resident)
+
+    def metrics(self):
+        """
+        Report per-model hit, miss, eviction and load-latency metrics.
+
+        Returns:
+            dict: Name -> metrics dict
+        """
+        with self._lock:
+            report = {}
+            for name, entry in self._entries.items():
+                latencies = np.array(entry.load_seconds) * 1000
+                requests = entry.hits + entry.misses
+                report[name] = {
+                    'resident': entry.model is not None,
+                    'resident_bytes': entry.nbytes,
+                    'hits': entry.hits,
+                    'misses': entry.misses,
+                    'hit_rate': entry.hits / requests if requests else 0.0,
+                    'evictions': entry.evictions,
+                    'loads': len(entry.load_seconds),
+                    'load_ms_mean': float(latencies.mean()) if latencies.size else 0.0,
+                    'load_ms_max': float(latencies.max()) if latencies.size else 0.0
+                }
+            return report
+
+
+def demo_model_registry():
+    """Demonstrate lazy loading and LRU eviction across regional variants."""
+    import tempfile
+    from src.advanced.matrix_factorization_regularized import RegularizedMatrixFactorization
+    from src.advanced.matrix_factorization_with_bias import MatrixFactorizationWithBias
+    from src.utils.model_delta import save_snapshot
+
+    print("=== Multi-Model Registry Demo ===")
+
+    variants = {
+        'us-regularized': RegularizedMatrixFactorization(num_factors=2, reg_lambda=0.1),
+        'eu-regularized': RegularizedMatrixFactorization(num_factors=2, reg_lambda=0.05),
+        'apac-bias': MatrixFactorizationWithBias(num_factors=2),
+        'experiment-wide': RegularizedMatrixFactorization(num_factors=8, reg_lambda=0.1),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, model in variants.items():
+            model.train(verbose=False)
+            save_snapshot(model, os.path.join(tmp, name))
+
+        sizes = {name: model_nbytes(model) for name, model in variants.items()}
+        budget = sizes['us-regularized'] + sizes['eu-regularized'] + sizes['apac-bias']
+        registry = ModelRegistry(memory_budget_bytes=budget)
+        for name in variants:
+            registry.register(name, checkpoint_dir=os.path.join(tmp, name))
+
+        print(f"\nMemory budget: {budget} bytes; model sizes: {sizes}")
+        latencies = registry.prewarm(['apac-bias', 'eu-regularized', 'us-regularized'])
+        print(f"Pre-warmed: {', '.join(f'{n} ({s * 1000:.2f} ms)' for n, s in latencies.items())}")
+
+        for name in ['us-regularized', 'us-regularized', 'experiment-wide', 'eu-regularized']:
+            recommendations = registry.get(name).get_recommendations(0, num_recommendations=1)
+            print(f"  {name}: {recommendations[0][2]} | resident: {registry.resident_models()}")
+
+        print(f"\n{'Model':<18} {'Hits':>5} {'Misses':>7} {'Evict':>6} {'Load ms':>8}")
+        print("-" * 48)
+        for name, m in registry.metrics().items():
+            print(f"{name:<18} {m['hits']:>5} {m['misses']:>7} {m['evictions']:>6} "
+                  f"{m['load_ms_mean']:>8.2f}")
+
+
+if __name__ == "__main__":
+    demo_model_registry()
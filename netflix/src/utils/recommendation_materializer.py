@@ -0,0 +1,377 @@
+"""
+Materialized Top-K Recommendation Table
+This module precomputes recommendations into fixed-width arrays so reads need no scoring.
+"""
+
+import copy
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from src.basic.data_setup import users, movies
+from src.utils.seen_filter import SeenItemsFilter
+
+
+def score_all_movies(model, user_ids):
+    """
+    Score every movie for a batch of users with a single matrix product.
+
+    Works for any model exposing P and Q; bias terms are added when the
+    model has them.
+
+    Args:
+        model: A trained matrix factorization model
+        user_ids (array-like): User IDs to score
+
+    Returns:
+        np.ndarray: Predicted ratings with shape (len(user_ids), num_movies)
+    """
+    user_ids = np.asarray(user_ids, dtype=np.int64)
+    scores = model.P[user_ids] @ model.Q.T
+    if hasattr(model, 'user_biases'):
+        scores += model.global_mean
+        scores += model.user_biases[user_ids][:, None]
+        scores += model.movie_biases[None, :]
+    return scores
+
+
+def top_k_from_scores(scores, k):
+    """
+    Select the k best columns of each row, sorted by descending score.
+
+    Columns scored -inf are treated as excluded and come back as movie ID -1,
+    so every row has the same width even when a user has few candidates.
+
+    Args:
+        scores (np.ndarray): Score matrix with shape (num_users, num_movies)
+        k (int): Number of items to keep per row
+
+    Returns:
+        tuple: (item_ids, item_scores) arrays with shape (num_users, k)
+    """
+    num_rows, num_movies = scores.shape
+    width = min(k, num_movies)
+    item_ids = np.full((num_rows, k), -1, dtype=np.int32)
+    item_scores = np.full((num_rows, k), -np.inf, dtype=np.float32)
+    if width == 0 or num_rows == 0:
+        return item_ids, item_scores
+
+    candidates = np.argpartition(-scores, width - 1, axis=1)[:, :width]
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind='stable')
+    candidates = np.take_along_axis(candidates, order, axis=1)
+    candidate_scores = np.take_along_axis(candidate_scores, order, axis=1)
+
+    candidates[np.isneginf(candidate_scores)] = -1
+    item_ids[:, :width] = candidates
+    item_scores[:, :width] = candidate_scores
+    return item_ids, item_scores
+
+
+def recommend_top_k(model, user_ids, k, seen_filter):
+    """
+    Score a batch of users and return their top-k unseen movies.
+
+    Args:
+        model: A trained matrix factorization model
+        user_ids (array-like): User IDs to recommend for
+        k (int): Number of recommendations per user
+        seen_filter (SeenItemsFilter): Movies to exclude per user
+
+    Returns:
+        tuple: (item_ids, item_scores) arrays with shape (len(user_ids), k)
+    """
+    scores = score_all_movies(model, user_ids)
+    scores[seen_filter.mask_batch(user_ids, scores.shape[1])] = -np.inf
+    return top_k_from_scores(scores, k)
+
+
+class TopKTable:
+    """
+    An immutable snapshot of precomputed recommendations.
+
+    Readers hold a reference to one table for the whole lookup, so a rebuild
+    swapping in a new table never hands them a half-written row.
+    """
+
+    def __init__(self, user_ids, item_ids, item_scores, version):
+        """
+        Initialize the table.
+
+        Args:
+            user_ids (np.ndarray): User ID for each row
+            item_ids (np.ndarray): Movie IDs with shape (num_users, k), -1 padded
+            item_scores (np.ndarray): Scores matching item_ids
+            version (int): Monotonic build number
+        """
+        self.user_ids = user_ids
+        self.item_ids = item_ids
+        self.item_scores = item_scores
+        self.version = version
+        self.k = item_ids.shape[1]
+        self.built_at = time.time()
+        self.row_of = {int(user_id): row for row, user_id in enumerate(user_ids)}
+
+    @property
+    def nbytes(self):
+        """Bytes held by the fixed-width arrays."""
+        return self.user_ids.nbytes + self.item_ids.nbytes + self.item_scores.nbytes
+
+    def lookup(self, user_id, num_recommendations):
+        """
+        Read a user's recommendations from the table.
+
+        Args:
+            user_id (int): User ID
+            num_recommendations (int): Number of recommendations to return
+
+        Returns:
+            list or None: (movie_id, predicted_rating, movie_title) tuples, or
+            None when the user is not materialized or k is too small
+        """
+        row = self.row_of.get(user_id)
+        if row is None or num_recommendations > self.k:
+            return None
+
+        recommendations = []
+        for movie_id, score in zip(self.item_ids[row, :num_recommendations],
+                                   self.item_scores[row, :num_recommendations]):
+            if movie_id < 0:
+                break
+            recommendations.append((int(movie_id), float(score), movies[int(movie_id)]))
+        return recommendations
+
+
+class RecommendationMaterializer:
+    """
+    Precomputes recommendations for a cohort of users and serves them lock-free.
+
+    A background thread rebuilds the table whenever a refresh is requested
+    (typically after each training run) and publishes it with a single
+    reference assignment. Users missing from the table fall back to live
+    scoring through the model.
+    """
+
+    def __init__(self, model, k=10, cohort=None, batch_size=4096, seen_filter=None):
+        """
+        Initialize the materializer.
+
+        Args:
+            model: Model with P/Q (and optional biases)
+            k (int): Recommendations stored per user
+            cohort (iterable): User IDs to materialize; defaults to all users
+            batch_size (int): Users scored per matrix product during a rebuild
+            seen_filter (SeenItemsFilter): Movies to exclude; defaults to the
+                rated movies in the sample data
+        """
+        self.model = model
+        self.k = k
+        self.cohort = cohort
+        self.batch_size = batch_size
+        self.seen_filter = seen_filter or SeenItemsFilter.from_ratings(
+            num_users=model.num_users, num_movies=model.num_movies)
+
+        self._table = None
+        self._version = 0     # Generation of the published table
+        self._requested = 0   # Newest generation asked for; guarded by _published
+        self._refresh_requested = threading.Event()
+        self._stop_requested = threading.Event()
+        self._published = threading.Condition()
+        self._worker = None
+
+        self.stats = {'table_hits': 0, 'live_fallbacks': 0, 'last_build_seconds': 0.0}
+
+    @property
+    def table(self):
+        """The currently published TopKTable, or None before the first build."""
+        return self._table
+
+    def build_table(self, model=None, version=None):
+        """
+        Score the cohort in batches and build a new TopKTable.
+
+        The whole build uses one model reference, so a model swapped in by
+        train_and_refresh meanwhile never mixes into this table.
+
+        Args:
+            model: Model to score with; defaults to the current model
+            version (int): Generation to stamp the table with; defaults to
+                the newest requested generation
+
+        Returns:
+            TopKTable: The freshly built table (not yet published)
+        """
+        if model is None or version is None:
+            with self._published:
+                model = self.model if model is None else model
+                version = self._requested if version is None else version
+        if self.cohort is None:
+            cohort = np.arange(model.num_users, dtype=np.int64)
+        else:
+            cohort = np.asarray(sorted(self.cohort), dtype=np.int64)
+
+        item_ids = np.empty((len(cohort), self.k), dtype=np.int32)
+        item_scores = np.empty((len(cohort), self.k), dtype=np.float32)
+
+        for start in range(0, len(cohort), self.batch_size):
+            batch = cohort[start:start + self.batch_size]
+            ids, top_scores = recommend_top_k(model, batch, self.k, self.seen_filter)
+            item_ids[start:start + len(batch)] = ids
+            item_scores[start:start + len(batch)] = top_scores
+
+        return TopKTable(cohort, item_ids, item_scores, version)
+
+    def _next_generation(self):
+        with self._published:
+            self._requested += 1
+            return self._requested
+
+    def refresh(self):
+        """Rebuild the table synchronously and atomically swap it in."""
+        self._next_generation()
+        return self._build_and_publish()
+
+    def _build_and_publish(self):
+        # Stamp the build with the generation it starts from: a build that
+        # began before a newer request can never satisfy that request
+        with self._published:
+            model, version = self.model, self._requested
+
+        start_time = time.perf_counter()
+        table = self.build_table(model, version)
+        self.stats['last_build_seconds'] = time.perf_counter() - start_time
+
+        with self._published:
+            # Publishing is a single reference assignment; readers never lock.
+            # A slower, older build never replaces a newer table.
+            if table.version > self._version:
+                self._table = table
+                self._version = table.version
+            self._published.notify_all()
+        return table
+
+    def start(self):
+        """Start the background refresh thread."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._stop_requested.clear()
+        self._worker = threading.Thread(target=self._run, name='topk-materializer', daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout=None):
+        """Stop the background refresh thread."""
+        self._stop_requested.set()
+        self._refresh_requested.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+
+    def request_refresh(self):
+        """
+        Ask the background thread to rebuild the table.
+
+        Returns:
+            int: The generation to wait for; only a build started after this
+            call publishes it
+        """
+        self.start()
+        generation = self._next_generation()
+        self._refresh_requested.set()
+        return generation
+
+    def wait_for_version(self, version, timeout=None):
+        """
+        Block until a table with at least the given version is published.
+
+        Returns:
+            bool: True if the version was reached before the timeout
+        """
+        with self._published:
+            return self._published.wait_for(lambda: self._version >= version, timeout)
+
+    def train_and_refresh(self, verbose=False):
+        """
+        Run a training pass and schedule a rebuild once it finishes.
+
+        Training runs on a copy of the model, so builds and live fallbacks
+        keep reading the old weights until the trained copy is swapped in.
+
+        Returns:
+            int: The table version that will reflect this training run
+        """
+        trained = copy.deepcopy(self.model)
+        trained.train(verbose=verbose)
+        with self._published:
+            self.model = trained
+        return self.request_refresh()
+
+    def get_recommendations(self, user_id, num_recommendations=3):
+        """
+        Get recommendations from the table, falling back to live scoring.
+
+        Args:
+            user_id (int): User ID
+            num_recommendations (int): Number of recommendations to return
+
+        Returns:
+            list: List of (movie_id, predicted_rating, movie_title) tuples
+        """
+        table = self._table
+        if table is not None:
+            recommendations = table.lookup(user_id, num_recommendations)
+            if recommendations is not None:
+                self.stats['table_hits'] += 1
+                return recommendations
+
+        self.stats['live_fallbacks'] += 1
+        ids, scores = recommend_top_k(self.model, [user_id], num_recommendations, self.seen_filter)
+        return TopKTable(np.array([user_id]), ids, scores, 0).lookup(user_id, num_recommendations)
+
+    def _run(self):
+        while not self._stop_requested.is_set():
+            self._refresh_requested.wait()
+            self._refresh_requested.clear()
+            if self._stop_requested.is_set():
+                break
+            self._build_and_publish()
+
+
+def demo_recommendation_materializer():
+    """Demonstrate materialized recommendations with a background refresh."""
+    from src.advanced.matrix_factorization_regularized import RegularizedMatrixFactorization
+
+    print("=== Materialized Top-K Recommendations Demo ===")
+
+    model = RegularizedMatrixFactorization(num_factors=2, learning_rate=0.01,
+                                           learning_rate_bias=0.005,
+                                           reg_lambda=0.1, num_epochs=100)
+    # Materialize only the "head" users; everyone else is scored live
+    materializer = RecommendationMaterializer(model, k=3, cohort=[0, 1, 2])
+
+    version = materializer.train_and_refresh()
+    materializer.wait_for_version(version, timeout=10)
+
+    table = materializer.table
+    print(f"\nTable version {table.version}: {len(table.user_ids)} users x {table.k} items, "
+          f"{table.nbytes} bytes, built in {materializer.stats['last_build_seconds'] * 1000:.2f} ms")
+
+    for user_id in range(len(users)):
+        source = "table" if user_id in table.row_of else "live"
+        recommendations = materializer.get_recommendations(user_id, num_recommendations=2)
+        print(f"\nRecommendations for {users[user_id]} ({source}):")
+        for movie_id, predicted_rating, movie_title in recommendations:
+            print(f"  - {movie_title}: {predicted_rating:.2f} stars")
+
+    materializer.stop()
+    print(f"\nTable hits: {materializer.stats['table_hits']}, "
+          f"live fallbacks: {materializer.stats['live_fallbacks']}")
+
+
+if __name__ == "__main__":
+    demo_recommendation_materializer()
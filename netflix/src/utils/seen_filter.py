@@ -0,0 +1,359 @@
+"""
+Compact "Already Seen" Filter
+This module stores each user's watched movies as sorted int32 CSR rows, with
+bitset or Bloom-filter rows for heavy users, and turns them into vectorized masks.
+"""
+
+import math
+import os
+import sys
+
+import numpy as np
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from src.basic.data_setup import ratings, movies
+
+# Odd 64-bit multipliers for the double-hashing scheme used by Bloom rows
+_HASH_MULT_1 = np.uint64(0x9E3779B97F4A7C15)
+_HASH_MULT_2 = np.uint64(0xC2B2AE3D27D4EB4F)
+
+
+def _bloom_positions(item_ids, num_bits, num_hashes):
+    """Return the (len(item_ids), num_hashes) bit positions for a Bloom row."""
+    items = np.asarray(item_ids, dtype=np.uint64) + np.uint64(1)
+    h1 = (items * _HASH_MULT_1) >> np.uint64(17)
+    h2 = ((items * _HASH_MULT_2) >> np.uint64(23)) | np.uint64(1)
+    steps = np.arange(num_hashes, dtype=np.uint64)
+    return ((h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(num_bits)).astype(np.int64)
+
+
+class SeenItemsFilter:
+    """
+    Per-user exclusion sets for recommendation.
+
+    Light users are stored exactly as sorted int32 rows in CSR layout.
+    Users with at least heavy_threshold items can instead be stored as a
+    packed bitset (exact, num_movies / 8 bytes) or a Bloom filter
+    (probabilistic, may wrongly exclude a small fraction of unseen movies).
+    A Bloom row is only used when it needs fewer bits than the catalog has
+    movies; otherwise the exact bitset is both smaller and free of errors.
+    """
+
+    MODES = ('csr', 'bitset', 'bloom')
+
+    def __init__(self, user_items, num_users, num_movies, heavy_threshold=None,
+                 heavy_mode='bitset', bloom_fp_rate=0.01):
+        """
+        Initialize the filter.
+
+        Args:
+            user_items (dict): Mapping of user ID to an iterable of seen movie IDs
+            num_users (int): Number of user rows
+            num_movies (int): Size of the movie catalog
+            heavy_threshold (int): Item count at which a user leaves the CSR store;
+                None keeps every user in CSR
+            heavy_mode (str): 'bitset' or 'bloom' storage for heavy users
+            bloom_fp_rate (float): Target false-positive rate for Bloom rows
+        """
+        if heavy_mode not in ('bitset', 'bloom'):
+            raise ValueError(f"heavy_mode must be 'bitset' or 'bloom', got {heavy_mode!r}")
+
+        self.num_users = num_users
+        self.num_movies = num_movies
+        self.heavy_threshold = heavy_threshold
+        self.heavy_mode = heavy_mode
+        self.bloom_fp_rate = bloom_fp_rate
+
+        # Heavy users: user_id -> packed bits; Bloom parameters kept alongside
+        self.heavy_rows = {}
+        self.bloom_params = {}
+        self._observed_false_positives = 0
+        self._observed_negatives = 0
+
+        counts = np.zeros(num_users, dtype=np.int64)
+        rows = {}
+        for user_id, items in user_items.items():
+            items = np.unique(np.fromiter(items, dtype=np.int32))
+            if heavy_threshold is not None and len(items) >= heavy_threshold:
+                self._add_heavy_row(user_id, items)
+            else:
+                rows[user_id] = items
+                counts[user_id] = len(items)
+
+        self.indptr = np.zeros(num_users + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.indptr[1:])
+        self.indices = np.empty(self.indptr[-1], dtype=np.int32)
+        for user_id, items in rows.items():
+            self.indices[self.indptr[user_id]:self.indptr[user_id + 1]] = items
+
+    @classmethod
+    def from_ratings(cls, user_ratings=None, num_users=None, num_movies=None, **kwargs):
+        """
+        Build a filter from a {user_id: {movie_id: rating}} dictionary.
+
+        Args:
+            user_ratings (dict): Ratings dictionary; defaults to the sample data
+            num_users (int): Number of user rows; defaults to max user ID + 1
+            num_movies (int): Catalog size; defaults to the sample catalog
+            **kwargs: Passed through to the constructor
+
+        Returns:
+            SeenItemsFilter: The populated filter
+        """
+        if user_ratings is None:
+            user_ratings = ratings
+        if num_users is None:
+            num_users = max(user_ratings, default=-1) + 1
+        if num_movies is None:
+            num_movies = len(movies)
+        return cls({user_id: user_rows.keys() for user_id, user_rows in user_ratings.items()},
+                   num_users, num_movies, **kwargs)
+
+    @classmethod
+    def from_csr(cls, indptr, indices, num_movies, **kwargs):
+        """
+        Build a filter from CSR arrays of seen movie IDs, one row per user.
+
+        Args:
+            indptr (np.ndarray): Row offsets, length num_users + 1
+            indices (np.ndarray): Movie IDs of every row, concatenated
+            num_movies (int): Catalog size
+            **kwargs: Passed through to the constructor
+
+        Returns:
+            SeenItemsFilter: The populated filter
+        """
+        num_users = len(indptr) - 1
+        return cls({user_id: indices[indptr[user_id]:indptr[user_id + 1]] for user_id in range(num_users)},
+                   num_users, num_movies, **kwargs)
+
+    def _add_heavy_row(self, user_id, items):
+        if self.heavy_mode == 'bloom':
+            num_items = max(len(items), 1)
+            num_bits = max(8, math.ceil(-num_items * math.log(self.bloom_fp_rate) / math.log(2) ** 2))
+            # A Bloom row only pays off when it is smaller than the exact bitset
+            if num_bits < self.num_movies:
+                self._add_bloom_row(user_id, items, num_bits)
+                return
+
+        bits = np.zeros(self.num_movies, dtype=bool)
+        bits[items] = True
+        self.heavy_rows[user_id] = np.packbits(bits)
+
+    def _add_bloom_row(self, user_id, items, num_bits):
+        num_hashes = max(1, round(num_bits / max(len(items), 1) * math.log(2)))
+        bits = np.zeros(num_bits, dtype=bool)
+        bits[_bloom_positions(items, num_bits, num_hashes).ravel()] = True
+        self.heavy_rows[user_id] = np.packbits(bits)
+        self.bloom_params[user_id] = (len(items), num_bits, num_hashes)
+
+        # Measure the real false-positive rate against the catalog while the
+        # exact item list is still at hand
+        truth = np.zeros(self.num_movies, dtype=bool)
+        truth[items] = True
+        predicted = self._bloom_masks([user_id], num_bits, num_hashes, self.num_movies)[0]
+        self._observed_false_positives += int(np.count_nonzero(predicted & ~truth))
+        self._observed_negatives += int(np.count_nonzero(~truth))
+
+    def _bloom_masks(self, user_ids, num_bits, num_hashes, num_movies):
+        """Masks for Bloom rows sharing (num_bits, num_hashes), hashing the catalog once."""
+        bits = np.unpackbits(np.stack([self.heavy_rows[user_id] for user_id in user_ids]),
+                             axis=1, count=num_bits).astype(bool)
+        positions = _bloom_positions(np.arange(num_movies), num_bits, num_hashes)
+        result = np.ones((len(user_ids), num_movies), dtype=bool)
+        for step in range(num_hashes):
+            result &= bits[:, positions[:, step]]
+        return result
+
+    def mode_of(self, user_id):
+        """Return the storage mode ('csr', 'bitset' or 'bloom') used for a user."""
+        if user_id in self.bloom_params:
+            return 'bloom'
+        if user_id in self.heavy_rows:
+            return 'bitset'
+        return 'csr'
+
+    def seen_items(self, user_id):
+        """Return the sorted CSR row for a user (empty for heavy or unknown users)."""
+        if not 0 <= user_id < self.num_users:
+            return self.indices[:0]
+        return self.indices[self.indptr[user_id]:self.indptr[user_id + 1]]
+
+    def contains(self, user_id, movie_id):
+        """
+        Check whether a user has seen a movie.
+
+        Returns:
+            bool: True if seen (Bloom rows may report false positives)
+        """
+        packed = self.heavy_rows.get(user_id)
+        if packed is not None:
+            # Test the one bit (or the k Bloom bits) without unpacking the row
+            if user_id in self.bloom_params:
+                _, num_bits, num_hashes = self.bloom_params[user_id]
+                positions = _bloom_positions([movie_id], num_bits, num_hashes)[0]
+            elif 0 <= movie_id < self.num_movies:
+                positions = np.array([movie_id])
+            else:
+                return False
+            # np.packbits stores the first bit in the high bit of each byte
+            return bool(np.all((packed[positions >> 3] >> (7 - (positions & 7))) & 1))
+        row = self.seen_items(user_id)
+        pos = np.searchsorted(row, movie_id)
+        return bool(pos < len(row) and row[pos] == movie_id)
+
+    def mask(self, user_id, num_movies=None):
+        """
+        Build a boolean exclusion mask for one user.
+
+        Args:
+            user_id (int): User ID
+            num_movies (int): Mask width; defaults to the catalog size
+
+        Returns:
+            np.ndarray: Boolean array, True for movies to exclude
+        """
+        return self.mask_batch([user_id], num_movies)[0]
+
+    def mask_batch(self, user_ids, num_movies=None):
+        """
+        Build exclusion masks for a batch of users in one scatter.
+
+        Args:
+            user_ids (array-like): User IDs, one mask row per user
+            num_movies (int): Mask width; defaults to the catalog size
+
+        Returns:
+            np.ndarray: Boolean array with shape (len(user_ids), num_movies)
+        """
+        if num_movies is None:
+            num_movies = self.num_movies
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        result = np.zeros((len(user_ids), num_movies), dtype=bool)
+
+        known = (user_ids >= 0) & (user_ids < self.num_users)
+        rows = np.flatnonzero(known)
+        starts = self.indptr[user_ids[rows]]
+        lengths = self.indptr[user_ids[rows] + 1] - starts
+        if lengths.sum():
+            row_index = np.repeat(rows, lengths)
+            offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            columns = self.indices[np.repeat(starts, lengths) + offsets]
+            in_range = columns < num_movies
+            result[row_index[in_range], columns[in_range]] = True
+
+        if self.heavy_rows:
+            # Group heavy users by row format so each group is one unpack
+            bitset_rows, bitset_users, bloom_groups = [], [], {}
+            for row, user_id in enumerate(user_ids.tolist()):
+                if user_id in self.bloom_params:
+                    group = bloom_groups.setdefault(self.bloom_params[user_id][1:], ([], []))
+                    group[0].append(row)
+                    group[1].append(user_id)
+                elif user_id in self.heavy_rows:
+                    bitset_rows.append(row)
+                    bitset_users.append(user_id)
+            if bitset_rows:
+                width = min(num_movies, self.num_movies)
+                bits = np.unpackbits(np.stack([self.heavy_rows[user_id] for user_id in bitset_users]),
+                                     axis=1, count=self.num_movies)
+                result[bitset_rows, :width] = bits[:, :width].astype(bool)
+            for (num_bits, num_hashes), (rows, group_users) in bloom_groups.items():
+                result[rows] = self._bloom_masks(group_users, num_bits, num_hashes, num_movies)
+        return result
+
+    def bytes_for_user(self, user_id):
+        """Return the bytes used to store one user's exclusion row."""
+        if user_id in self.heavy_rows:
+            return self.heavy_rows[user_id].nbytes
+        return len(self.seen_items(user_id)) * self.indices.itemsize + self.indptr.itemsize
+
+    def memory_report(self):
+        """
+        Summarize memory use across storage modes.
+
+        Returns:
+            dict: Byte counts per mode and the average bytes per user
+        """
+        heavy_bytes = {'bitset': 0, 'bloom': 0}
+        for user_id, bits in self.heavy_rows.items():
+            heavy_bytes[self.mode_of(user_id)] += bits.nbytes
+
+        csr_bytes = self.indptr.nbytes + self.indices.nbytes
+        total_bytes = csr_bytes + heavy_bytes['bitset'] + heavy_bytes['bloom']
+        return {
+            'num_users': self.num_users,
+            'num_heavy_users': len(self.heavy_rows),
+            'csr_bytes': csr_bytes,
+            'bitset_bytes': heavy_bytes['bitset'],
+            'bloom_bytes': heavy_bytes['bloom'],
+            'total_bytes': total_bytes,
+            'bytes_per_user': total_bytes / max(self.num_users, 1)
+        }
+
+    def false_positive_rate(self):
+        """
+        Report the false-positive rate of the Bloom rows.
+
+        Returns:
+            dict: 'expected' from the filter parameters and 'observed' measured
+            against the catalog at build time (both 0.0 without Bloom rows)
+        """
+        if not self.bloom_params:
+            return {'expected': 0.0, 'observed': 0.0}
+
+        expected = [
+            (1 - math.exp(-num_hashes * num_items / num_bits)) ** num_hashes
+            for num_items, num_bits, num_hashes in self.bloom_params.values()
+        ]
+        observed = self._observed_false_positives / max(self._observed_negatives, 1)
+        return {'expected': float(np.mean(expected)), 'observed': observed}
+
+
+def dict_bytes_per_user(user_ratings):
+    """Estimate the bytes a {movie_id: rating} dict costs per user, for comparison."""
+    total = 0
+    for user_rows in user_ratings.values():
+        total += sys.getsizeof(user_rows)
+        total += sum(sys.getsizeof(movie_id) + sys.getsizeof(rating)
+                     for movie_id, rating in user_rows.items())
+    return total / max(len(user_ratings), 1)
+
+
+def demo_seen_filter():
+    """Demonstrate the exclusion filter on a synthetic catalog."""
+    print("=== Compact Seen-Items Filter Demo ===")
+
+    rng = np.random.default_rng(42)
+    num_users, num_movies = 2_000, 200_000
+    history_sizes = rng.integers(5, 200, size=num_users)
+    history_sizes[:50] = rng.integers(3_000, 8_000, size=50)  # heavy watchers
+    synthetic = {
+        user_id: {int(movie_id): 1 for movie_id in rng.choice(num_movies, size, replace=False)}
+        for user_id, size in enumerate(history_sizes)
+    }
+
+    print(f"\nDict-of-dicts: {dict_bytes_per_user(synthetic):,.0f} bytes per user")
+    for heavy_mode in ('bitset', 'bloom'):
+        seen = SeenItemsFilter.from_ratings(synthetic, num_users, num_movies,
+                                            heavy_threshold=1_000, heavy_mode=heavy_mode)
+        report = seen.memory_report()
+        print(f"\nCSR + {heavy_mode} rows for heavy users:")
+        print(f"  Bytes per user: {report['bytes_per_user']:,.0f}")
+        print(f"  Heavy users: {report['num_heavy_users']}, total bytes: {report['total_bytes']:,}")
+        if heavy_mode == 'bloom':
+            num_bloom = sum(seen.mode_of(user_id) == 'bloom' for user_id in seen.heavy_rows)
+            print(f"  Bloom rows: {num_bloom} (the rest stay exact bitsets, which are smaller)")
+        if heavy_mode == 'bloom':
+            rates = seen.false_positive_rate()
+            print(f"  False-positive rate: expected {rates['expected']:.3%}, "
+                  f"observed {rates['observed']:.3%}")
+
+    masks = seen.mask_batch(np.arange(8), num_movies)
+    print(f"\nBatch mask for 8 users: shape {masks.shape}, {masks.sum():,} movies excluded")
+
+
+if __name__ == "__main__":
+    demo_seen_filter()
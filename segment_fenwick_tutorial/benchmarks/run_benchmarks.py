@@ -0,0 +1,391 @@
+import argparse
+import gc
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+# The structures live in the tutorial directories next to this one
+_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+for _dir in ('segment_tree', 'fenwick_tree', 'realworldexamples'):
+    sys.path.append(os.path.join(_root, _dir))
+
+from segment_tree import SegmentTree
+from iterative_segment_tree import IterativeSegmentTree
+from monoid_segment_tree import MonoidSegmentTree
+from lazy_segment_tree import LazySegmentTree
+from sparse_segment_tree import SparseSegmentTree
+from persistent_segment_tree import PersistentSegmentTree
+from fenwick_tree import FenwickTree
+from range_fenwick_tree import RangeFenwickTree
+from social_media_demo import FenwickTree2D
+
+try:
+    import numpy as np
+    from numpy_fenwick import NumpyFenwickTree
+    from fenwick_tree_2d import NumpyFenwickTree2D
+except ImportError:  # The NumPy variants are skipped without NumPy
+    np = NumpyFenwickTree = NumpyFenwickTree2D = None
+
+sys.setrecursionlimit(10_000) # The recursive SegmentTree needs ~log2(n) frames
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Run settings that must match the baseline for the timings to be comparable
+COMPARABLE_META = ("python", "numpy", "gil_enabled", "ops", "seed", "repeats")
+
+
+class PrefixArray:
+    # The simplest strategy: O(1) range sums, O(n) point updates
+    def __init__(self, arr):
+        self.prefix = [0] + list(itertools.accumulate(arr))
+
+    def add(self, idx, delta):
+        prefix = self.prefix
+        for i in range(idx + 1, len(prefix)):
+            prefix[i] += delta
+
+    def range_sum(self, l, r):
+        return self.prefix[r + 1] - self.prefix[l]
+
+
+# Every 1D strategy as (build(arr), write(tree, idx, delta), read(tree, l, r),
+# largest size it is run at). Writes add `delta` at one index; reads are
+# inclusive range sums. Size limits keep a full run in minutes: the prefix
+# array pays O(n) per write and SparseSegmentTree builds one set() at a time.
+def _set_from_add(tree, idx, delta, values):
+    values[idx] += delta
+    tree.update(idx, values[idx])
+
+
+STRUCTURES_1D = {
+    "prefix_array": (PrefixArray, lambda t, i, d: t.add(i, d), lambda t, l, r: t.range_sum(l, r), 10 ** 4),
+    "segment_tree": (SegmentTree, None, lambda t, l, r: t.query(l, r), 10 ** 6),
+    "iterative_segment_tree": (IterativeSegmentTree, None, lambda t, l, r: t.query(l, r), 10 ** 7),
+    "monoid_segment_tree": (MonoidSegmentTree, None, lambda t, l, r: t.query(l, r), 10 ** 7),
+    "lazy_segment_tree": (LazySegmentTree, lambda t, i, d: t.range_add(i, i, d),
+                          lambda t, l, r: t.query_sum(l, r), 10 ** 6),
+    "sparse_segment_tree": (None, lambda t, i, d: t.add(i, d), lambda t, l, r: t.query_sum(l, r), 10 ** 6),
+    "persistent_segment_tree": (PersistentSegmentTree, lambda t, i, d: t.add(i, d),
+                                lambda t, l, r: t.query(l, r), 10 ** 6),
+    "fenwick_tree": (FenwickTree, lambda t, i, d: t.update(i, d), lambda t, l, r: t.range_query(l, r), 10 ** 7),
+    "range_fenwick_tree": (RangeFenwickTree, lambda t, i, d: t.update(i, d),
+                           lambda t, l, r: t.range_sum(l, r), 10 ** 7),
+}
+if NumpyFenwickTree is not None:
+    STRUCTURES_1D["numpy_fenwick_tree"] = (NumpyFenwickTree, lambda t, i, d: t.update(i, d),
+                                           lambda t, l, r: t.range_query(l, r), 10 ** 7)
+
+STRUCTURES_2D = {
+    "fenwick_tree_2d": (FenwickTree2D, 10 ** 6),
+}
+if NumpyFenwickTree2D is not None:
+    STRUCTURES_2D["numpy_fenwick_tree_2d"] = (NumpyFenwickTree2D, 10 ** 7)
+
+
+def _sparse_build(arr):
+    tree = SparseSegmentTree(0, len(arr))
+    for i, value in enumerate(arr):
+        if value:
+            tree.set(i, value)
+    return tree
+
+
+def _percentile(sorted_samples, p):
+    return sorted_samples[min(len(sorted_samples) - 1, int(p / 100 * len(sorted_samples)))]
+
+
+def _make_ops(rng, n, num_ops, read_ratio, pick_range):
+    ops = []
+    for _ in range(num_ops):
+        if rng.random() < read_ratio:
+            ops.append((True, pick_range()))
+        else:
+            ops.append((False, (rng.randrange(n), rng.randint(-100, 100))))
+    return ops
+
+
+def _machine_speed(loops=100_000):
+    # Iterations/sec of a fixed pure-Python loop: how fast this machine runs
+    # CPython right now. Burstable and shared CPUs swing this by 1.5x or more
+    # between (and within) runs, and the structures' timings swing with it.
+    start = time.perf_counter()
+    total = 0
+    for i in range(loops):
+        total += i & 7
+    return loops / (time.perf_counter() - start)
+
+
+def _time_run(build, run_op, ops):
+    # One timed run on a freshly built structure: (build ms, ops/sec,
+    # sorted per-op latencies in ns, machine speed around the run)
+    gc.collect()
+    speed_before = _machine_speed()
+    start = time.perf_counter()
+    tree = build()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    clock = time.perf_counter_ns
+    latencies = []
+    start = time.perf_counter()
+    for op in ops:
+        t0 = clock()
+        run_op(tree, op)
+        latencies.append(clock() - t0)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return build_ms, len(ops) / elapsed, latencies, (speed_before + _machine_speed()) / 2
+
+
+def _peak_bytes(build):
+    # Peak memory of a build under tracemalloc, kept apart from the timed
+    # runs so tracing overhead doesn't distort the timings
+    gc.collect()
+    tracemalloc.start()
+    tree = build()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del tree
+    return peak
+
+
+def _summarize(runs, peak):
+    # Medians across runs. Shared and burstable machines drift both ways
+    # (short turbo bursts as well as slow stretches), so the best run is as
+    # much an outlier as the worst.
+    def latency_us(p):
+        return round(statistics.median(_percentile(latencies, p) for _, _, latencies, _ in runs) / 1000, 3)
+
+    return {
+        "build_ms": round(statistics.median(build_ms for build_ms, _, _, _ in runs), 3),
+        "ops_per_sec": round(statistics.median(ops_per_sec for _, ops_per_sec, _, _ in runs), 1),
+        "p50_us": latency_us(50),
+        "p90_us": latency_us(90),
+        "p99_us": latency_us(99),
+        "peak_bytes": peak,
+        "machine_speed": round(statistics.median(speed for _, _, _, speed in runs)),
+    }
+
+
+def bench_1d(name, n, read_ratio, num_ops, seed):
+    # The workload for one 1D run: (build, run_op, ops)
+    build_cls, write, read, _ = STRUCTURES_1D[name]
+    rng = random.Random(seed)
+    arr = [rng.randint(0, 1000) for _ in range(n)]
+
+    def pick_range():
+        l = rng.randrange(n)
+        return l, rng.randrange(l, n)
+
+    ops = _make_ops(rng, n, num_ops, read_ratio, pick_range)
+    if name == "sparse_segment_tree":
+        build = lambda: _sparse_build(arr)
+    else:
+        build = lambda: build_cls(arr)
+
+    if write is None:
+        # Trees whose update() sets a value: track values to turn adds into sets
+        values = list(arr)
+        write = lambda t, i, d: _set_from_add(t, i, d, values)
+
+    def run_op(tree, op):
+        is_read, args = op
+        if is_read:
+            read(tree, *args)
+        else:
+            write(tree, *args)
+
+    return build, run_op, ops
+
+
+def bench_2d(name, n, read_ratio, num_ops, seed):
+    # The workload for one 2D run: (build, run_op, ops)
+    cls, _ = STRUCTURES_2D[name]
+    side = max(1, math.isqrt(n))
+    rng = random.Random(seed)
+    cells = [(rng.randrange(side), rng.randrange(side), rng.randint(1, 100)) for _ in range(min(n, 10_000))]
+
+    def pick_range():
+        r1, c1 = rng.randrange(side), rng.randrange(side)
+        return r1, c1, rng.randrange(r1, side), rng.randrange(c1, side)
+
+    ops = _make_ops(rng, side, num_ops, read_ratio, pick_range)
+    ops = [(is_read, args if is_read else (args[0], rng.randrange(side), args[1])) for is_read, args in ops]
+
+    def build():
+        tree = cls(side, side)
+        for r, c, v in cells:
+            tree.update(r, c, v)
+        return tree
+
+    def run_op(tree, op):
+        is_read, args = op
+        if is_read:
+            tree.range_query(*args)
+        else:
+            tree.update(*args)
+
+    return build, run_op, ops
+
+
+def run(sizes, read_ratios, num_ops, structures, seed, repeats=5, log=print):
+    # Every configuration is warmed up once, then the whole suite is timed
+    # `repeats` times in rounds. A slow stretch on a shared machine then
+    # costs one run of each configuration it overlaps, not all of them.
+    every = [(name, bench_1d, STRUCTURES_1D[name][3]) for name in STRUCTURES_1D]
+    every += [(name, bench_2d, STRUCTURES_2D[name][1]) for name in STRUCTURES_2D]
+    workloads = []
+    for n in sizes:
+        for read_ratio in read_ratios:
+            for name, bench, max_size in every:
+                if structures and name not in structures:
+                    continue
+                if n > max_size:
+                    log(f"  skip {name} at n={n:,} (limit {max_size:,})")
+                    continue
+                build, run_op, ops = bench(name, n, read_ratio, num_ops, seed)
+                tree = build() # Untimed warm-up: allocator, caches, first-call costs
+                for op in ops[:1000]:
+                    run_op(tree, op)
+                del tree
+                workloads.append((name, n, read_ratio, build, run_op, ops, []))
+
+    for round_no in range(1, max(1, repeats) + 1):
+        log(f"  round {round_no}/{max(1, repeats)}")
+        for _, _, _, build, run_op, ops, runs in workloads:
+            runs.append(_time_run(build, run_op, ops))
+
+    results = []
+    for name, n, read_ratio, build, _, _, runs in workloads:
+        r = _summarize(runs, _peak_bytes(build))
+        r.update({"structure": name, "size": n, "read_ratio": read_ratio})
+        results.append(r)
+        log(f"  {name:<24} n={n:<10,} reads={read_ratio:<4} build {r['build_ms']:>9.1f} ms  "
+            f"{r['ops_per_sec']:>12,.0f} ops/s  p99 {r['p99_us']:>8.1f} us  "
+            f"peak {r['peak_bytes'] / 1e6:>7.1f} MB")
+    return results
+
+
+def _key(r):
+    return r["structure"], r["size"], r["read_ratio"]
+
+
+def meta_mismatches(meta, baseline_meta):
+    # (field, baseline value, current value) for every setting that differs
+    return [(key, baseline_meta.get(key), meta.get(key))
+            for key in COMPARABLE_META if baseline_meta.get(key) != meta.get(key)]
+
+
+def compare(results, baseline, tolerance, min_build_ms=1.0, min_p99_us=5.0):
+    # Regressions: throughput down, or build time / p99 latency up, by more
+    # than `tolerance` (a fraction) against the baseline. Build time and p99
+    # must also grow by at least min_build_ms / min_p99_us, so jitter on
+    # sub-millisecond builds and microsecond latencies isn't flagged.
+    # Ratios are scaled by the machine speed measured around each side's
+    # runs, so a throttled CPU isn't read as slower code.
+    base = {_key(r): r for r in baseline["results"]}
+    regressions = []
+    print(f"\n{'structure':<24} {'size':>10} {'reads':>6} {'ops/s vs base':>14} {'build vs base':>14} {'p99 vs base':>12}")
+    for r in results:
+        b = base.get(_key(r))
+        if b is None:
+            continue
+        speed = r["machine_speed"] / b["machine_speed"] if b.get("machine_speed") else 1.0
+        build_ms, p99_us = r["build_ms"] * speed, r["p99_us"] * speed
+        ops = r["ops_per_sec"] / speed / b["ops_per_sec"]
+        build = build_ms / b["build_ms"] if b["build_ms"] else 1.0
+        p99 = p99_us / b["p99_us"] if b["p99_us"] else 1.0
+        build_up = build > 1 + tolerance and build_ms - b["build_ms"] >= min_build_ms
+        p99_up = p99 > 1 + tolerance and p99_us - b["p99_us"] >= min_p99_us
+        flag = ops < 1 - tolerance or build_up or p99_up
+        if flag:
+            regressions.append(_key(r))
+        print(f"{r['structure']:<24} {r['size']:>10,} {r['read_ratio']:>6} {ops:>13.2f}x {build:>13.2f}x "
+              f"{p99:>11.2f}x{'  <-- REGRESSION' if flag else ''}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark segment tree, Fenwick tree and prefix-array strategies.")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma-separated element counts, e.g. 1e3,1e5,1e7 (default: %(default)s)")
+    parser.add_argument("--read-ratios", default="0.9,0.5,0.1",
+                        help="comma-separated fraction of operations that are reads (default: %(default)s)")
+    parser.add_argument("--ops", type=int, default=20_000, help="operations per run (default: %(default)s)")
+    parser.add_argument("--structures", default="",
+                        help="comma-separated subset to run (default: all); choices: "
+                             + ", ".join(list(STRUCTURES_1D) + list(STRUCTURES_2D)))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=5,
+                        help="timed rounds over the whole suite after one warm-up; the median of "
+                             "each measurement is kept (default: %(default)s)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--save-baseline", action="store_true", help=f"write results to {DEFAULT_BASELINE}")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE,
+                        help="compare against a baseline JSON (default: baseline.json); exits 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.4,
+                        help="allowed slowdown before a result counts as a regression (default: %(default)s)")
+    parser.add_argument("--min-build-ms", type=float, default=1.0,
+                        help="smallest build-time increase that can count as a regression (default: %(default)s)")
+    parser.add_argument("--min-p99-us", type=float, default=5.0,
+                        help="smallest p99 increase that can count as a regression (default: %(default)s)")
+    parser.add_argument("--allow-mismatch", action="store_true",
+                        help="compare even if the baseline ran with other settings or versions (only warn)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(float(s)) for s in args.sizes.split(",")]
+    read_ratios = [float(r) for r in args.read_ratios.split(",")]
+    structures = [s for s in args.structures.split(",") if s]
+    unknown = set(structures) - set(STRUCTURES_1D) - set(STRUCTURES_2D)
+    if unknown:
+        parser.error(f"unknown structures: {', '.join(sorted(unknown))}")
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    meta = {
+        "python": platform.python_version(),
+        "numpy": np.__version__ if np is not None else None,
+        "platform": platform.platform(),
+        "gil_enabled": gil,
+        "ops": args.ops,
+        "seed": args.seed,
+        "repeats": args.repeats,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+    if args.compare:
+        # Checked before running, so a mismatch fails fast
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        mismatches = meta_mismatches(meta, baseline.get("meta", {}))
+        for key, old, new in mismatches:
+            print(f"Warning: baseline {key} is {old!r}, this run uses {new!r}")
+        if mismatches and not args.allow_mismatch:
+            print("Refusing to compare runs with different settings; pass --allow-mismatch to compare anyway")
+            return 2
+
+    print(f"Python {platform.python_version()} on {platform.platform()}, GIL enabled: {gil}")
+    results = run(sizes, read_ratios, args.ops, structures, args.seed, args.repeats)
+    report = {"meta": meta, "results": results}
+
+    for path in filter(None, (args.output, DEFAULT_BASELINE if args.save_baseline else None)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {path}")
+
+    if args.compare:
+        regressions = compare(results, baseline, args.tolerance, args.min_build_ms, args.min_p99_us)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            return 1
+        print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
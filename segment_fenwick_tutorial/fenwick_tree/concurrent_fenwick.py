@@ -0,0 +1,157 @@
+import itertools
+import sys
+import threading
+import time
+
+from fenwick_tree import FenwickTree
+
+
+class ShardedFenwickCounter:
+    # A Fenwick Tree that many threads can write at once.
+    # Writes go to one of `num_shards` independent Fenwick Trees (each thread
+    # sticks to its own shard), so writers on different shards never share a
+    # lock. A Fenwick Tree is linear, so the real tree is just the sum of the
+    # shards: reads add up one prefix sum per shard, and a snapshot adds the
+    # shard arrays element by element.
+    #
+    # Reads never take a lock. Each shard has a sequence number that a writer
+    # makes odd while it is mid-update and even again when done (a seqlock);
+    # a reader that sees it change simply retries that shard.
+    def __init__(self, size, num_shards=8):
+        self.n = size
+        self.num_shards = num_shards
+        self.shards = [FenwickTree([0] * size) for _ in range(num_shards)]
+        self.locks = [threading.Lock() for _ in range(num_shards)]
+        self.seq = [0] * num_shards
+        self._next_shard = itertools.count()
+        self._local = threading.local()
+
+    def _my_shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            # Hand shards out round-robin so threads spread evenly
+            shard = self._local.shard = next(self._next_shard) % self.num_shards
+        return shard
+
+    def update(self, idx, delta):
+        # Add `delta` at `idx`. Only threads sharing this shard can contend.
+        s = self._my_shard()
+        with self.locks[s]:
+            self.seq[s] += 1 # Odd: update in progress
+            try:
+                self.shards[s].update(idx, delta)
+            finally:
+                self.seq[s] += 1 # Even again, even if the update raised, so readers never spin
+
+    def _read_shard(self, s, read):
+        # Run `read(shard)` until it completes without a concurrent write
+        shard, seq = self.shards[s], self.seq
+        while True:
+            before = seq[s]
+            if before & 1:
+                time.sleep(0) # A writer is mid-update; let it finish
+                continue
+            result = read(shard)
+            if seq[s] == before:
+                return result
+
+    def query(self, idx):
+        # Prefix sum of elements 0..idx across all shards, without locking
+        return sum(self._read_shard(s, lambda shard: shard.query(idx)) for s in range(self.num_shards))
+
+    def range_query(self, l, r):
+        return self.query(r) - (self.query(l - 1) if l > 0 else 0)
+
+    def epoch(self):
+        # Number of completed writes; unchanged epoch means an older snapshot
+        # is still exact
+        return sum(seq >> 1 for seq in self.seq)
+
+    def snapshot(self):
+        # A plain FenwickTree equal to the merged shards at one consistent
+        # point per shard. Query it as much as you like without touching the
+        # live counters again.
+        values = [0] * self.n
+        tree = [0] * (self.n + 1)
+        for s in range(self.num_shards):
+            shard_values, shard_tree = self._read_shard(s, lambda shard: (list(shard.values), list(shard.tree)))
+            for i, v in enumerate(shard_values):
+                values[i] += v
+            for i, v in enumerate(shard_tree):
+                tree[i] += v
+        return FenwickTree.from_parts(values, tree)
+
+
+class LockedFenwickTree:
+    # The baseline: one FenwickTree behind one global lock
+    def __init__(self, size):
+        self.tree = FenwickTree([0] * size)
+        self.lock = threading.Lock()
+
+    def update(self, idx, delta):
+        with self.lock:
+            self.tree.update(idx, delta)
+
+    def query(self, idx):
+        with self.lock:
+            return self.tree.query(idx)
+
+
+def gil_enabled():
+    # Free-threaded builds (python3.13t and later) can run without the GIL
+    is_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_enabled is None else is_enabled()
+
+
+def write_throughput(counter, num_threads, writes_per_thread, size):
+    # Start `num_threads` writers together and return total writes per second
+    barrier = threading.Barrier(num_threads + 1)
+
+    def writer(seed):
+        idx = seed % size
+        barrier.wait()
+        for _ in range(writes_per_thread):
+            counter.update(idx, 1)
+            idx = (idx * 1103515245 + 12345) % size # Cheap pseudo-random walk
+
+    threads = [threading.Thread(target=writer, args=(t,)) for t in range(num_threads)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    return num_threads * writes_per_thread / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    size, writes = 100_000, 50_000
+    print(f"GIL enabled: {gil_enabled()} (Python {sys.version.split()[0]})")
+    print("Run under a free-threaded build (e.g. python3.13t, PYTHON_GIL=0) to compare without the GIL.\n")
+    print(f"{'threads':>8} {'global lock':>14} {'sharded':>14} {'speedup':>8}")
+    for num_threads in (1, 2, 4, 8, 16):
+        locked = write_throughput(LockedFenwickTree(size), num_threads, writes, size)
+        sharded_counter = ShardedFenwickCounter(size, num_shards=16)
+        sharded = write_throughput(sharded_counter, num_threads, writes, size)
+        assert sharded_counter.query(size - 1) == num_threads * writes
+        print(f"{num_threads:>8} {locked:>14,.0f} {sharded:>14,.0f} {sharded / locked:>7.1f}x")
+
+    # Readers run alongside writers without blocking them
+    counter = ShardedFenwickCounter(size, num_shards=16)
+    stop = threading.Event()
+    reads = [0]
+
+    def reader():
+        while not stop.is_set():
+            counter.query(size // 2)
+            reads[0] += 1
+
+    r = threading.Thread(target=reader)
+    r.start()
+    with_reader = write_throughput(counter, 4, writes, size)
+    stop.set()
+    r.join()
+    snap = counter.snapshot()
+    assert snap.query(size - 1) == 4 * writes
+    print(f"\n4 writers + 1 lock-free reader: {with_reader:,.0f} writes/s, {reads[0]:,} reads during the run")
+    print(f"Snapshot at epoch {counter.epoch():,}: total = {snap.query(size - 1):,}")
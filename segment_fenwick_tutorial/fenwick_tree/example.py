@@ -23,6 +23,54 @@ print(f"Sum of range (index 1 to 3): {ft.range_query(1, 3)}")  # Should be 3 + 1
 assert ft.query(5) == 41, "Test Case 1 Failed: Prefix sum after update is incorrect"
 assert ft.range_query(1, 3) == 20, "Test Case 2 Failed: Range sum after update is incorrect"
 
+# Or let the tree track values for you: set() works out the difference itself
+ft.set(4, 1) # Index 4 was 9
+print(f"\nAfter setting index 4 to 1:")
+print(f"Value at index 4: {ft.get(4)}")
+print(f"Prefix sum up to index 5 (0-indexed): {ft.query(5)}")  # Should be 41 - 8 = 33
+
+assert ft.get(4) == 1, "Test Case 3 Failed: get() after set() is incorrect"
+assert ft.query(5) == 33, "Test Case 4 Failed: Prefix sum after set() is incorrect"
+
+# Range updates: add to every element of [l, r] at once
+from range_fenwick_tree import RangeFenwickTree
+
+rft = RangeFenwickTree([1, 3, 5, 7, 9, 11])
+rft.range_add(1, 4, 2) # Array becomes [1, 5, 7, 9, 11, 11]
+print(f"\nAfter adding 2 to indices 1-4:")
+print(f"Sum of range (index 1 to 3): {rft.range_sum(1, 3)}")  # Should be 5+7+9 = 21
+print(f"Value at index 4: {rft.get(4)}")  # Should be 11
+
+assert rft.range_sum(1, 3) == 21, "Test Case 5 Failed: Range sum after range_add is incorrect"
+assert rft.get(4) == 11, "Test Case 6 Failed: get() after range_add is incorrect"
+
+# Batch updates and queries with the NumPy-backed tree (skipped without NumPy)
+try:
+    from numpy_fenwick import NumpyFenwickTree
+except ImportError:
+    NumpyFenwickTree = None
+
+if NumpyFenwickTree is not None:
+    nft = NumpyFenwickTree([1, 3, 5, 7, 9, 11])
+    nft.update_many([0, 2, 2, 5], [1, 2, 3, 4]) # Repeated indices add up
+    print(f"\nNumPy tree prefix sums: {nft.query_many([0, 2, 5]).tolist()}")  # [2, 15, 46]
+    print(f"NumPy tree range sums: {nft.range_query_many([1, 3], [3, 5]).tolist()}")  # [20, 31]
+
+    assert nft.query_many([0, 2, 5]).tolist() == [2, 15, 46], "Test Case 7 Failed: Batch prefix sums are incorrect"
+    assert nft.range_query_many([1, 3], [3, 5]).tolist() == [20, 31], "Test Case 8 Failed: Batch range sums are incorrect"
+
+# A failed write must not leave a shard looking mid-update to readers
+from concurrent_fenwick import ShardedFenwickCounter
+
+counter = ShardedFenwickCounter(10, num_shards=2)
+counter.update(3, 5)
+try:
+    counter.update(10, 1)
+except IndexError:
+    pass
+assert all(seq % 2 == 0 for seq in counter.seq), "Test Case 9 Failed: Failed update left a shard marked mid-update"
+assert counter.query(5) == 5, "Test Case 10 Failed: Query after a failed update is incorrect"
+
 print("\nAll Fenwick Tree tests passed!")
 
 
@@ -1,21 +1,44 @@
 class FenwickTree:
     def __init__(self, arr):
         self.n = len(arr)
-        self.tree = [0] * (self.n + 1) # Fenwick Trees are often 1-indexed
-        # Build the tree by updating each element
-        for i in range(self.n):
-            self.update(i, arr[i])
+        self.values = list(arr) # Current value at each index, for get/set
+        self.tree = [0] + self.values # Fenwick Trees are often 1-indexed
+        # Build in O(n): each node starts as its own value and hands its
+        # partial sum to its parent exactly once, instead of n separate updates
+        tree = self.tree
+        for i in range(1, self.n + 1):
+            parent = i + (i & (-i))
+            if parent <= self.n:
+                tree[parent] += tree[i]
+
+    @classmethod
+    def from_parts(cls, values, tree):
+        # Wrap an already-built tree (e.g. from numpy_fenwick) without rebuilding
+        ft = cls.__new__(cls)
+        ft.n = len(values)
+        ft.values = values
+        ft.tree = tree
+        return ft
 
     def update(self, idx, val):
         # Update an element at index `idx` with `val`
         # Note: For point updates, we usually update with the *difference*
         # between the new value and the old value. This example assumes
         # `val` is the difference to be added.
+        self.values[idx] += val
         idx += 1  # Convert to 1-based indexing
         while idx <= self.n:
             self.tree[idx] += val
             idx += idx & (-idx) # Move to the next relevant parent
 
+    def set(self, idx, value):
+        # Set the element at `idx` to `value`; the difference is computed for you
+        self.update(idx, value - self.values[idx])
+
+    def get(self, idx):
+        # Current value of the element at `idx`
+        return self.values[idx]
+
     def query(self, idx):
         # Get the prefix sum up to index `idx`
         idx += 1  # Convert to 1-based indexing
@@ -30,4 +53,17 @@ class FenwickTree:
         # This is simply (sum up to r) - (sum up to l-1)
         return self.query(r) - self.query(l - 1)
 
-
+    def search(self, target):
+        # Smallest index whose prefix sum reaches `target`, by binary descent
+        # over the tree in O(log n) instead of binary search over query().
+        # All values must be non-negative. Returns self.n if the total is
+        # smaller than `target`.
+        pos = 0
+        step = 1 << (self.n.bit_length() - 1) if self.n else 0
+        while step:
+            nxt = pos + step
+            if nxt <= self.n and self.tree[nxt] < target:
+                pos = nxt
+                target -= self.tree[nxt]
+            step >>= 1
+        return pos # pos elements have a total below target, so index pos is the answer
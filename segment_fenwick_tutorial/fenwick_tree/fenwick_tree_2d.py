@@ -0,0 +1,213 @@
+import numpy as np
+
+
+def _lowbit(i):
+    return i & -i
+
+
+class NumpyFenwickTree2D:
+    # A 2D Fenwick Tree stored in one contiguous (rows + 1) x (cols + 1)
+    # int64/float64 array instead of a list of Python lists.
+    # Batch calls move every point through the tree together: one NumPy
+    # operation per (row level, column level) pair, about log2(R) * log2(C).
+    def __init__(self, rows, cols, dtype=np.int64):
+        self.rows = rows
+        self.cols = cols
+        self.dtype = np.dtype(dtype)
+        self.tree = np.zeros((rows + 1, cols + 1), dtype=self.dtype)
+
+    @classmethod
+    def from_grid(cls, grid, dtype=None):
+        # O(R * C) build: the 2D tree is the 1D Fenwick build applied along
+        # each axis in turn, and each 1D build is a difference of prefix sums
+        grid = np.asarray(grid, dtype=dtype)
+        if dtype is None:
+            grid = grid.astype(np.float64 if grid.dtype.kind == "f" else np.int64)
+        ft = cls(grid.shape[0], grid.shape[1], grid.dtype)
+        tree = ft.tree
+        tree[1:, 1:] = grid
+        with np.errstate(over="ignore"):
+            for axis, n in ((0, ft.rows), (1, ft.cols)):
+                prefix = np.cumsum(tree, axis=axis)
+                i = np.arange(1, n + 1)
+                lo = i - _lowbit(i)
+                if axis == 0:
+                    tree[1:] = prefix[i] - prefix[lo]
+                else:
+                    tree[:, 1:] = prefix[:, i] - prefix[:, lo]
+        return ft
+
+    def update_many(self, r, c, deltas):
+        # Add deltas[k] at cell (r[k], c[k]); repeated cells accumulate
+        r = np.asarray(r, dtype=np.int64)
+        c = np.asarray(c, dtype=np.int64)
+        deltas = np.broadcast_to(np.asarray(deltas, dtype=self.dtype), r.shape)
+        if r.size and (r.min() < 0 or r.max() >= self.rows or c.min() < 0 or c.max() >= self.cols):
+            raise IndexError("2D Fenwick tree index out of range")
+
+        flat = self.tree.reshape(-1) # A view: the tree is contiguous
+        width = self.cols + 1
+        i, c = r + 1, c + 1
+        while i.size:
+            row_base, j, d = i * width, c, deltas
+            while j.size:
+                np.add.at(flat, row_base + j, d)
+                j = j + _lowbit(j)
+                keep = j <= self.cols
+                row_base, j, d = row_base[keep], j[keep], d[keep]
+            i = i + _lowbit(i)
+            keep = i <= self.rows
+            i, c, deltas = i[keep], c[keep], deltas[keep]
+
+    def query_many(self, r, c):
+        # Sums of the rectangles (0, 0)..(r[k], c[k]); -1 gives 0 because
+        # row 0 and column 0 of the tree are always 0
+        i = np.asarray(r, dtype=np.int64) + 1
+        c = np.asarray(c, dtype=np.int64) + 1
+        result = np.zeros(i.shape, dtype=self.dtype)
+        while i.any():
+            j = c.copy()
+            while j.any():
+                result += self.tree[i, j]
+                j -= _lowbit(j)
+            i -= _lowbit(i)
+        return result
+
+    def rectangle_query_many(self, r1, c1, r2, c2):
+        # Sums of the inclusive rectangles (r1[k], c1[k])..(r2[k], c2[k])
+        r1 = np.asarray(r1, dtype=np.int64)
+        c1 = np.asarray(c1, dtype=np.int64)
+        return (self.query_many(r2, c2) - self.query_many(r1 - 1, c2)
+                - self.query_many(r2, c1 - 1) + self.query_many(r1 - 1, c1 - 1))
+
+    # Scalar methods with the same names as FenwickTree2D in social_media_demo.py
+    def update(self, r, c, val):
+        self.update_many([r], [c], [val])
+
+    def query(self, r, c):
+        return self.query_many([r], [c])[0].item()
+
+    def range_query(self, r1, c1, r2, c2):
+        return self.rectangle_query_many([r1], [c1], [r2], [c2])[0].item()
+
+
+class CompressedFenwickTree2D:
+    # An offline 2D Fenwick Tree over arbitrary (x, y) coordinates, e.g.
+    # longitude/latitude. All points that will ever be updated are given up
+    # front. Outer Fenwick node i (over distinct x values) keeps its own small
+    # Fenwick Tree over only the y values that actually reach it, so memory
+    # is O(P log P) for P distinct points instead of O(width * height).
+    #
+    # Every inner tree lives in one flat array. Entry `keys[k]` is
+    # node * (num_ys + 1) + y_rank, sorted, so node i owns the slice
+    # [start[i], start[i + 1]) and one global searchsorted finds a y inside
+    # any node: batches stay vectorized across different nodes.
+    def __init__(self, x, y, weights=None, dtype=np.int64):
+        x = np.asarray(x)
+        y = np.asarray(y)
+        self.dtype = np.dtype(dtype)
+        self.xs = np.unique(x)
+        self.ys = np.unique(y)
+        self.num_xs = len(self.xs)
+        self._stride = len(self.ys) + 1
+
+        # Walk every point up the outer tree and record (node, y) pairs
+        i = np.searchsorted(self.xs, x) + 1
+        y_rank = np.searchsorted(self.ys, y)
+        w = np.zeros(len(x), dtype=self.dtype) if weights is None else \
+            np.broadcast_to(np.asarray(weights, dtype=self.dtype), x.shape)
+        keys, key_weights = [], []
+        while i.size:
+            keys.append(i * self._stride + y_rank)
+            key_weights.append(w)
+            i = i + _lowbit(i)
+            keep = i <= self.num_xs
+            i, y_rank, w = i[keep], y_rank[keep], w[keep]
+        keys = np.concatenate(keys) if keys else np.zeros(0, dtype=np.int64)
+        self.keys, slot = np.unique(keys, return_inverse=True)
+        self.start = np.searchsorted(self.keys, np.arange(self.num_xs + 2) * self._stride)
+
+        # Sum the initial weights per entry, then build every inner tree at
+        # once with the prefix-difference trick from numpy_fenwick.py
+        leaf = np.zeros(len(self.keys), dtype=self.dtype)
+        if weights is not None:
+            np.add.at(leaf, slot.reshape(-1), np.concatenate(key_weights))
+        prefix = np.zeros(len(leaf) + 1, dtype=self.dtype)
+        np.cumsum(leaf, out=prefix[1:])
+        node = self.keys // self._stride
+        start = self.start[node]
+        p = np.arange(len(self.keys)) - start + 1 # 1-based position inside the node
+        self.tree = prefix[start + p] - prefix[start + p - _lowbit(p)]
+
+    def nbytes(self):
+        return self.keys.nbytes + self.start.nbytes + self.tree.nbytes + self.xs.nbytes + self.ys.nbytes
+
+    def update_many(self, x, y, deltas):
+        # Add deltas[k] at point (x[k], y[k]); the point must be one of the
+        # points the tree was built with
+        x = np.asarray(x)
+        y = np.asarray(y)
+        deltas = np.broadcast_to(np.asarray(deltas, dtype=self.dtype), x.shape)
+        x_pos = np.searchsorted(self.xs, x)
+        y_rank = np.searchsorted(self.ys, y)
+        known = (x_pos < self.num_xs) & (y_rank < len(self.ys))
+        known[known] &= (self.xs[x_pos[known]] == x[known]) & (self.ys[y_rank[known]] == y[known])
+        if not known.all():
+            raise KeyError("Point was not declared when the tree was built")
+
+        i = x_pos + 1
+        while i.size:
+            start = self.start[i]
+            length = self.start[i + 1] - start
+            # 1-based position of y inside node i's inner tree
+            p = np.searchsorted(self.keys, i * self._stride + y_rank) - start + 1
+            d = deltas
+            while p.size:
+                np.add.at(self.tree, start + p - 1, d)
+                p = p + _lowbit(p)
+                keep = p <= length
+                start, length, p, d = start[keep], length[keep], p[keep], d[keep]
+            i = i + _lowbit(i)
+            keep = i <= self.num_xs
+            i, y_rank, deltas = i[keep], y_rank[keep], deltas[keep]
+
+    def _prefix_many(self, x_count, y_count):
+        # Sum over points with x among the first x_count distinct xs and
+        # y among the first y_count distinct ys
+        i = np.asarray(x_count, dtype=np.int64).copy()
+        y_count = np.asarray(y_count, dtype=np.int64)
+        result = np.zeros(i.shape, dtype=self.dtype)
+        while i.any():
+            active = i > 0
+            node = i[active]
+            start = self.start[node]
+            # Entries of node i with y rank < y_count
+            p = np.searchsorted(self.keys, node * self._stride + y_count[active]) - start
+            s = np.zeros(node.shape, dtype=self.dtype)
+            while p.any():
+                # Finished lanes read slot start - 1 but are masked out
+                s += np.where(p > 0, self.tree[np.maximum(start + p - 1, 0)], 0)
+                p -= _lowbit(p)
+            result[active] += s
+            i[active] -= _lowbit(node)
+        return result
+
+    def query_many(self, x, y):
+        # Sums over all points with px <= x[k] and py <= y[k]
+        return self._prefix_many(np.searchsorted(self.xs, x, side="right"),
+                                 np.searchsorted(self.ys, y, side="right"))
+
+    def rectangle_query_many(self, x1, y1, x2, y2):
+        # Sums over points inside the inclusive boxes [x1, x2] x [y1, y2]
+        x_hi = np.searchsorted(self.xs, x2, side="right")
+        x_lo = np.searchsorted(self.xs, x1, side="left")
+        y_hi = np.searchsorted(self.ys, y2, side="right")
+        y_lo = np.searchsorted(self.ys, y1, side="left")
+        return (self._prefix_many(x_hi, y_hi) - self._prefix_many(x_lo, y_hi)
+                - self._prefix_many(x_hi, y_lo) + self._prefix_many(x_lo, y_lo))
+
+    def update(self, x, y, val):
+        self.update_many([x], [y], [val])
+
+    def range_query(self, x1, y1, x2, y2):
+        return self.rectangle_query_many([x1], [y1], [x2], [y2])[0].item()
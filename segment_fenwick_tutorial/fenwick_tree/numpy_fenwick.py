@@ -0,0 +1,238 @@
+import numpy as np
+
+from fenwick_tree import FenwickTree
+
+
+def _abs_total(values):
+    # sum(|values|) as a float: bounds every node, prefix and range sum
+    return float(np.abs(values.astype(np.float64)).sum())
+
+
+def build_fenwick_array(values, dtype=None):
+    # Vectorized O(n) build. Node i (1-based) covers the lowbit(i) elements
+    # ending at i, so it is simply a difference of two prefix sums:
+    #   tree[i] = prefix[i] - prefix[i - lowbit(i)]
+    values = np.asarray(values, dtype=dtype)
+    if dtype is None:
+        values = values.astype(np.float64 if values.dtype.kind == "f" else np.int64)
+    n = len(values)
+    prefix = np.zeros(n + 1, dtype=values.dtype)
+    np.cumsum(values, out=prefix[1:])
+    i = np.arange(1, n + 1)
+    tree = np.zeros(n + 1, dtype=values.dtype)
+    # int64 prefix sums may wrap, but the differences are still exact
+    # whenever the true node sums fit in int64
+    with np.errstate(over="ignore"):
+        tree[1:] = prefix[i] - prefix[i - (i & -i)]
+    return tree
+
+
+def fenwick_tree_from_array(arr):
+    # Build a regular FenwickTree from a large array in milliseconds. Its
+    # nodes are Python ints, so integers whose sums might not fit in int64
+    # (and arrays of arbitrary Python numbers) are built exactly with object
+    # arithmetic instead of wrapping.
+    values = np.asarray(arr)
+    dtype = None
+    if values.dtype.kind == "O" or (values.dtype.kind in "iu" and _abs_total(values) >= 2 ** 62):
+        dtype = object
+    tree = build_fenwick_array(values, dtype)
+    return FenwickTree.from_parts(values.tolist(), tree.tolist())
+
+
+class NumpyFenwickTree:
+    # A Fenwick Tree in a typed NumPy array with vectorized batch operations.
+    # Batch calls walk all indices up (or down) the tree together: one NumPy
+    # operation per tree level, about log2(n) in total, instead of a Python
+    # loop per index.
+    def __init__(self, arr=None, size=None, dtype=np.int64):
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.dtype(np.int64), np.dtype(np.float64)):
+            raise TypeError("NumpyFenwickTree stores int64 or float64 values")
+        if arr is None:
+            arr = np.zeros(size, dtype=self.dtype)
+        self.values = np.array(arr, dtype=self.dtype) # Current value at each index
+        self.n = len(self.values)
+        self._abs_bound = self._bound_for(self.values) # Checked before the build can wrap
+        self.tree = build_fenwick_array(self.values, self.dtype)
+
+    def _bound_for(self, values):
+        # A bound on |x| for every value, node and prefix sum of `values`.
+        # Query lanes add nodes into partial range sums, each within twice
+        # the bound, so staying under 2**62 means nothing ever wraps.
+        # sum(|values|) bounds them all; only when that is too close to the
+        # int64 limit are they computed exactly in Python integers.
+        if self.dtype.kind != "i" or not len(values):
+            return 0
+        total = _abs_total(values)
+        if total < 2 ** 62:
+            return int(total) + 1
+        exact = values.astype(object)
+        sums = (exact, build_fenwick_array(exact, object), np.cumsum(exact))
+        bound = max(max(int(x.max()), -int(x.min())) for x in sums)
+        if bound >= 2 ** 62:
+            raise OverflowError("Fenwick tree sums would overflow int64")
+        return bound
+
+    def _check_overflow(self, indices, deltas):
+        # Cheap test first: no value, node or prefix sum can move by more
+        # than the sum of every |delta|. Only when the bound gets too close
+        # to the limit is the updated tree checked exactly.
+        if self.dtype.kind != "i":
+            return
+        increase = _abs_total(deltas)
+        if self._abs_bound + increase < 2 ** 62:
+            self._abs_bound += int(increase) + 1
+            return
+
+        values = self.values.astype(object)
+        np.add.at(values, indices, deltas.astype(object))
+        self._abs_bound = self._bound_for(values)
+
+    def _as_indices(self, indices, lo=0):
+        indices = np.asarray(indices, dtype=np.int64)
+        if indices.size and (indices.min() < lo or indices.max() >= self.n):
+            raise IndexError("Fenwick tree index out of range")
+        return indices
+
+    def update(self, idx, delta):
+        self.update_many([idx], [delta])
+
+    def set(self, idx, value):
+        self.update(idx, value - self.values[idx])
+
+    def get(self, idx):
+        return self.values[idx].item()
+
+    def query(self, idx):
+        return self.query_many([idx])[0].item()
+
+    def range_query(self, l, r):
+        return self.query(r) - (self.query(l - 1) if l > 0 else 0)
+
+    def update_many(self, indices, deltas):
+        # Add deltas[k] at indices[k]; repeated indices accumulate
+        indices = self._as_indices(indices)
+        deltas = np.broadcast_to(np.asarray(deltas, dtype=self.dtype), indices.shape)
+        self._check_overflow(indices, deltas)
+        np.add.at(self.values, indices, deltas)
+
+        if len(indices) * max(1, self.n.bit_length()) >= self.n:
+            # Big batches touch most nodes anyway: rebuild from values in O(n)
+            self.tree = build_fenwick_array(self.values, self.dtype)
+            return
+
+        idx = indices + 1
+        while idx.size:
+            np.add.at(self.tree, idx, deltas)
+            idx = idx + (idx & -idx)
+            keep = idx <= self.n
+            idx = idx[keep]
+            deltas = deltas[keep]
+
+    def query_many(self, indices):
+        # Prefix sums [0, i] for every i; tree[0] is 0 so finished lanes add nothing
+        idx = self._as_indices(indices, lo=-1) + 1
+        result = np.zeros(idx.shape, dtype=self.dtype)
+        while idx.any():
+            result += self.tree[idx]
+            idx -= idx & -idx
+        return result
+
+    def range_query_many(self, l, r):
+        # Sums of the inclusive ranges [l[k], r[k]]
+        l = np.asarray(l, dtype=np.int64)
+        return self.query_many(r) - self.query_many(l - 1)
+
+
+class NumpyRangeFenwickTree:
+    # RangeFenwickTree (see range_fenwick_tree.py) on two NumpyFenwickTrees,
+    # so whole batches of range-adds and range-sums run vectorized.
+    def __init__(self, arr=None, size=None, dtype=np.int64):
+        if arr is None:
+            arr = np.zeros(size, dtype=dtype)
+        self.dtype = np.dtype(dtype)
+        values = np.asarray(arr, dtype=dtype)
+        self.n = len(values)
+        self._sum_bound = self._bound_for(values) # Also keeps every diff below 2**63
+        diff = np.diff(values, prepend=values.dtype.type(0))
+        positions = np.arange(self.n, dtype=values.dtype)
+        self._check_scaled(diff)
+        self.b1 = NumpyFenwickTree(diff, dtype=dtype)             # BIT over d[j]
+        self.b2 = NumpyFenwickTree(diff * positions, dtype=dtype) # BIT over d[j] * j
+
+    def _bound_for(self, values):
+        # A bound on |sum| of every range of `values`. query_many multiplies
+        # and subtracts in wrapping int64, which still gives the exact prefix
+        # sum as long as the true sum fits; staying under 2**62 keeps every
+        # prefix and range sum in range. sum(|values|) is the cheap bound,
+        # exact prefix sums the fallback near the limit.
+        if self.dtype.kind != "i" or not len(values):
+            return 0
+        total = _abs_total(values)
+        if total < 2 ** 62:
+            return int(total) + 1
+        prefix = np.cumsum(values.astype(object))
+        bound = max(int(prefix.max()), 0) - min(int(prefix.min()), 0)
+        if bound >= 2 ** 62:
+            raise OverflowError("Range sums would overflow int64")
+        return bound
+
+    def _check_sums(self, l, r, deltas):
+        # A range add moves every range sum by at most |delta| * (r - l + 1)
+        if self.dtype.kind != "i":
+            return
+        increase = float((np.abs(deltas.astype(np.float64)) * (r - l + 1)).sum())
+        if self._sum_bound + increase < 2 ** 62:
+            self._sum_bound += int(increase) + 1
+            return
+
+        values = np.cumsum(self.b1.values.astype(object))
+        added = np.zeros(self.n + 1, dtype=object)
+        np.add.at(added, l, deltas.astype(object))
+        np.add.at(added, r + 1, -deltas.astype(object))
+        self._sum_bound = self._bound_for(values + np.cumsum(added)[:-1])
+
+    def _check_scaled(self, deltas):
+        # b2 stores delta * index; make sure that product fits in int64
+        if deltas.dtype.kind == "i" and deltas.size:
+            if float(np.abs(deltas.astype(np.float64)).max()) * self.n >= 2 ** 62:
+                raise OverflowError("Range update would overflow int64")
+
+    def range_add_many(self, l, r, deltas):
+        # Add deltas[k] to every element of [l[k], r[k]]
+        l = np.asarray(l, dtype=np.int64)
+        r = np.asarray(r, dtype=np.int64)
+        deltas = np.broadcast_to(np.asarray(deltas, dtype=self.b1.dtype), l.shape)
+        keep = l <= r
+        l, r, deltas = l[keep], r[keep], deltas[keep]
+        self._check_scaled(deltas)
+        self._check_sums(l, r, deltas)
+
+        # Ends past the last element need no closing entry
+        inside = r + 1 < self.n
+        end, end_deltas = r[inside] + 1, -deltas[inside]
+        indices = np.concatenate((l, end))
+        diffs = np.concatenate((deltas, end_deltas))
+        self.b1.update_many(indices, diffs)
+        self.b2.update_many(indices, diffs * indices.astype(diffs.dtype))
+
+    def range_add(self, l, r, delta):
+        self.range_add_many([l], [r], [delta])
+
+    def query_many(self, indices):
+        # Prefix sums of elements 0..i; i = -1 gives 0
+        indices = np.asarray(indices, dtype=np.int64)
+        return (indices + 1).astype(self.b1.dtype) * self.b1.query_many(indices) - self.b2.query_many(indices)
+
+    def range_sum_many(self, l, r):
+        # Sums of the inclusive ranges [l[k], r[k]]
+        l = np.asarray(l, dtype=np.int64)
+        return self.query_many(r) - self.query_many(l - 1)
+
+    def range_sum(self, l, r):
+        return self.range_sum_many([l], [r])[0].item()
+
+    def values(self):
+        # Current array: prefix sums of the differences
+        return np.cumsum(self.b1.values)
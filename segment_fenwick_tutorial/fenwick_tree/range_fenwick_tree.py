@@ -0,0 +1,71 @@
+class RangeFenwickTree:
+    # A Fenwick Tree with range updates AND range queries, built from two
+    # ordinary BITs over the difference array d (d[i] = arr[i] - arr[i-1]):
+    #
+    #   sum(arr[0..i]) = (i + 1) * sum(d[0..i]) - sum(d[j] * j for j <= i)
+    #
+    # `b1` holds d and `b2` holds d[j] * j. Adding `delta` to arr[l..r] only
+    # changes d[l] and d[r + 1], so every operation is four O(log n) walks.
+    # For sum-only workloads this replaces a lazy segment tree with two
+    # flat arrays of n + 1 numbers.
+    def __init__(self, arr):
+        self.n = len(arr)
+        self.b1 = [0] * (self.n + 1) # BIT over d[j]
+        self.b2 = [0] * (self.n + 1) # BIT over d[j] * j
+        prev = 0
+        for j, value in enumerate(arr):
+            self.b1[j + 1] = value - prev
+            self.b2[j + 1] = (value - prev) * j
+            prev = value
+        # O(n) build, the same parent hand-off as FenwickTree
+        for tree in (self.b1, self.b2):
+            for i in range(1, self.n + 1):
+                parent = i + (i & (-i))
+                if parent <= self.n:
+                    tree[parent] += tree[i]
+
+    def _add(self, tree, idx, val):
+        idx += 1  # Convert to 1-based indexing
+        while idx <= self.n:
+            tree[idx] += val
+            idx += idx & (-idx)
+
+    def _sum(self, tree, idx):
+        idx += 1  # Convert to 1-based indexing
+        s = 0
+        while idx > 0:
+            s += tree[idx]
+            idx -= idx & (-idx)
+        return s
+
+    def range_add(self, l, r, delta):
+        # Add `delta` to every element in [l, r]
+        if l > r:
+            return
+        self._add(self.b1, l, delta)
+        self._add(self.b2, l, delta * l)
+        if r + 1 < self.n:
+            self._add(self.b1, r + 1, -delta)
+            self._add(self.b2, r + 1, -delta * (r + 1))
+
+    def update(self, idx, val):
+        # Point update, same meaning as FenwickTree.update: add `val` at `idx`
+        self.range_add(idx, idx, val)
+
+    def query(self, idx):
+        # Prefix sum of elements 0..idx
+        if idx < 0:
+            return 0
+        return (idx + 1) * self._sum(self.b1, idx) - self._sum(self.b2, idx)
+
+    def range_sum(self, l, r):
+        # Sum of the elements in [l, r]
+        return self.query(r) - self.query(l - 1)
+
+    def range_query(self, l, r):
+        # Alias matching FenwickTree.range_query
+        return self.range_sum(l, r)
+
+    def get(self, idx):
+        # Current value at `idx` is just the prefix sum of the differences
+        return self._sum(self.b1, idx)
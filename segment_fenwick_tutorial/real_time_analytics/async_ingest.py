@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import logging.handlers
+import queue
+import random
+import time
+
+from traffic_monitor import WebsiteTrafficMonitor
+
+
+class SampledFilter(logging.Filter):
+    # Lets through one record in every `every`; the rest are dropped before
+    # they are formatted or queued
+    def __init__(self, every):
+        super().__init__()
+        self.every = max(1, every)
+        self.seen = 0
+
+    def filter(self, record):
+        self.seen += 1
+        return self.seen % self.every == 1 or self.every == 1
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    # QueueHandler.prepare formats the message (and any traceback) in the
+    # calling thread. The queue never leaves this process, so the record is
+    # enqueued as is and the listener's handler formats it on its thread.
+    # Log arguments are read when the record is written, so pass values
+    # that won't change in the meantime (numbers, strings, tuples).
+    def prepare(self, record):
+        return record
+
+
+def make_async_logger(name="traffic", sample_every=1000, stream=None):
+    # A logger whose handler only puts unformatted records on a queue; a
+    # background QueueListener thread does the formatting and the actual I/O.
+    # Returns (logger, listener); call listener.stop() to flush at shutdown.
+    records = queue.SimpleQueue()
+    handler = DeferredQueueHandler(records)
+    handler.addFilter(SampledFilter(sample_every))
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.handlers[:] = [handler]
+
+    output = logging.StreamHandler(stream)
+    output.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", "%H:%M:%S"))
+    listener = logging.handlers.QueueListener(records, output)
+    listener.start()
+    return logger, listener
+
+
+class AsyncTrafficIngestor:
+    # An asyncio front end for WebsiteTrafficMonitor. Producers put events on
+    # an asyncio.Queue; once per tick the whole queue is drained and applied
+    # with a single record_batch call. The flush never awaits, so queries
+    # running in other coroutines always see the state between two batches,
+    # never half of one.
+    def __init__(self, monitor=None, tick=0.05, max_queue=100_000, logger=None):
+        self.monitor = monitor if monitor is not None else WebsiteTrafficMonitor()
+        self.tick = tick
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.logger = logger if logger is not None else logging.getLogger("traffic")
+        self.events_applied = 0
+        self.batches = 0
+        self.last_lag = 0.0 # Seconds the oldest event of the last batch waited
+        self.max_lag = 0.0
+        self._task = None
+
+    # Queue entries are (page_views list, timestamps list, enqueue time): a
+    # producer's whole batch is one entry, so it costs one queue hop however
+    # many events it holds. `max_queue` counts entries.
+
+    async def submit(self, page_views, timestamp=None):
+        # Queue one event; waits if the queue is full (backpressure)
+        if timestamp is None:
+            timestamp = time.time()
+        await self.queue.put(([page_views], [timestamp], time.monotonic()))
+
+    def submit_nowait(self, page_views, timestamp=None):
+        # Queue one event; raises asyncio.QueueFull instead of waiting
+        if timestamp is None:
+            timestamp = time.time()
+        self.queue.put_nowait(([page_views], [timestamp], time.monotonic()))
+
+    async def submit_batch(self, page_views, timestamps):
+        # Queue many events as one entry; waits if the queue is full
+        await self.queue.put((list(page_views), list(timestamps), time.monotonic()))
+
+    def submit_batch_nowait(self, page_views, timestamps):
+        # Queue many events as one entry; raises asyncio.QueueFull instead of waiting
+        self.queue.put_nowait((list(page_views), list(timestamps), time.monotonic()))
+
+    def flush(self):
+        # Apply everything queued so far as one batch
+        views, timestamps = [], []
+        oldest = None
+        while True:
+            try:
+                batch_views, batch_timestamps, enqueued = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if oldest is None:
+                oldest = enqueued
+            views.extend(batch_views)
+            timestamps.extend(batch_timestamps)
+        if not views:
+            return 0
+
+        self.monitor.record_batch(views, timestamps)
+        self.last_lag = time.monotonic() - oldest
+        self.max_lag = max(self.max_lag, self.last_lag)
+        self.events_applied += len(views)
+        self.batches += 1
+        self.logger.info("Applied %d events (lag %.1f ms)", len(views), self.last_lag * 1000)
+        return len(views)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        # Stop ticking and apply whatever is still queued
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.flush()
+
+    async def traffic_in_last_n_seconds(self, n, now=None):
+        return self.monitor.get_traffic_in_last_n_seconds(n, now)
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "events_applied": self.events_applied,
+            "batches": self.batches,
+            "last_lag_ms": self.last_lag * 1000,
+            "max_lag_ms": self.max_lag * 1000,
+            "dropped_late": self.monitor.dropped_late,
+        }
+
+
+# --- Simulation --- #
+async def _produce(ingestor, events_per_tick, duration, batched):
+    # Bursts of page views with slightly out-of-order timestamps; the only
+    # awaits are queue puts and yielding between bursts. Batched producers
+    # hand over each burst as a single queue entry.
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        now = time.time()
+        views = [random.randint(1, 5) for _ in range(events_per_tick)]
+        stamps = [now - random.random() * 0.2 for _ in range(events_per_tick)]
+        if batched:
+            await ingestor.submit_batch(views, stamps)
+        else:
+            for page_views, timestamp in zip(views, stamps):
+                await ingestor.submit(page_views, timestamp)
+        await asyncio.sleep(0.01)
+
+
+async def _report(ingestor, every, duration):
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        await asyncio.sleep(every)
+        recent = await ingestor.traffic_in_last_n_seconds(5)
+        s = ingestor.stats()
+        print(f"views in last 5 seconds: {recent:>7}  queue depth: {s['queue_depth']:>5}  "
+              f"batches: {s['batches']:>4}  lag: {s['last_lag_ms']:.1f} ms")
+
+
+async def main():
+    logger, listener = make_async_logger(sample_every=20)
+    ingestor = AsyncTrafficIngestor(tick=0.05, logger=logger)
+    ingestor.start()
+
+    print("--- Async Ingestion: 4 producers for 3 seconds (2 per event, 2 batched) ---")
+    producers = [_produce(ingestor, events_per_tick=500, duration=3, batched=i % 2 == 1) for i in range(4)]
+    await asyncio.gather(_report(ingestor, every=0.5, duration=3), *producers)
+    await ingestor.stop()
+    listener.stop()
+
+    s = ingestor.stats()
+    print(f"\nApplied {s['events_applied']:,} events in {s['batches']} batches "
+          f"(max lag {s['max_lag_ms']:.1f} ms)")
+    print(f"Traffic in the last 10 seconds: {ingestor.monitor.get_traffic_in_last_n_seconds(10)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
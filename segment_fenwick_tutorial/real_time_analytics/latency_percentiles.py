@@ -0,0 +1,177 @@
+import math
+import os
+import random
+import sys
+import time
+
+# The Fenwick tree lives in its own tutorial directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fenwick_tree'))
+
+from fenwick_tree import FenwickTree
+
+
+class LogLinearBuckets:
+    # Maps values spanning many orders of magnitude (0.01 ms to a minute) to
+    # a few hundred buckets with bounded *relative* error, like HDR
+    # histograms: each power of two above `lowest` is split into
+    # `sub_buckets` equal-width buckets. Bucket 0 holds everything below
+    # `lowest`, the last bucket everything from `highest` up.
+    def __init__(self, lowest=0.01, highest=60_000.0, sub_buckets=16):
+        self.lowest = lowest
+        self.highest = highest
+        self.sub_buckets = sub_buckets
+        self.num_octaves = max(1, math.ceil(math.log2(highest / lowest)))
+        self.size = self.num_octaves * sub_buckets + 2
+        # Lower bound of every bucket, for turning a bucket back into a value
+        self.bounds = [0.0] + [lowest * 2 ** (i // sub_buckets) * (1 + (i % sub_buckets) / sub_buckets)
+                               for i in range(self.num_octaves * sub_buckets)] + [highest]
+
+    def index(self, value):
+        if value < self.lowest:
+            return 0
+        if value >= self.highest:
+            return self.size - 1
+        m, e = math.frexp(value / self.lowest) # value / lowest = m * 2**e, 0.5 <= m < 1
+        return 1 + (e - 1) * self.sub_buckets + int((2 * m - 1) * self.sub_buckets)
+
+    def value(self, idx):
+        # A representative value for bucket `idx`: its midpoint, so the
+        # relative error is at most 1 / (2 * sub_buckets)
+        if idx <= 0:
+            return self.lowest
+        if idx >= self.size - 1:
+            return self.highest
+        return (self.bounds[idx] + self.bounds[idx + 1]) / 2
+
+
+class LatencyWindow:
+    # Latency percentiles over a sliding time window.
+    # A FenwickTree over value buckets counts the samples in the window, so
+    # the k-th smallest sample is one FenwickTree.search (binary descent) and
+    # "how many below x" is one prefix sum, both O(log B) for B buckets.
+    #
+    # Time is sliced like TimeBuckets in traffic_monitor.py: a ring of
+    # `window / resolution` slots. Each slot remembers how many samples it
+    # added to each value bucket, and when the slot leaves the window those
+    # counts are subtracted again (lazy expiry, on the next record or query).
+    def __init__(self, window=60, resolution=1, buckets=None):
+        self.resolution = resolution
+        self.num_slots = max(1, -(-window // resolution))
+        self.buckets = buckets if buckets is not None else LogLinearBuckets()
+        self.tree = FenwickTree([0] * self.buckets.size)
+        self.slots = [{} for _ in range(self.num_slots)] # value bucket -> count, per time slot
+        self.latest = None # Newest time slot seen so far
+        self.total = 0
+        self.dropped_late = 0
+
+    def _advance(self, slot):
+        if self.latest is None:
+            self.latest = slot
+            return
+        if slot <= self.latest:
+            return
+        if slot - self.latest >= self.num_slots:
+            # Everything expired at once
+            self.tree = FenwickTree([0] * self.buckets.size)
+            self.slots = [{} for _ in range(self.num_slots)]
+            self.total = 0
+        else:
+            for s in range(self.latest + 1, slot + 1):
+                counts = self.slots[s % self.num_slots]
+                for b, c in counts.items():
+                    self.tree.update(b, -c)
+                    self.total -= c
+                counts.clear()
+        self.latest = slot
+
+    def record(self, latency, timestamp=None):
+        # Add one sample. Returns False if it is too old for the window.
+        if timestamp is None:
+            timestamp = time.time()
+        return not self.record_batch([latency], [timestamp])
+
+    def record_batch(self, latencies, timestamps):
+        # Add many samples; the tree gets one update per distinct
+        # (time slot, value bucket) pair. Returns how many were too late.
+        index, resolution = self.buckets.index, self.resolution
+        per_pair = {}
+        for latency, timestamp in zip(latencies, timestamps):
+            key = (int(timestamp // resolution), index(latency))
+            per_pair[key] = per_pair.get(key, 0) + 1
+        if not per_pair:
+            return 0
+        self._advance(max(slot for slot, _ in per_pair))
+        oldest = self.latest - self.num_slots
+        late = 0
+        for (slot, b), c in per_pair.items():
+            if slot <= oldest:
+                late += c
+                continue
+            counts = self.slots[slot % self.num_slots]
+            counts[b] = counts.get(b, 0) + c
+            self.tree.update(b, c)
+            self.total += c
+        self.dropped_late += late
+        return late
+
+    def count(self, now=None):
+        # Samples currently in the window
+        self._advance(int((time.time() if now is None else now) // self.resolution))
+        return self.total
+
+    def quantile(self, q, now=None):
+        # The q-quantile (0 <= q <= 1) of the window, to bucket precision,
+        # or None if the window is empty
+        total = self.count(now)
+        if not total:
+            return None
+        k = min(total, max(1, math.ceil(q * total))) # Rank of the sample we want
+        return self.buckets.value(self.tree.search(k))
+
+    def percentiles(self, ps=(50, 95, 99), now=None):
+        self.count(now)
+        return {p: self.quantile(p / 100, now) for p in ps}
+
+    def rank(self, value, now=None):
+        # Fraction of samples in the window below `value`, to bucket
+        # precision: samples in buckets that end at or below `value`
+        total = self.count(now)
+        if not total:
+            return 0.0
+        b = self.buckets.index(value) # Every bucket before b ends at or below `value`
+        below = self.tree.query(b - 1) if b else 0
+        return below / total
+
+
+# --- Simulation --- #
+if __name__ == "__main__":
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from traffic_monitor import WebsiteTrafficMonitor
+
+    latency = LatencyWindow(window=60)
+    monitor = WebsiteTrafficMonitor(latency=latency) # Every request's latency also lands in the window
+    start = math.floor(time.time()) - 300 # Whole seconds, so the window lines up with `samples`
+
+    print("\n--- Simulating 5 Minutes of Requests ---")
+    samples = []
+    began = time.perf_counter()
+    for second in range(300):
+        ms = [random.lognormvariate(math.log(40), 0.5) for _ in range(1_000)]
+        if second >= 270:
+            ms[:100] = [random.uniform(400, 2_000) for _ in range(100)] # A slow backend in the last 30 s
+        stamps = [start + second + i / 1_000 for i in range(1_000)]
+        monitor.record_batch([1] * len(ms), stamps, latencies=ms)
+        if second >= 240:
+            samples.extend(ms)
+    elapsed = time.perf_counter() - began
+    print(f"Recorded 300,000 requests in {elapsed:.2f}s ({300_000 / elapsed:,.0f}/s)")
+
+    now = start + 299.999
+    print(f"Requests in the last minute: {monitor.get_total_traffic_last_minute(now):,}")
+    samples.sort()
+    for p, value in latency.percentiles((50, 95, 99), now).items():
+        exact = samples[math.ceil(p / 100 * len(samples)) - 1]
+        print(f"p{p}: {value:8.1f} ms  (exact {exact:8.1f} ms)")
+    under = latency.rank(200, now)
+    exact_under = sum(1 for s in samples if s < 200) / len(samples)
+    print(f"Under 200 ms: {under:.2%} (exact {exact_under:.2%})")
@@ -0,0 +1,189 @@
+import time
+
+import numpy as np
+
+
+class MultiKeyTrafficMonitor:
+    # Sliding-window traffic for many keys (URLs, metrics) in one block.
+    # Row r of `tree` is a Fenwick Tree over a ring of time buckets for key r,
+    # the same ring as TimeBuckets in traffic_monitor.py. All rows share one
+    # clock, so every operation touches the same columns in every row and runs
+    # as a handful of NumPy calls, never a loop over keys.
+    def __init__(self, resolution=1, num_buckets=600, dtype=np.int64, capacity=1024):
+        self.resolution = resolution
+        self.num_buckets = num_buckets
+        self.dtype = np.dtype(dtype)
+        self.tree = np.zeros((capacity, num_buckets + 1), dtype=self.dtype)
+        self.keys = []  # row -> key
+        self.rows = {}  # key -> row
+        self.latest = None # Newest bucket number seen so far
+        self.dropped_late = 0
+
+    def _add_key(self, key):
+        if len(self.keys) == len(self.tree):
+            # Double the block; rows are independent so they copy as-is
+            grown = np.zeros((2 * len(self.tree), self.num_buckets + 1), dtype=self.dtype)
+            grown[:len(self.tree)] = self.tree
+            self.tree = grown
+        self.rows[key] = len(self.keys)
+        self.keys.append(key)
+        return self.rows[key]
+
+    def key_ids(self, keys):
+        # Map a batch of keys to row ids, adding new keys; the dict is
+        # consulted once per distinct key. Callers with a fixed key set can
+        # do this once and use ingest_rows.
+        uniq, inverse = np.unique(np.asarray(keys), return_inverse=True)
+        rows = np.empty(len(uniq), dtype=np.int64)
+        for i, key in enumerate(uniq.tolist()):
+            row = self.rows.get(key)
+            rows[i] = self._add_key(key) if row is None else row
+        return rows[inverse.reshape(-1)]
+
+    def _prefix(self, slots, rows=None):
+        # Prefix sums of every row (or `rows`) up to each slot; slot -1 gives 0
+        tree = self.tree[:len(self.keys)] if rows is None else self.tree[rows]
+        idx = np.asarray(slots, dtype=np.int64) + 1
+        result = np.zeros((len(tree), len(idx)), dtype=self.dtype)
+        while idx.any():
+            result += tree[:, idx]
+            idx = idx - (idx & -idx)
+        return result
+
+    def _add_columns(self, slots, deltas):
+        # Add deltas[:, j] to slot slots[j] in every row
+        tree = self.tree[:len(self.keys)]
+        idx = np.asarray(slots, dtype=np.int64) + 1
+        while idx.size:
+            if len(np.unique(idx)) == len(idx):
+                tree[:, idx] += deltas # Much faster than add.at when no slot repeats
+            else:
+                np.add.at(tree, (slice(None), idx), deltas)
+            idx = idx + (idx & -idx)
+            keep = idx <= self.num_buckets
+            idx, deltas = idx[keep], deltas[:, keep]
+
+    def _advance(self, bucket):
+        # Lazy expiry: clear the slots that `bucket` is about to reuse
+        if self.latest is None:
+            self.latest = bucket
+            return
+        if bucket <= self.latest:
+            return
+        if bucket - self.latest >= self.num_buckets:
+            self.tree[:] = 0
+        else:
+            slots = np.arange(self.latest + 1, bucket + 1) % self.num_buckets
+            current = self._prefix(slots) - self._prefix(slots - 1)
+            self._add_columns(slots, -current)
+        self.latest = bucket
+
+    def ingest(self, keys, timestamps, values=1):
+        # Record a batch of (key, timestamp, value) events
+        self.ingest_rows(self.key_ids(keys), timestamps, values)
+
+    def ingest_rows(self, rows, timestamps, values=1):
+        # Same as ingest, with keys already mapped by key_ids
+        rows = np.asarray(rows, dtype=np.int64)
+        if rows.size and (rows.min() < 0 or rows.max() >= len(self.keys)):
+            raise IndexError("Row id does not belong to a known key")
+        buckets = np.floor(np.asarray(timestamps, dtype=np.float64) / self.resolution).astype(np.int64)
+        values = np.broadcast_to(np.asarray(values, dtype=self.dtype), rows.shape)
+        if not rows.size:
+            return
+        self._advance(int(buckets.max()))
+
+        fresh = buckets > self.latest - self.num_buckets
+        self.dropped_late += int(rows.size - fresh.sum())
+        rows, buckets, values = rows[fresh], buckets[fresh], values[fresh]
+
+        flat = self.tree.reshape(-1) # A view: the block is contiguous
+        width = self.num_buckets + 1
+        idx = buckets % self.num_buckets + 1
+        while idx.size:
+            np.add.at(flat, rows * width + idx, values)
+            idx = idx + (idx & -idx)
+            keep = idx <= self.num_buckets
+            rows, idx, values = rows[keep], idx[keep], values[keep]
+
+    def totals(self, n_seconds, now=None, rows=None):
+        # Traffic of every key (or `rows`) in the last `n_seconds`, as an array
+        # aligned with self.keys
+        if now is None:
+            now = time.time()
+        num_rows = len(self.keys) if rows is None else len(rows)
+        end = int(now // self.resolution)
+        self._advance(end)
+        if self.latest is None:
+            return np.zeros(num_rows, dtype=self.dtype)
+        num_windows = min(-(-n_seconds // self.resolution), self.num_buckets)
+        start = max(end - num_windows + 1, self.latest - self.num_buckets + 1)
+        end = min(end, self.latest)
+        if start > end:
+            return np.zeros(num_rows, dtype=self.dtype)
+
+        lo, hi = start % self.num_buckets, end % self.num_buckets
+        if lo <= hi:
+            p = self._prefix([hi, lo - 1], rows)
+            return p[:, 0] - p[:, 1]
+        # The window wraps around the ring: [lo, end of ring] + [0, hi]
+        p = self._prefix([self.num_buckets - 1, lo - 1, hi], rows)
+        return p[:, 0] - p[:, 1] + p[:, 2]
+
+    def traffic_for(self, key, n_seconds, now=None):
+        if key not in self.rows:
+            return 0
+        return self.totals(n_seconds, now, rows=[self.rows[key]])[0].item()
+
+    def top_k(self, k, n_seconds, now=None):
+        # The k keys with the most traffic in the last `n_seconds`, as
+        # (key, total) pairs from highest to lowest
+        totals = self.totals(n_seconds, now)
+        k = min(k, len(totals))
+        if k == 0:
+            return []
+        best = np.argpartition(-totals, k - 1)[:k]
+        best = best[np.argsort(-totals[best], kind="stable")]
+        return [(self.keys[i], totals[i].item()) for i in best]
+
+    def nbytes(self):
+        return self.tree[:len(self.keys)].nbytes
+
+
+# --- Simulation --- #
+if __name__ == "__main__":
+    rng = np.random.default_rng(42)
+    num_pages = 20_000
+    pages = np.array([f"/article/{i}" for i in range(num_pages)])
+    # A few pages get most of the traffic
+    popularity = 1.0 / np.arange(1, num_pages + 1) ** 1.1
+    popularity /= popularity.sum()
+
+    monitor = MultiKeyTrafficMonitor(resolution=1, num_buckets=600)
+    page_ids = monitor.key_ids(pages) # Map URLs to rows once, up front
+    start = time.time() - 600
+
+    print("--- Simulating 10 Minutes of Traffic Across 20,000 Pages ---")
+    ingest_s = 0.0
+    for second in range(600):
+        hits = rng.choice(num_pages, size=5_000, p=popularity)
+        if second >= 540:
+            hits[:1_000] = 12_345 # One page goes viral in the last minute
+        timestamps = start + second + rng.random(len(hits))
+        began = time.perf_counter()
+        monitor.ingest_rows(page_ids[hits], timestamps)
+        ingest_s += time.perf_counter() - began
+    print(f"Ingested 3,000,000 events in {ingest_s:.2f}s ({3_000_000 / ingest_s:,.0f} events/s)")
+    print(f"Memory for all series: {monitor.nbytes() / 1e6:.1f} MB")
+
+    now = start + 599.999
+    began = time.perf_counter()
+    top = monitor.top_k(5, 60, now)
+    print(f"\nTop 5 pages in the last minute ({(time.perf_counter() - began) * 1000:.1f} ms):")
+    for page, views in top:
+        print(f"  {page:<16} {views:>8,}")
+
+    print("\nTop 5 pages in the last 10 minutes:")
+    for page, views in monitor.top_k(5, 600, now):
+        print(f"  {page:<16} {views:>8,}")
+    print(f"\n/article/12345 in the last 5 minutes: {monitor.traffic_for('/article/12345', 300, now):,}")
@@ -0,0 +1,472 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+# The trees live in their own tutorial directories
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(_here, '..', 'fenwick_tree'))
+sys.path.append(os.path.join(_here, '..', 'segment_tree'))
+
+from fenwick_tree import FenwickTree
+from iterative_segment_tree import IterativeSegmentTree
+from segment_tree import SegmentTree
+from latency_percentiles import LatencyWindow, LogLinearBuckets
+from traffic_monitor import WebsiteTrafficMonitor
+
+# --- Snapshots ---
+#
+# File layout: MAGIC, a little-endian u32 header length, a JSON header, zero
+# padding to an 8-byte boundary, then every array's raw bytes back to back.
+# Arrays are 8-byte ints ('q') or doubles ('d'), so a loader can map the file
+# and view each array in place instead of parsing it.
+
+SNAPSHOT_MAGIC = b"FTSNAP01"
+
+
+def _typecode(values):
+    return 'd' if any(isinstance(x, float) for x in values) else 'q'
+
+
+def _as_array(values):
+    if isinstance(values, array):
+        return values
+    if isinstance(values, memoryview): # Restored from a mapped snapshot
+        arr = array(values.format)
+        arr.frombytes(values.cast('B'))
+        return arr
+    return array(_typecode(values), values)
+
+
+# Restored arrays are typed views ('q' or 'd') of the mapped file. A value
+# they can't hold (a float in an integer tree, an int past 64 bits) moves
+# the tree to plain lists, as an in-memory tree would have accepted it.
+# Memoryviews report out-of-range ints as ValueError.
+_TYPED_ERRORS = (TypeError, ValueError, OverflowError)
+
+
+class _MappedFenwickTree(FenwickTree):
+    def update(self, idx, val):
+        values, tree = self.values, self.tree
+        if type(tree) is list:
+            super().update(idx, val)
+            return
+        wrote_value, i = False, idx + 1
+        try:
+            values[idx] += val
+            wrote_value = True
+            while i <= self.n:
+                tree[i] += val
+                i += i & (-i)
+        except _TYPED_ERRORS:
+            # Adds can't simply be redone: take back the writes that went
+            # through, then repeat the whole update on lists
+            if wrote_value:
+                values[idx] -= val
+                j = idx + 1
+                while j < i:
+                    tree[j] -= val
+                    j += j & (-j)
+            self.values, self.tree = list(values), list(tree)
+            super().update(idx, val)
+
+
+class _MappedSegmentTree(SegmentTree):
+    def update(self, idx, val):
+        # Updates set a leaf and recompute its ancestors, so a failed one
+        # can be redone from the start
+        try:
+            super().update(idx, val)
+        except _TYPED_ERRORS:
+            if type(self.tree) is list:
+                raise
+            self.tree = list(self.tree)
+            super().update(idx, val)
+
+
+def _latency_state(window):
+    # A LatencyWindow's settings and running totals, its value-bucket tree,
+    # and every slot's bucket counts as flat (slot, bucket, count) columns
+    buckets = window.buckets
+    if type(buckets) is not LogLinearBuckets:
+        raise TypeError(f"Cannot snapshot a latency window with {type(buckets).__name__} buckets")
+    meta = {
+        "resolution": window.resolution,
+        "num_slots": window.num_slots,
+        "buckets": [buckets.lowest, buckets.highest, buckets.sub_buckets],
+        "latest": window.latest,
+        "total": window.total,
+        "dropped_late": window.dropped_late,
+    }
+    counts = [(slot, b, c) for slot, per_bucket in enumerate(window.slots) for b, c in per_bucket.items()]
+    arrays = {
+        "latency.values": window.tree.values,
+        "latency.tree": window.tree.tree,
+        "latency.slot": [slot for slot, _, _ in counts],
+        "latency.bucket": [b for _, b, _ in counts],
+        "latency.count": [c for _, _, c in counts],
+    }
+    return meta, arrays
+
+
+def _restore_latency(meta, arrays):
+    window = LatencyWindow(window=meta["num_slots"] * meta["resolution"], resolution=meta["resolution"],
+                           buckets=LogLinearBuckets(*meta["buckets"]))
+    window.tree = _MappedFenwickTree.from_parts(arrays["latency.values"], arrays["latency.tree"])
+    for slot, b, c in zip(arrays["latency.slot"], arrays["latency.bucket"], arrays["latency.count"]):
+        window.slots[slot][b] = c
+    window.latest = meta["latest"]
+    window.total = meta["total"]
+    window.dropped_late = meta["dropped_late"]
+    return window
+
+
+def _tree_state(obj):
+    # (kind, meta, {name: sequence}) for every supported structure
+    if isinstance(obj, FenwickTree):
+        return "FenwickTree", {}, {"values": obj.values, "tree": obj.tree}
+    if isinstance(obj, IterativeSegmentTree):
+        return "IterativeSegmentTree", {}, {"tree": obj.tree}
+    if isinstance(obj, SegmentTree):
+        return "SegmentTree", {"n": obj.n}, {"tree": obj.tree}
+    if isinstance(obj, WebsiteTrafficMonitor):
+        meta = {
+            "resolutions": [[level.resolution, level.size] for level in obj.levels],
+            "latest": [level.latest for level in obj.levels],
+            "dropped_late": obj.dropped_late,
+        }
+        arrays = {}
+        for i, level in enumerate(obj.levels):
+            arrays[f"level{i}.values"] = level.tree.values
+            arrays[f"level{i}.tree"] = level.tree.tree
+        if obj.latency is not None:
+            meta["latency"], latency_arrays = _latency_state(obj.latency)
+            arrays.update(latency_arrays)
+        return "WebsiteTrafficMonitor", meta, arrays
+    raise TypeError(f"Cannot snapshot {type(obj).__name__}")
+
+
+def _restore(kind, meta, arrays):
+    if kind == "FenwickTree":
+        return _MappedFenwickTree.from_parts(arrays["values"], arrays["tree"])
+    if kind == "IterativeSegmentTree":
+        tree = IterativeSegmentTree.__new__(IterativeSegmentTree)
+        tree.tree = arrays["tree"]
+        tree.n = len(tree.tree) // 2
+        return tree
+    if kind == "SegmentTree":
+        tree = _MappedSegmentTree.__new__(_MappedSegmentTree)
+        tree.n = meta["n"]
+        tree.tree = arrays["tree"]
+        return tree
+    if kind == "WebsiteTrafficMonitor":
+        monitor = WebsiteTrafficMonitor([tuple(r) for r in meta["resolutions"]])
+        for i, level in enumerate(monitor.levels):
+            level.tree = _MappedFenwickTree.from_parts(arrays[f"level{i}.values"], arrays[f"level{i}.tree"])
+            level.latest = meta["latest"][i]
+        monitor.dropped_late = meta["dropped_late"]
+        if "latency" in meta:
+            monitor.latency = _restore_latency(meta["latency"], arrays)
+        return monitor
+    raise ValueError(f"Unknown snapshot kind: {kind!r}")
+
+
+def save_snapshot(obj, path, seq=0):
+    # Write `obj` to `path` atomically (temp file, fsync, rename). `seq` is
+    # the last update-log sequence number already reflected in `obj`.
+    kind, meta, arrays = _tree_state(obj)
+    packed = {name: _as_array(values) for name, values in arrays.items()}
+    layout, offset = [], 0
+    for name, arr in packed.items():
+        layout.append({"name": name, "typecode": arr.typecode, "length": len(arr), "offset": offset})
+        offset += len(arr) * arr.itemsize
+    header = json.dumps({"kind": kind, "meta": meta, "seq": seq, "arrays": layout}).encode()
+    padding = -(len(SNAPSHOT_MAGIC) + 4 + len(header)) % 8
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(b"\0" * padding)
+        for arr in packed.values():
+            f.write(arr.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_snapshot(path, use_mmap=True):
+    # Returns (obj, seq). With use_mmap, arrays are copy-on-write views of
+    # the mapped file: loading is O(1) and pages are read on first touch.
+    # Without it, the arrays are read into memory.
+    with open(path, "rb") as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a tree snapshot")
+        (header_len,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_len))
+        data_start = len(SNAPSHOT_MAGIC) + 4 + header_len
+        data_start += -data_start % 8
+
+        arrays = {}
+        if use_mmap:
+            view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+            for a in header["arrays"]:
+                start = data_start + a["offset"]
+                nbytes = a["length"] * array(a["typecode"]).itemsize
+                arrays[a["name"]] = view[start:start + nbytes].cast(a["typecode"])
+        else:
+            for a in header["arrays"]:
+                f.seek(data_start + a["offset"])
+                arr = array(a["typecode"])
+                arr.fromfile(f, a["length"])
+                arrays[a["name"]] = arr
+    return _restore(header["kind"], header["meta"], arrays), header["seq"]
+
+
+# --- Update log ---
+#
+# Every record is one fixed-size entry: CRC32 of the rest, sequence number,
+# op code, an int argument and an 8-byte value (int or float depending on
+# the op). Records are buffered and written with one write() + fsync() per
+# group (group commit), trading a few milliseconds of durability window for
+# orders of magnitude fewer fsyncs.
+
+_RECORD = struct.Struct("<IQBq8s")
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+
+OP_ADD = 1     # tree.update(idx, delta)
+OP_SET = 2     # tree.set / segment tree update(idx, value)
+OP_RECORD = 3  # monitor.record_traffic(page_views, timestamp)
+OP_LATENCY = 4 # monitor.latency.record(latency, timestamp); arg holds the timestamp's float bits
+
+
+def _pack_value(value):
+    return (_FLOAT.pack(value), 1) if isinstance(value, float) else (_INT.pack(value), 0)
+
+
+def _float_bits(value):
+    # A float's exact bit pattern as a signed int, to carry it in `arg`
+    return _INT.unpack(_FLOAT.pack(float(value)))[0]
+
+
+def _bits_float(bits):
+    return _FLOAT.unpack(_INT.pack(bits))[0]
+
+
+class UpdateLog:
+    # Pass the `seq` returned by recover() as `start_seq` when reopening, so
+    # numbering continues after the snapshot even if the log was truncated.
+    def __init__(self, path, group_size=256, sync=True, start_seq=0):
+        self.path = path
+        self.group_size = group_size
+        self.sync = sync
+        # Cut off a torn tail left by a crash so new records stay aligned
+        last_seq, valid_bytes = _scan_log(path)
+        self.seq = max(last_seq, start_seq)
+        self.file = open(path, "ab")
+        if self.file.tell() > valid_bytes:
+            self.file.truncate(valid_bytes)
+        self.pending = []
+        self.groups_committed = 0
+
+    def append(self, op, arg, value):
+        # Buffer one record; returns its sequence number
+        self.seq += 1
+        packed, is_float = _pack_value(value)
+        body = _RECORD.pack(0, self.seq, op | (is_float << 7), arg, packed)[4:]
+        self.pending.append(struct.pack("<I", zlib.crc32(body)) + body)
+        if len(self.pending) >= self.group_size:
+            self.commit()
+        return self.seq
+
+    def commit(self):
+        # Make every buffered record durable with a single write and fsync
+        if not self.pending:
+            return
+        self.file.write(b"".join(self.pending))
+        self.file.flush()
+        if self.sync:
+            os.fsync(self.file.fileno())
+        self.pending.clear()
+        self.groups_committed += 1
+
+    def truncate(self):
+        # Drop all records; called once a snapshot covers them
+        self.commit()
+        self.file.truncate(0)
+        self.file.flush()
+        if self.sync:
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        self.commit()
+        self.file.close()
+
+
+def log_traffic(log, page_views, timestamp, latency=None):
+    # Log what monitor.record_traffic(page_views, timestamp, latency) does:
+    # one OP_RECORD, plus an OP_LATENCY when there is a latency sample.
+    # Returns the last sequence number.
+    seq = log.append(OP_RECORD, page_views, timestamp)
+    if latency is not None:
+        seq = log.append(OP_LATENCY, _float_bits(timestamp), float(latency))
+    return seq
+
+
+def read_log(path, after_seq=0):
+    # Yield (seq, op, arg, value) for intact records with seq > after_seq,
+    # stopping at the first torn or corrupt record (a crash mid-write)
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        data = f.read()
+    for start in range(0, len(data) - _RECORD.size + 1, _RECORD.size):
+        crc, seq, op, arg, packed = _RECORD.unpack_from(data, start)
+        if zlib.crc32(data[start + 4:start + _RECORD.size]) != crc:
+            return
+        if seq > after_seq:
+            value = (_FLOAT if op & 0x80 else _INT).unpack(packed)[0]
+            yield seq, op & 0x7F, arg, value
+
+
+def _scan_log(path):
+    # (last intact sequence number, bytes of intact records)
+    seq, count = 0, 0
+    for seq, _, _, _ in read_log(path):
+        count += 1
+    return seq, count * _RECORD.size
+
+
+def apply_record(obj, op, arg, value):
+    if op == OP_ADD:
+        obj.update(arg, value)
+    elif op == OP_SET:
+        if isinstance(obj, FenwickTree):
+            obj.set(arg, value)
+        else:
+            obj.update(arg, value)
+    elif op == OP_RECORD:
+        obj.record_traffic(arg, value)
+    elif op == OP_LATENCY:
+        if obj.latency is None:
+            raise ValueError("Log has latency samples but the monitor has no latency window")
+        obj.latency.record(value, _bits_float(arg))
+    else:
+        raise ValueError(f"Unknown log op: {op}")
+
+
+def recover(snapshot_path, log_path, use_mmap=True):
+    # Load the snapshot and replay the log records it doesn't cover yet.
+    # Returns (obj, last_seq, replayed_count).
+    obj, seq = load_snapshot(snapshot_path, use_mmap)
+    replayed = 0
+    for seq_i, op, arg, value in read_log(log_path, after_seq=seq):
+        apply_record(obj, op, arg, value)
+        seq = seq_i
+        replayed += 1
+    return obj, seq, replayed
+
+
+def checkpoint(obj, snapshot_path, log):
+    # Snapshot first, then truncate: a crash in between only means replaying
+    # records the snapshot already has, which recover() skips by sequence
+    log.commit()
+    save_snapshot(obj, snapshot_path, seq=log.seq)
+    log.truncate()
+
+
+# --- Benchmark --- #
+if __name__ == "__main__":
+    import random
+    import tempfile
+
+    workdir = tempfile.mkdtemp()
+    snap_path = os.path.join(workdir, "tree.snap")
+    log_path = os.path.join(workdir, "tree.log")
+
+    print(f"{'size':>10} {'build ms':>10} {'save ms':>9} {'mmap load ms':>13} {'full load ms':>13} {'MB':>7}")
+    for n in (10_000, 100_000, 1_000_000):
+        values = [random.randint(0, 1000) for _ in range(n)]
+        start = time.perf_counter()
+        ft = FenwickTree(values)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        save_snapshot(ft, snap_path)
+        save_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        mapped, _ = load_snapshot(snap_path)
+        mmap_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        loaded, _ = load_snapshot(snap_path, use_mmap=False)
+        full_ms = (time.perf_counter() - start) * 1000
+        assert mapped.query(n - 1) == loaded.query(n - 1) == ft.query(n - 1)
+        size_mb = os.path.getsize(snap_path) / 1e6
+        print(f"{n:>10,} {build_ms:>10.1f} {save_ms:>9.1f} {mmap_ms:>13.2f} {full_ms:>13.1f} {size_mb:>7.1f}")
+        del mapped, loaded
+
+    # Mapped arrays are typed, but restored trees still take any value
+    save_snapshot(FenwickTree([2 ** 61, 2 ** 61, 0, 0]), snap_path)
+    mapped, _ = load_snapshot(snap_path)
+    mapped.update(1, 0.5)
+    mapped.update(0, 2 ** 62) # Passes int64 halfway up the update path
+    assert mapped.query(3) == 2 ** 63 + 0.5, "Float and big-int updates on a mapped tree are incorrect"
+    del mapped
+
+    # Crash recovery: snapshot, then 100,000 logged updates, then restart
+    ft = FenwickTree([0] * 100_000)
+    for path in (snap_path, log_path):
+        if os.path.exists(path):
+            os.remove(path)
+    log = UpdateLog(log_path, group_size=512)
+    checkpoint(ft, snap_path, log)
+    start = time.perf_counter()
+    for _ in range(100_000):
+        idx, delta = random.randrange(100_000), random.randint(1, 10)
+        ft.update(idx, delta)
+        log.append(OP_ADD, idx, delta)
+    log.commit()
+    log_ms = (time.perf_counter() - start) * 1000
+    print(f"\nLogged 100,000 updates in {log_ms:.0f} ms with {log.groups_committed} group commits")
+    log.close()
+
+    start = time.perf_counter()
+    restored, seq, replayed = recover(snap_path, log_path)
+    recover_ms = (time.perf_counter() - start) * 1000
+    assert restored.query(99_999) == ft.query(99_999)
+    print(f"Recovered snapshot + {replayed:,} log records (up to seq {seq:,}) in {recover_ms:.0f} ms")
+    log = UpdateLog(log_path, start_seq=seq) # Keep logging where we left off
+    checkpoint(restored, snap_path, log)
+    log.close()
+
+    # Monitors snapshot the same way, latency window included
+    monitor = WebsiteTrafficMonitor(latency=LatencyWindow(window=60))
+    now = time.time()
+    for second in range(600):
+        monitor.record_traffic(random.randint(50, 200), now - 600 + second, latency=random.uniform(5, 500))
+    save_snapshot(monitor, snap_path)
+    restored_monitor, _ = load_snapshot(snap_path)
+    assert restored_monitor.get_traffic_in_last_n_seconds(300, now) == monitor.get_traffic_in_last_n_seconds(300, now)
+    assert restored_monitor.get_latency_percentiles(now=now) == monitor.get_latency_percentiles(now=now)
+
+    # Snapshot + log: latency samples logged after the checkpoint come back too
+    os.remove(log_path)
+    log = UpdateLog(log_path)
+    checkpoint(monitor, snap_path, log)
+    for second in range(600, 630):
+        views, ms = random.randint(50, 200), random.uniform(400, 900) # A slow stretch after the snapshot
+        monitor.record_traffic(views, now - 600 + second, latency=ms)
+        log_traffic(log, views, now - 600 + second, latency=ms)
+    log.close()
+    later = now + 30
+    restored_monitor, _, replayed = recover(snap_path, log_path)
+    assert restored_monitor.get_traffic_in_last_n_seconds(300, later) == monitor.get_traffic_in_last_n_seconds(300, later)
+    assert restored_monitor.get_latency_percentiles(now=later) == monitor.get_latency_percentiles(now=later)
+    print(f"Monitor snapshot restored: {restored_monitor.get_traffic_in_last_n_seconds(300, later)} views in the last 5 minutes, "
+          f"p99 {restored_monitor.get_latency_percentiles(now=later)[99]:.0f} ms after replaying {replayed} log records")
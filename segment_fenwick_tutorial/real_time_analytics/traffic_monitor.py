@@ -1,101 +1,184 @@
-import time
+import os
 import random
-from collections import deque
-
-# Assuming SegmentTree and FenwickTree are available in the parent directory
-# For a real application, these would be properly packaged or imported from a library
 import sys
-sys.path.append('../segment_tree')
-sys.path.append('../fenwick_tree')
+import time
+
+# The Fenwick tree lives in its own tutorial directory
+# For a real application, it would be properly packaged or imported from a library
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fenwick_tree'))
 
-from segment_tree import SegmentTree
 from fenwick_tree import FenwickTree
 
-class WebsiteTrafficMonitor:
-    def __init__(self, window_size=60): # Monitor traffic for the last 60 seconds
-        self.window_size = window_size
-        self.traffic_data = [0] * window_size # Each index represents a second
-        self.segment_tree = SegmentTree(self.traffic_data)
-        self.fenwick_tree = FenwickTree(self.traffic_data)
-        self.current_second = 0
-
-    def record_traffic(self, page_views):
-        # Simulate traffic for the current second
-        # Update the traffic data and both trees
-        old_value = self.traffic_data[self.current_second]
-        self.traffic_data[self.current_second] = page_views
-
-        # Update Segment Tree
-        self.segment_tree.update(self.current_second, page_views)
-
-        # Update Fenwick Tree (with difference)
-        change = page_views - old_value
-        self.fenwick_tree.update(self.current_second, change)
-
-        print(f"[{time.strftime('%H:%M:%S')}] Recorded {page_views} views for second {self.current_second}")
-
-        # Move to the next second, wrapping around the window
-        self.current_second = (self.current_second + 1) % self.window_size
-
-    def get_total_traffic_last_minute(self):
-        # Using Segment Tree for range sum over the entire window
-        return self.segment_tree.query(0, self.window_size - 1)
-
-    def get_traffic_in_last_n_seconds(self, n):
-        if n > self.window_size:
-            print("Warning: n is greater than window_size. Returning total traffic.")
-            return self.get_total_traffic_last_minute()
-
-        # This is a bit tricky with a circular buffer and fixed-size trees.
-        # For simplicity, let's assume we want the sum of the last 'n' *recorded* values.
-        # A more robust solution would involve managing the window explicitly.
-        # Here, we'll use Fenwick Tree for prefix sums and calculate the range.
-
-        # If current_second is 0, it means the last recorded second was window_size - 1
-        # We need to sum from (current_second - n) % window_size to (current_second - 1) % window_size
-        # This requires careful handling of wrap-around. Let's simplify for this example
-        # and just query the last 'n' elements as if they were contiguous.
-        # For a true sliding window, a deque or more complex FT/ST logic is needed.
-
-        # Let's use the Segment Tree for a simpler range query for the last 'n' seconds
-        # assuming the data is logically contiguous for the last 'n' updates.
-        # This is a simplification for demonstration purposes.
-        start_idx = (self.current_second - n + self.window_size) % self.window_size
-        end_idx = (self.current_second - 1 + self.window_size) % self.window_size
-
-        if start_idx <= end_idx:
-            return self.segment_tree.query(start_idx, end_idx)
+# (seconds per bucket, number of buckets): 1 hour of seconds,
+# 24 hours of minutes and 1 week of hours
+DEFAULT_RESOLUTIONS = ((1, 3600), (60, 1440), (3600, 168))
+
+
+class TimeBuckets:
+    # A ring of fixed-width time buckets kept in a FenwickTree.
+    # Bucket number b = floor(timestamp / resolution) lives in slot b % size.
+    # The ring always holds exactly the buckets (latest - size, latest]:
+    # when time moves forward, the slots being reused are cleared first
+    # (lazy expiry), so stale counts never leak into a query.
+    def __init__(self, resolution, size):
+        self.resolution = resolution
+        self.size = size
+        self.tree = FenwickTree([0] * size)
+        self.latest = None # Newest bucket number seen so far
+
+    def bucket_of(self, timestamp):
+        return int(timestamp // self.resolution)
+
+    def advance(self, bucket):
+        # Move the ring forward to `bucket`, expiring what falls out of it
+        if self.latest is None:
+            self.latest = bucket
+            return
+        if bucket <= self.latest:
+            return
+        if bucket - self.latest >= self.size:
+            self.tree = FenwickTree([0] * self.size) # Everything expired at once
         else:
-            # Wrapped around, sum two parts
-            sum1 = self.segment_tree.query(start_idx, self.window_size - 1)
-            sum2 = self.segment_tree.query(0, end_idx)
-            return sum1 + sum2
+            for b in range(self.latest + 1, bucket + 1):
+                slot = b % self.size
+                if self.tree.get(slot):
+                    self.tree.set(slot, 0)
+        self.latest = bucket
+
+    def add(self, timestamp, value):
+        # Count `value` in its bucket. Returns False for events so late that
+        # their bucket has already left the ring.
+        return not self.add_batch([timestamp], [value])
+
+    def add_batch(self, timestamps, values):
+        # Count many events at once: events are summed per bucket first, so
+        # the tree sees one update per distinct bucket, not one per event.
+        # Returns how many events were too late to count.
+        per_bucket = {}
+        for timestamp, value in zip(timestamps, values):
+            bucket = int(timestamp // self.resolution)
+            per_bucket[bucket] = per_bucket.get(bucket, 0) + value
+        if not per_bucket:
+            return 0
+        self.advance(max(per_bucket))
+        oldest = self.latest - self.size
+        for bucket, value in per_bucket.items():
+            if bucket > oldest:
+                self.tree.update(bucket % self.size, value)
+        return sum(1 for timestamp in timestamps if int(timestamp // self.resolution) <= oldest)
+
+    def sum_last(self, num_buckets, now):
+        # Total of the `num_buckets` buckets ending with the one holding `now`
+        end = self.bucket_of(now)
+        self.advance(end)
+        # Buckets newer than `now` (events stamped ahead of the query) are
+        # not part of the answer
+        start = max(end - num_buckets + 1, self.latest - self.size + 1)
+        end = min(end, self.latest)
+        if start > end:
+            return 0
+        lo, hi = start % self.size, end % self.size
+        if lo <= hi:
+            return self.tree.range_query(lo, hi)
+        return self.tree.range_query(lo, self.size - 1) + self.tree.query(hi)
+
+    def horizon(self):
+        # How many seconds of history this ring covers
+        return self.resolution * self.size
+
+
+class WebsiteTrafficMonitor:
+    # Page views land in time buckets at several resolutions at once
+    # (cascaded rollups). A window is answered from the finest resolution
+    # that still covers it, with O(log n) Fenwick range sums.
+    # Pass a LatencyWindow (latency_percentiles.py) as `latency` to also
+    # track response-time percentiles over a sliding window.
+    def __init__(self, resolutions=DEFAULT_RESOLUTIONS, latency=None):
+        self.levels = [TimeBuckets(resolution, size) for resolution, size in sorted(resolutions)]
+        self.latency = latency
+        self.dropped_late = 0 # Events older than every ring
+
+    def record_traffic(self, page_views, timestamp=None, latency=None):
+        # Record `page_views` that happened at `timestamp` (default: now),
+        # optionally with the response time of the request
+        if timestamp is None:
+            timestamp = time.time()
+        self.record_batch([page_views], [timestamp], None if latency is None else [latency])
+
+    def record_batch(self, page_views, timestamps, latencies=None):
+        # Record many events in one pass; each resolution gets one tree
+        # update per distinct bucket in the batch
+        # Only the ring with the longest horizon decides what is lost for
+        # good; finer rings drop late events that longer ones still count
+        dropped = 0
+        longest = max(self.levels, key=TimeBuckets.horizon, default=None)
+        for level in self.levels:
+            late = level.add_batch(timestamps, page_views)
+            if level is longest:
+                dropped = late
+        self.dropped_late += dropped
+        if latencies is not None and self.latency is not None:
+            self.latency.record_batch(latencies, timestamps)
+
+    def get_latency_percentiles(self, ps=(50, 95, 99), now=None):
+        # Latency percentiles over the latency window, e.g. {50: 41.2, 99: 180.0}
+        if self.latency is None:
+            raise ValueError("This monitor was created without a latency window")
+        return self.latency.percentiles(ps, now)
+
+    def _level_for(self, n):
+        for level in self.levels:
+            if n <= level.horizon():
+                return level
+        return None
+
+    def get_traffic_in_last_n_seconds(self, n, now=None):
+        # Page views in the last `n` seconds. Windows longer than the finest
+        # ring are answered at a coarser resolution, aligned to its buckets.
+        if now is None:
+            now = time.time()
+        level = self._level_for(n)
+        if level is None:
+            level = self.levels[-1]
+            print(f"Warning: n is greater than the longest window ({level.horizon()}s). "
+                  "Returning total traffic.")
+            n = level.horizon()
+        num_buckets = -(-n // level.resolution) # Round up to whole buckets
+        return level.sum_last(num_buckets, now)
+
+    def get_total_traffic_last_minute(self, now=None):
+        return self.get_traffic_in_last_n_seconds(60, now)
 
 
 # --- Simulation --- #
 if __name__ == "__main__":
-    monitor = WebsiteTrafficMonitor(window_size=10) # Monitor last 10 seconds
+    monitor = WebsiteTrafficMonitor()
+    start = time.time() - 2 * 3600 # Replay the last two hours
 
-    print("\n--- Simulating Website Traffic ---")
-    for i in range(20): # Simulate 20 seconds of traffic
+    print("\n--- Simulating Two Hours of Website Traffic ---")
+    for second in range(2 * 3600):
+        views = random.randint(50, 200)
+        if 5400 <= second < 5460:
+            views *= 10 # A one-minute spike 30 minutes ago
+        monitor.record_traffic(views, timestamp=start + second)
+
+    now = start + 2 * 3600 - 1
+    print(f"Traffic in the last 10 seconds: {monitor.get_traffic_in_last_n_seconds(10, now)}")
+    print(f"Traffic in the last minute: {monitor.get_total_traffic_last_minute(now)}")
+    print(f"Traffic in the last 5 minutes: {monitor.get_traffic_in_last_n_seconds(300, now)}")
+    print(f"Traffic in the last 45 minutes (spike included): "
+          f"{monitor.get_traffic_in_last_n_seconds(45 * 60, now)}")
+    print(f"Traffic in the last 24 hours: {monitor.get_traffic_in_last_n_seconds(24 * 3600, now)}")
+
+    # Live updates with real timestamps
+    print("\n--- Live Updates ---")
+    for _ in range(5):
         views = random.randint(50, 200)
         monitor.record_traffic(views)
-        time.sleep(0.5) # Simulate real-time updates
-
-        if i % 5 == 0 and i > 0:
-            total_traffic = monitor.get_total_traffic_last_minute()
-            print(f"Total traffic in last {monitor.window_size} seconds: {total_traffic}")
-            traffic_last_3_sec = monitor.get_traffic_in_last_n_seconds(3)
-            print(f"Traffic in last 3 recorded seconds: {traffic_last_3_sec}")
-            print("----------------------------------")
-
-    print("\n--- Final Report ---")
-    print(f"Total traffic in last {monitor.window_size} seconds: {monitor.get_total_traffic_last_minute()}")
-    print(f"Traffic in last 5 recorded seconds: {monitor.get_traffic_in_last_n_seconds(5)}")
-
-    # Demonstrate a specific update and query
-    print("\n--- Manual Update and Query ---")
-    monitor.record_traffic(300) # Record a high traffic spike
-    print(f"Total traffic in last {monitor.window_size} seconds: {monitor.get_total_traffic_last_minute()}")
-
+        print(f"[{time.strftime('%H:%M:%S')}] Recorded {views} views")
+        time.sleep(0.5)
+    print(f"Traffic in the last 3 seconds: {monitor.get_traffic_in_last_n_seconds(3)}")
 
+    # An hour of silence: every second-level bucket expires on the next read
+    later = time.time() + 3600
+    print(f"Traffic in the last minute, one quiet hour later: {monitor.get_total_traffic_last_minute(later)}")
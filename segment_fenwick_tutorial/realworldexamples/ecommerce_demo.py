@@ -1,61 +1,42 @@
-class SegmentTreeLazy:
-    def __init__(self, arr):
-        self.n = len(arr)
-        self.tree = [0] * (4 * self.n)
-        self.lazy = [0] * (4 * self.n)
-        self._build(arr, 0, 0, self.n - 1)
-
-    def _build(self, arr, tree_idx, lo, hi):
-        if lo == hi:
-            self.tree[tree_idx] = arr[lo]
-            return
-        mid = (lo + hi) // 2
-        self._build(arr, 2 * tree_idx + 1, lo, mid)
-        self._build(arr, 2 * tree_idx + 2, mid + 1, hi)
-        self.tree[tree_idx] = self.tree[2 * tree_idx + 1] + self.tree[2 * tree_idx + 2]
-
-    def _push_down(self, tree_idx, lo, hi):
-        if self.lazy[tree_idx] != 0:
-            self.tree[tree_idx] += self.lazy[tree_idx] * (hi - lo + 1)
-            if lo != hi:
-                self.lazy[2 * tree_idx + 1] += self.lazy[tree_idx]
-                self.lazy[2 * tree_idx + 2] += self.lazy[tree_idx]
-            self.lazy[tree_idx] = 0
-
-    def _range_update(self, tree_idx, lo, hi, l, r, val):
-        self._push_down(tree_idx, lo, hi)
-        if r < lo or hi < l:
-            return
-        if l <= lo and hi <= r:
-            self.lazy[tree_idx] += val
-            self._push_down(tree_idx, lo, hi)
-            return
-        mid = (lo + hi) // 2
-        self._range_update(2 * tree_idx + 1, lo, mid, l, r, val)
-        self._range_update(2 * tree_idx + 2, mid + 1, hi, l, r, val)
-        self.tree[tree_idx] = self.tree[2 * tree_idx + 1] + self.tree[2 * tree_idx + 2]
-
-    def _query(self, tree_idx, lo, hi, l, r):
-        self._push_down(tree_idx, lo, hi)
-        if r < lo or hi < l:
-            return 0
-        if l <= lo and hi <= r:
-            return self.tree[tree_idx]
-        mid = (lo + hi) // 2
-        p1 = self._query(2 * tree_idx + 1, lo, mid, l, r)
-        p2 = self._query(2 * tree_idx + 2, mid + 1, hi, l, r)
-        return p1 + p2
+import os
+import sys
+
+# The lazy segment tree lives with the other segment trees
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'segment_tree'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fenwick_tree'))
+
+from lazy_segment_tree import LazySegmentTree
+from range_fenwick_tree import RangeFenwickTree
 
 # --- Demo ---
 inventory_sales = [100, 120, 90, 200, 300, 80, 150] # Sales per item
-st = SegmentTreeLazy(inventory_sales)
+st = LazySegmentTree(inventory_sales)
 
 print("--- E-commerce Demo ---")
-print(f"Initial total sales for items 0-6: ${st._query(0, 0, st.n-1, 0, 6)}")
+print(f"Initial total sales for items 0-6: ${st.query_sum(0, 6)}")
 
 # Apply a $10 discount to items in indices 2 through 5
 print("\nApplying a $10 discount to items at indices 2-5...")
-st._range_update(0, 0, st.n-1, 2, 5, -10)
-
-print(f"New total sales for items 0-6: ${st._query(0, 0, st.n-1, 0, 6)}")
-print(f"Sales for the discounted items (indices 2-5): ${st._query(0, 0, st.n-1, 2, 5)}")
+st.range_add(2, 5, -10)
+
+print(f"New total sales for items 0-6: ${st.query_sum(0, 6)}")
+print(f"Sales for the discounted items (indices 2-5): ${st.query_sum(2, 5)}")
+print(f"Cheapest and priciest discounted item: ${st.query_min(2, 5)} / ${st.query_max(2, 5)}")
+
+# Price-match a whole category at once
+print("\nPrice-matching items at indices 0-1 to $95...")
+st.range_assign(0, 1, 95)
+print(f"New total sales for items 0-6: ${st.query_sum(0, 6)}")
+
+# Thousands of promo changes land in one pass
+promos = [("add", i % 7, 6, 1 if i % 2 else -1) for i in range(5000)] + [("assign", 6, 6, 150)]
+print(f"\nApplying a batch of {len(promos)} promo changes...")
+st.apply_batch(promos)
+print(f"Sales per item after the batch: {st.values()}")
+
+# When all you need are totals, two Fenwick trees do the same job in less memory
+print("\nSum-only discounts with a range Fenwick tree...")
+ft = RangeFenwickTree(inventory_sales)
+ft.range_add(2, 5, -10)
+print(f"Total sales for items 0-6: ${ft.range_sum(0, 6)}")
+print(f"Sales for the discounted items (indices 2-5): ${ft.range_sum(2, 5)}")
@@ -1,3 +1,11 @@
+import os
+import sys
+
+# The sparse segment tree lives with the other segment trees
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'segment_tree'))
+
+from sparse_segment_tree import SparseSegmentTree
+
 class FenwickTree:
     def __init__(self, size):
         self.tree = [0] * (size + 1)
@@ -40,3 +48,16 @@ print("\nOrder cancelled: 50 shares at $100.10 (index 10)...")
 order_book.update(10, -50)
 
 print(f"Final cumulative volume up to $100.12 (index 12): {order_book.query(12)} shares")
+
+# Tick-level prices across a wide band don't fit a dense 100-slot array.
+# A sparse segment tree indexes prices in hundredths of a cent directly.
+print("\nTick-level book over $0.0000 - $1,000,000.0000...")
+TICKS_PER_DOLLAR = 10_000
+asks = SparseSegmentTree(0, 1_000_000 * TICKS_PER_DOLLAR)
+for price, shares in ((100.1234, 300), (100.1301, 150), (250.5, 40), (99_999.9999, 10)):
+    asks.add(round(price * TICKS_PER_DOLLAR), shares)
+
+limit = round(100.2 * TICKS_PER_DOLLAR)
+print(f"Ask volume up to $100.2000: {asks.query_sum(0, limit)} shares")
+print(f"Largest resting ask level: {asks.query_max(0, asks.hi - 1)} shares")
+print(f"Tree nodes allocated: {asks.num_nodes()} (vs {asks.hi:,} price points)")
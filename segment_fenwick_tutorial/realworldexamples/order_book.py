@@ -0,0 +1,226 @@
+import os
+import random
+import sys
+import time
+
+# The Fenwick tree lives in its own tutorial directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fenwick_tree'))
+
+from fenwick_tree import FenwickTree
+
+BID, ASK = "bid", "ask"
+
+
+class BookSide:
+    # One side of the book as two Fenwick trees over price levels: resting
+    # volume per level, and volume * level (notional in ticks) for VWAP.
+    # Bids are stored in reverse (best = highest price first) so on both
+    # sides "the best levels" are always a prefix of the tree.
+    def __init__(self, num_levels, reverse):
+        self.n = num_levels
+        self.reverse = reverse
+        self.volume = FenwickTree([0] * num_levels)
+        self.notional = FenwickTree([0] * num_levels)
+
+    def _slot(self, level):
+        return self.n - 1 - level if self.reverse else level
+
+    def add(self, level, qty):
+        slot = self._slot(level)
+        self.volume.update(slot, qty)
+        self.notional.update(slot, qty * level)
+
+    def total(self):
+        return self.volume.query(self.n - 1)
+
+    def volume_at(self, level):
+        return self.volume.get(self._slot(level))
+
+    def best(self):
+        # First non-empty level, or None for an empty side
+        slot = self.volume.search(1)
+        return None if slot == self.n else self._slot(slot)
+
+    def depth_to(self, level):
+        # Volume at levels as good as or better than `level`
+        return self.volume.query(self._slot(level))
+
+    def level_for_depth(self, qty):
+        # Worst level touched when taking `qty` from the best level down
+        slot = self.volume.search(qty)
+        return None if slot == self.n else self._slot(slot)
+
+    def fill_notional(self, qty):
+        # Sum of level * shares for the best `qty` shares, or None if the
+        # side holds less than `qty`
+        slot = self.volume.search(qty)
+        if slot == self.n:
+            return None
+        # Whole levels strictly better than the last one, then the remainder
+        volume_before = self.volume.query(slot - 1) if slot else 0
+        notional_before = self.notional.query(slot - 1) if slot else 0
+        return notional_before + (qty - volume_before) * self._slot(slot)
+
+
+class OrderBook:
+    # A limit order book over a fixed price band [min_price, max_price] in
+    # steps of tick_size. Orders are tracked by id; every query is O(log n)
+    # in the number of price levels.
+    def __init__(self, min_price, max_price, tick_size=0.01):
+        self.min_price = min_price
+        self.tick_size = tick_size
+        self.num_levels = round((max_price - min_price) / tick_size) + 1
+        self.sides = {
+            BID: BookSide(self.num_levels, reverse=True),
+            ASK: BookSide(self.num_levels, reverse=False),
+        }
+        self.orders = {} # order id -> (side, level, qty)
+
+    def _level(self, price):
+        level = round((price - self.min_price) / self.tick_size)
+        if not 0 <= level < self.num_levels:
+            raise ValueError(f"Price {price} is outside the book's price band")
+        return level
+
+    def _price(self, level):
+        return round(self.min_price + level * self.tick_size, 10)
+
+    def _side(self, side):
+        if side not in self.sides:
+            raise ValueError(f"Unknown side: {side!r}")
+        return self.sides[side]
+
+    def add(self, order_id, side, price, qty):
+        # Rest a new order on the book
+        if order_id in self.orders:
+            raise ValueError(f"Duplicate order id: {order_id!r}")
+        if qty <= 0:
+            raise ValueError("Order quantity must be positive")
+        level = self._level(price)
+        self._side(side).add(level, qty)
+        self.orders[order_id] = (side, level, qty)
+
+    def cancel(self, order_id):
+        # Remove a resting order; returns (side, price, qty)
+        side, level, qty = self.orders.pop(order_id)
+        self.sides[side].add(level, -qty)
+        return side, self._price(level), qty
+
+    def best_bid(self):
+        level = self.sides[BID].best()
+        return None if level is None else self._price(level)
+
+    def best_ask(self):
+        level = self.sides[ASK].best()
+        return None if level is None else self._price(level)
+
+    def volume_at(self, side, price):
+        return self._side(side).volume_at(self._level(price))
+
+    def depth_to_price(self, side, price):
+        # Shares resting at `price` or better (bids >= price, asks <= price)
+        return self._side(side).depth_to(self._level(price))
+
+    def price_for_depth(self, side, qty):
+        # Worst price reached when taking `qty` shares from the best price,
+        # or None if the side doesn't hold that many
+        level = self._side(side).level_for_depth(qty)
+        return None if level is None else self._price(level)
+
+    def vwap(self, side, qty):
+        # Average price paid for the best `qty` shares on `side`
+        notional = self._side(side).fill_notional(qty)
+        if notional is None:
+            return None
+        return self.min_price + self.tick_size * notional / qty
+
+
+def _percentile(sorted_samples, p):
+    return sorted_samples[min(len(sorted_samples) - 1, int(p / 100 * len(sorted_samples)))]
+
+
+def replay_benchmark(num_events=200_000, num_levels=10_000, seed=0):
+    # Replay a random stream of adds, cancels and queries around a mid price
+    # and time every operation individually
+    rng = random.Random(seed)
+    book = OrderBook(0.0, (num_levels - 1) * 0.01)
+    mid = num_levels // 2
+    live = []
+    events = []
+    next_id = 0
+    for _ in range(num_events):
+        roll = rng.random()
+        if roll < 0.5 or not live:
+            side = BID if rng.random() < 0.5 else ASK
+            offset = int(rng.expovariate(1 / 20)) + 1
+            level = mid - offset if side == BID else mid + offset
+            level = min(max(level, 0), num_levels - 1)
+            events.append(("add", (next_id, side, level * 0.01, rng.randint(1, 500))))
+            live.append(next_id)
+            next_id += 1
+        elif roll < 0.8:
+            i = rng.randrange(len(live))
+            live[i], live[-1] = live[-1], live[i]
+            events.append(("cancel", (live.pop(),)))
+        else:
+            kind = rng.choice(("best", "depth", "price_for_depth", "vwap"))
+            side = BID if rng.random() < 0.5 else ASK
+            events.append((kind, side, rng.randint(1, 5_000)))
+
+    timings = {}
+    clock = time.perf_counter_ns
+    for event in events:
+        kind = event[0]
+        start = clock()
+        if kind == "add":
+            book.add(*event[1])
+        elif kind == "cancel":
+            book.cancel(*event[1])
+        elif kind == "best":
+            book.best_bid() if event[1] == BID else book.best_ask()
+        elif kind == "depth":
+            book.depth_to_price(event[1], (mid + (event[2] % 200) - 100) * 0.01)
+        elif kind == "price_for_depth":
+            book.price_for_depth(event[1], event[2])
+        else:
+            book.vwap(event[1], event[2])
+        timings.setdefault(kind, []).append(clock() - start)
+
+    report = {}
+    for kind, samples in timings.items():
+        samples.sort()
+        total_s = sum(samples) / 1e9
+        report[kind] = {
+            "count": len(samples),
+            "ops_per_s": len(samples) / total_s if total_s else float("inf"),
+            "p50_us": _percentile(samples, 50) / 1000,
+            "p99_us": _percentile(samples, 99) / 1000,
+        }
+    return report
+
+
+if __name__ == "__main__":
+    print("--- Limit Order Book Demo ---")
+    book = OrderBook(min_price=99.00, max_price=101.00, tick_size=0.01)
+    book.add(1, BID, 100.00, 300)
+    book.add(2, BID, 99.98, 500)
+    book.add(3, BID, 99.95, 200)
+    book.add(4, ASK, 100.02, 100)
+    book.add(5, ASK, 100.03, 400)
+    book.add(6, ASK, 100.10, 1000)
+
+    print(f"Best bid / ask: ${book.best_bid():.2f} / ${book.best_ask():.2f}")
+    print(f"Ask volume up to $100.05: {book.depth_to_price(ASK, 100.05)} shares")
+    print(f"Buying 1,000 shares reaches ${book.price_for_depth(ASK, 1000):.2f}")
+    print(f"VWAP to buy 1,000 shares: ${book.vwap(ASK, 1000):.4f}")
+
+    print("\nOrder 4 cancelled...")
+    book.cancel(4)
+    print(f"Best ask is now ${book.best_ask():.2f}")
+    print(f"VWAP to sell 600 shares: ${book.vwap(BID, 600):.4f}")
+
+    print("\n--- Replay Benchmark (200,000 events, 10,000 price levels) ---")
+    print(f"{'operation':>16} {'count':>8} {'ops/s':>12} {'p50 us':>8} {'p99 us':>8}")
+    for kind, r in replay_benchmark().items():
+        print(f"{kind:>16} {r['count']:>8,} {r['ops_per_s']:>12,.0f} "
+              f"{r['p50_us']:>8.2f} {r['p99_us']:>8.2f}")
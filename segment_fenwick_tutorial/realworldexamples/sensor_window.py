@@ -0,0 +1,170 @@
+import time
+
+import numpy as np
+
+
+class SensorWindowEngine:
+    # Sliding-window statistics and anomaly flags for a whole fleet of
+    # sensors at once. Every tick brings one reading per sensor; the engine
+    # keeps the last `window` readings of every sensor in a ring buffer and
+    # answers mean, standard deviation, min and max over that window for all
+    # sensors in a few NumPy calls, never a loop over sensors.
+    #
+    # The ring is stored as (window, sensors): one tick writes one contiguous
+    # row, the same way the time buckets in real_time_analytics are laid out.
+    def __init__(self, num_sensors, window, z_threshold=4.0, low=None, high=None,
+                 min_periods=None, dtype=np.float64):
+        self.num_sensors = num_sensors
+        self.window = window
+        self.z_threshold = z_threshold
+        self.low = low   # Fixed thresholds: scalars or one value per sensor
+        self.high = high
+        self.min_periods = window if min_periods is None else min_periods # Readings needed before z-scores count
+        self.dtype = np.dtype(dtype)
+        self.ticks = 0
+
+        self.ring = np.zeros((window, num_sensors), dtype=self.dtype)
+        # Running sums are kept in float64 whatever the storage type, and
+        # recomputed from the ring once per lap so rounding can't drift
+        self.sum = np.zeros(num_sensors)
+        self.sumsq = np.zeros(num_sensors)
+
+        # Sliding min/max, vectorized. A monotonic deque per sensor would pop
+        # a different number of entries for every sensor on every tick, so we
+        # use its fixed-shape equivalent instead (the two-stack queue): the
+        # window is the tail of the previous lap plus the current lap so far.
+        # suffix_min[j] = min of the previous lap from slot j onward (computed
+        # once per lap), cur_min = min of the current lap. Amortized O(1) per
+        # sensor per tick, like the deque.
+        if self.dtype.kind == 'f':
+            self._top, self._bottom = np.inf, -np.inf
+        else:
+            self._top, self._bottom = np.iinfo(self.dtype).max, np.iinfo(self.dtype).min
+        self.suffix_min = np.full((window + 1, num_sensors), self._top, dtype=self.dtype)
+        self.suffix_max = np.full((window + 1, num_sensors), self._bottom, dtype=self.dtype)
+        self.cur_min = np.full(num_sensors, self._top, dtype=self.dtype)
+        self.cur_max = np.full(num_sensors, self._bottom, dtype=self.dtype)
+
+        self.last_z = np.zeros(num_sensors)
+
+    @property
+    def count(self):
+        # Readings currently in every sensor's window
+        return min(self.ticks, self.window)
+
+    def _start_lap(self):
+        # The ring holds exactly the last full lap, oldest in slot 0
+        # (a row at a time: minimum.accumulate along axis 0 is several times
+        # slower than `window` contiguous row operations)
+        ring, suffix_min, suffix_max = self.ring, self.suffix_min, self.suffix_max
+        suffix_min[-2] = suffix_max[-2] = ring[-1]
+        for j in range(self.window - 2, -1, -1):
+            np.minimum(ring[j], suffix_min[j + 1], out=suffix_min[j])
+            np.maximum(ring[j], suffix_max[j + 1], out=suffix_max[j])
+        self.cur_min.fill(self._top)
+        self.cur_max.fill(self._bottom)
+        np.sum(ring, axis=0, dtype=np.float64, out=self.sum)
+        np.einsum('ij,ij->j', ring, ring, dtype=np.float64, out=self.sumsq)
+
+    def mean(self):
+        return self.sum / max(self.count, 1)
+
+    def std(self):
+        n = max(self.count, 1)
+        mean = self.sum / n
+        return np.sqrt(np.maximum(self.sumsq / n - mean * mean, 0.0))
+
+    def window_min(self):
+        slot = (self.ticks - 1) % self.window
+        return np.minimum(self.suffix_min[slot + 1], self.cur_min)
+
+    def window_max(self):
+        slot = (self.ticks - 1) % self.window
+        return np.maximum(self.suffix_max[slot + 1], self.cur_max)
+
+    def ingest(self, readings):
+        # Add one reading per sensor and return a boolean mask of anomalies.
+        # A reading is anomalous if it is outside [low, high], or more than
+        # `z_threshold` standard deviations from the mean of the window it
+        # is joining (once that window has `min_periods` readings).
+        x = np.asarray(readings, dtype=self.dtype)
+        if x.shape != (self.num_sensors,):
+            raise ValueError(f"Expected {self.num_sensors} readings, got shape {x.shape}")
+
+        flags = np.zeros(self.num_sensors, dtype=bool)
+        if self.count >= self.min_periods and self.count > 0:
+            std = self.std()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                z = (x - self.mean()) / std
+            z[std == 0] = 0.0 # A flat window has no spread to measure against
+            self.last_z = z
+            flags |= np.abs(z) > self.z_threshold
+        if self.low is not None:
+            flags |= x < self.low
+        if self.high is not None:
+            flags |= x > self.high
+
+        slot = self.ticks % self.window
+        if slot == 0 and self.ticks:
+            self._start_lap()
+        if self.ticks >= self.window:
+            old = self.ring[slot].astype(np.float64)
+            self.sum -= old
+            self.sumsq -= old * old
+        self.ring[slot] = x
+        x64 = x.astype(np.float64)
+        self.sum += x64
+        self.sumsq += x64 * x64
+        np.minimum(self.cur_min, x, out=self.cur_min)
+        np.maximum(self.cur_max, x, out=self.cur_max)
+        self.ticks += 1
+        return flags
+
+    def latest(self):
+        # The most recent reading of every sensor
+        return self.ring[(self.ticks - 1) % self.window]
+
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.ring, self.sum, self.sumsq, self.suffix_min,
+                                      self.suffix_max, self.cur_min, self.cur_max, self.last_z))
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(7)
+    num_sensors, window, num_ticks = 100_000, 60, 300
+    baseline = rng.uniform(20, 30, num_sensors) # Each machine runs at its own temperature
+
+    engine = SensorWindowEngine(num_sensors, window, z_threshold=6.0, high=120.0, dtype=np.float32)
+    print(f"--- Fleet Monitor: {num_sensors:,} sensors, {window}-second windows ---")
+    print(f"Memory: {engine.nbytes() / 1e6:.1f} MB")
+
+    injected, caught = 0, 0
+    latencies = []
+    for t in range(num_ticks):
+        readings = baseline + rng.normal(0, 0.5, num_sensors)
+        spikes = np.empty(0, dtype=np.int64)
+        if t >= window and t % 25 == 0:
+            spikes = rng.choice(num_sensors, 20, replace=False)
+            readings[spikes] += rng.uniform(10, 150, len(spikes)) # Overheating machines
+        began = time.perf_counter()
+        flags = engine.ingest(readings)
+        latencies.append(time.perf_counter() - began)
+        injected += len(spikes)
+        caught += int(flags[spikes].sum())
+        if flags.any() and t >= window:
+            hot = np.flatnonzero(flags)
+            print(f"Tick {t:>3}: {len(hot):>3} anomalies, e.g. sensor {hot[0]:>6} "
+                  f"at {engine.latest()[hot[0]]:.1f} (z = {engine.last_z[hot[0]]:.1f})")
+
+    latencies.sort()
+    print(f"\nCaught {caught}/{injected} injected spikes")
+    print(f"Per tick: p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms "
+          f"({num_sensors / latencies[len(latencies) // 2]:,.0f} readings/s)")
+
+    # Spot check one sensor against a direct computation over its window
+    s = 12_345
+    last = np.array([engine.ring[(engine.ticks - 1 - k) % window][s] for k in range(window)], dtype=np.float64)
+    print(f"\nSensor {s}: mean {engine.mean()[s]:.3f} (direct {last.mean():.3f}), "
+          f"min {engine.window_min()[s]:.3f} (direct {last.min():.3f}), "
+          f"max {engine.window_max()[s]:.3f} (direct {last.max():.3f})")
@@ -1,3 +1,15 @@
+import os
+import sys
+
+# The NumPy-backed 2D trees live with the other Fenwick trees
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fenwick_tree'))
+
+try:
+    import numpy as np
+    from fenwick_tree_2d import CompressedFenwickTree2D, NumpyFenwickTree2D
+except ImportError:  # The list-based FenwickTree2D below needs nothing extra
+    np = None
+
 class FenwickTree2D:
     def __init__(self, rows, cols):
         self.rows = rows
@@ -30,30 +42,49 @@ class FenwickTree2D:
         return self.query(r2, c2) - self.query(r1 - 1, c2) - self.query(r2, c1 - 1) + self.query(r1 - 1, c1 - 1)
 
 # --- Demo ---
-# Let's define a 4x4 grid of regions
-ROWS, COLS = 4, 4
-engagement_map = FenwickTree2D(ROWS, COLS)
-
-print("--- Social Media Analytics Demo ---")
-# Simulate some initial engagement for a new hashtag
-engagement_map.update(0, 0, 150) # 150 likes in Northwest
-engagement_map.update(0, 1, 100)
-engagement_map.update(1, 0, 120)
-engagement_map.update(1, 1, 200)
-engagement_map.update(3, 3, 50)  # 50 likes in Southeast
-
-# Query the "West Coast" region (top-left 2x2 square)
-west_coast_engagement = engagement_map.range_query(0, 0, 1, 1)
-print(f"Initial engagement in the West Coast region (0,0 to 1,1): {west_coast_engagement}")
-
-# A post goes viral in the Midwest
-print("\nPost goes viral in a Midwest region (1,2)...")
-engagement_map.update(1, 2, 1000)
-
-# Re-query the West Coast, which should be unchanged
-west_coast_engagement = engagement_map.range_query(0, 0, 1, 1)
-print(f"Engagement in West Coast after Midwest spike: {west_coast_engagement}")
-
-# Query the entire map
-total_engagement = engagement_map.range_query(0, 0, ROWS-1, COLS-1)
-print(f"Total engagement across all regions: {total_engagement}")
\ No newline at end of file
+if __name__ == "__main__":
+    # Let's define a 4x4 grid of regions
+    ROWS, COLS = 4, 4
+    engagement_map = FenwickTree2D(ROWS, COLS)
+
+    print("--- Social Media Analytics Demo ---")
+    # Simulate some initial engagement for a new hashtag
+    engagement_map.update(0, 0, 150) # 150 likes in Northwest
+    engagement_map.update(0, 1, 100)
+    engagement_map.update(1, 0, 120)
+    engagement_map.update(1, 1, 200)
+    engagement_map.update(3, 3, 50)  # 50 likes in Southeast
+
+    # Query the "West Coast" region (top-left 2x2 square)
+    west_coast_engagement = engagement_map.range_query(0, 0, 1, 1)
+    print(f"Initial engagement in the West Coast region (0,0 to 1,1): {west_coast_engagement}")
+
+    # A post goes viral in the Midwest
+    print("\nPost goes viral in a Midwest region (1,2)...")
+    engagement_map.update(1, 2, 1000)
+
+    # Re-query the West Coast, which should be unchanged
+    west_coast_engagement = engagement_map.range_query(0, 0, 1, 1)
+    print(f"Engagement in West Coast after Midwest spike: {west_coast_engagement}")
+
+    # Query the entire map
+    total_engagement = engagement_map.range_query(0, 0, ROWS-1, COLS-1)
+    print(f"Total engagement across all regions: {total_engagement}")
+
+    if np is not None:
+        # The same grid as one contiguous NumPy array, fed a whole batch at once
+        print("\nBatch of 100,000 likes on a 1,000 x 1,000 grid...")
+        rng = np.random.default_rng(7)
+        grid = NumpyFenwickTree2D(1_000, 1_000)
+        rows, cols = rng.integers(0, 1_000, 100_000), rng.integers(0, 1_000, 100_000)
+        grid.update_many(rows, cols, 1)
+        print(f"Likes in the top-left quarter: {grid.range_query(0, 0, 499, 499)}")
+
+        # Real posts carry arbitrary coordinates; index only the ones that occur
+        print("\nGeo-tagged engagement on real coordinates...")
+        lon = rng.uniform(-125, -65, 50_000).round(3)
+        lat = rng.uniform(25, 50, 50_000).round(3)
+        geo = CompressedFenwickTree2D(lon, lat, weights=np.ones(len(lon), dtype=np.int64))
+        west = geo.range_query(-125, 25, -100, 50)
+        print(f"Engagement west of longitude -100: {west}")
+        print(f"Compressed index size: {geo.nbytes() / 1e6:.1f} MB for {len(lon):,} points")
@@ -0,0 +1,60 @@
+import random
+import sys
+import time
+
+from segment_tree import SegmentTree
+from iterative_segment_tree import IterativeSegmentTree
+
+# The recursive tree needs about log2(n) frames per operation
+sys.setrecursionlimit(10_000)
+
+
+def ops_per_second(fn, ops):
+    start = time.perf_counter()
+    for args in ops:
+        fn(*args)
+    return len(ops) / (time.perf_counter() - start)
+
+
+def benchmark(n, num_ops=50_000, seed=0):
+    rng = random.Random(seed)
+    arr = [rng.randint(0, 1000) for _ in range(n)]
+    updates = [(rng.randrange(n), rng.randint(0, 1000)) for _ in range(num_ops)]
+    queries = []
+    for _ in range(num_ops):
+        l = rng.randrange(n)
+        queries.append((l, rng.randrange(l, n)))
+
+    results = {}
+    for name, cls in (("recursive", SegmentTree), ("iterative", IterativeSegmentTree)):
+        start = time.perf_counter()
+        tree = cls(arr)
+        build_ms = (time.perf_counter() - start) * 1000
+        results[name] = {
+            "build_ms": build_ms,
+            "update_ops": ops_per_second(tree.update, updates),
+            "query_ops": ops_per_second(tree.query, queries),
+        }
+
+    # Both trees saw the same updates, so every answer must agree
+    recursive, iterative = SegmentTree(arr), IterativeSegmentTree(arr)
+    for idx, val in updates[:1000]:
+        recursive.update(idx, val)
+        iterative.update(idx, val)
+    for l, r in queries[:1000]:
+        assert recursive.query(l, r) == iterative.query(l, r)
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'n':>9} {'tree':>10} {'build ms':>10} {'updates/s':>12} {'queries/s':>12}")
+    print("-" * 57)
+    for n in (1_000, 100_000, 1_000_000):
+        results = benchmark(n)
+        for name, r in results.items():
+            print(f"{n:>9,} {name:>10} {r['build_ms']:>10.1f} "
+                  f"{r['update_ops']:>12,.0f} {r['query_ops']:>12,.0f}")
+        speedup = results["iterative"]["query_ops"] / results["recursive"]["query_ops"]
+        print(f"{'':>9} {'speedup':>10} {'':>10} "
+              f"{results['iterative']['update_ops'] / results['recursive']['update_ops']:>11.1f}x "
+              f"{speedup:>11.1f}x")
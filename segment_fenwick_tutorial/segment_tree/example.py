@@ -1,4 +1,10 @@
 from segment_tree import SegmentTree
+from iterative_segment_tree import IterativeSegmentTree
+from monoid_segment_tree import MonoidSegmentTree
+from sparse_segment_tree import SparseSegmentTree
+from persistent_segment_tree import PersistentSegmentTree
+from sparse_table import SparseTable
+import math
 
 # Let's test it out!
 arr = [1, 3, 5, 7, 9, 11]
@@ -18,6 +24,79 @@ print(f"Sum of range (index 1 to 3): {st.query(1, 3)}")  # Should be 3 + 10 + 7
 assert st.query(0, 5) == 41, "Test Case 1 Failed: Sum after update is incorrect"
 assert st.query(1, 3) == 20, "Test Case 2 Failed: Range sum after update is incorrect"
 
+# The iterative tree is a drop-in replacement with the same answers
+it = IterativeSegmentTree(arr)
+it.update(2, 10)
+assert it.query(0, 5) == st.query(0, 5), "Test Case 3 Failed: Iterative tree disagrees on full range"
+assert it.query(1, 3) == st.query(1, 3), "Test Case 4 Failed: Iterative tree disagrees on sub-range"
+assert it.query_range(1, 4) == 20, "Test Case 5 Failed: Half-open range sum is incorrect"
+
+# Any associative combine works: latency floors, peaks and gcds...
+latencies = [120, 85, 240, 60, 95, 300]
+floors = MonoidSegmentTree(latencies, min)
+peaks = MonoidSegmentTree(latencies, max)
+divisors = MonoidSegmentTree([12, 18, 24, 36, 48, 60], math.gcd)
+assert floors.query(1, 4) == 60, "Test Case 6 Failed: Range min is incorrect"
+assert peaks.query(0, 3) == 240, "Test Case 7 Failed: Range max is incorrect"
+assert divisors.query(0, 2) == 6, "Test Case 8 Failed: Range gcd is incorrect"
+
+# ...and custom aggregates, here (sum, count, max) tuples
+def combine_stats(a, b):
+    return (a[0] + b[0], a[1] + b[1], max(a[2], b[2]))
+
+stats = MonoidSegmentTree([(x, 1, x) for x in latencies], combine_stats, (0, 0, -math.inf))
+stats.update(3, (500, 1, 500))
+assert stats.query(2, 4) == (835, 3, 500), "Test Case 9 Failed: Custom aggregate is incorrect"
+
+# Huge index spaces: only touched paths are allocated
+balances = SparseSegmentTree(0, 2 ** 40) # User IDs up to 2^40
+balances.set(7, 250)
+balances.set(2 ** 39, 100)
+balances.add(2 ** 40 - 1, 40)
+assert balances.query(0, 2 ** 40 - 1) == 390, "Test Case 10 Failed: Sparse range sum is incorrect"
+assert balances.query_min(8, 2 ** 40 - 1) == 40, "Test Case 11 Failed: Sparse range min is incorrect"
+assert balances.query_max(8, 2 ** 38) is None, "Test Case 12 Failed: Empty sparse range should have no max"
+
+# Every version stays queryable: "what was the total as of version t?"
+history = PersistentSegmentTree([1, 3, 5, 7, 9, 11])
+v1 = history.update(2, 10)  # Version 1: index 2 becomes 10
+v2 = history.add(0, 4)      # Version 2: index 0 grows by 4
+assert history.query(1, 3, version=0) == 15, "Test Case 13 Failed: Old version changed"
+assert history.query(1, 3, version=v1) == 20, "Test Case 14 Failed: Versioned range sum is incorrect"
+assert history.query(0, 5) == 45, "Test Case 15 Failed: Latest version is incorrect"
+history.compact(keep_from_version=v1)  # Forget version 0
+assert history.query(0, 2, version=v1) == 14, "Test Case 16 Failed: Compaction changed a kept version"
+
+# Static snapshots: O(1) range min/max/gcd with no updates at all
+daily_floor = SparseTable(latencies, min)
+assert daily_floor.query(1, 4) == floors.query(1, 4), "Test Case 17 Failed: Sparse table min disagrees"
+assert SparseTable([12, 18, 24, 36, 48, 60], math.gcd).query(3, 5) == 12, "Test Case 18 Failed: Sparse table gcd is incorrect"
+assert list(daily_floor.query_many([0, 2, 5], [1, 5, 5])) == [85, 60, 300], "Test Case 19 Failed: Batch queries are incorrect"
+
+# Values the compact 64-bit slots can't hold fall back to a plain list
+it.update(0, 2.5)
+assert it.query(0, 1) == st.query(1, 1) + 2.5, "Test Case 20 Failed: Float update in an integer tree is incorrect"
+assert IterativeSegmentTree([2**62, 2**62]).query(0, 1) == 2**63, "Test Case 21 Failed: Sums past 64 bits are incorrect"
+
+# Sparse trees take floats and sums past 64 bits without corrupting the path
+sparse = SparseSegmentTree(0, 2 ** 40)
+sparse.set(3, 2 ** 62)
+sparse.set(2 ** 39, 2 ** 62)
+sparse.set(5, 0.5)
+assert sparse.query(0, 2 ** 40 - 1) == 2 ** 63 + 0.5, "Test Case 24 Failed: Sparse sum past int64 or with floats is incorrect"
+assert sparse.query_min(0, 2 ** 40 - 1) == 0.5, "Test Case 25 Failed: Sparse min after list fallback is incorrect"
+
+# Monoid sums never wrap, whatever the input width (NumPy arrays only without NumPy)
+assert MonoidSegmentTree([2**62] * 4).query(0, 3) == 2**64, "Test Case 22 Failed: Monoid sum past int64 wrapped"
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if np is not None:
+    small = MonoidSegmentTree(np.array([200, 100], dtype=np.uint8))
+    assert small.query(0, 1) == 300, "Test Case 23 Failed: uint8 monoid sum wrapped"
+
 print("\nAll Segment Tree tests passed!")
 
 
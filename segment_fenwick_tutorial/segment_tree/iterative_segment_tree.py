@@ -0,0 +1,70 @@
+from array import array
+
+
+class IterativeSegmentTree:
+    # A bottom-up segment tree: no recursion, exactly 2*n slots.
+    # Leaves live at tree[n:2n] and node i combines children 2i and 2i+1,
+    # so every operation is a plain loop that walks one level per step.
+    def __init__(self, arr, typecode=None):
+        self.n = len(arr)
+        if typecode is None:
+            # Integers pack into signed 64-bit slots; anything else uses doubles
+            typecode = 'd' if any(isinstance(x, float) for x in arr) else 'q'
+        try:
+            self.tree = array(typecode, [0]) * (2 * self.n)
+            self.tree[self.n:] = array(typecode, arr)
+            self._build()
+        except (TypeError, OverflowError):
+            # Values or sums the typed slots can't hold (ints beyond 64 bits,
+            # Decimal, Fraction): fall back to a plain list
+            self.tree = [0] * self.n + list(arr)
+            self._build()
+
+    def _build(self):
+        # O(n) build: fill parents from the last internal node up to the root
+        tree = self.tree
+        for i in range(self.n - 1, 0, -1):
+            tree[i] = tree[2 * i] + tree[2 * i + 1]
+
+    def update(self, idx, val):
+        # Set the element at `idx` to `val` and refresh its ancestors. A value
+        # the typed slots can't hold (a float in an integer tree, a sum past
+        # 2**63) moves the tree to a plain list and the update is redone.
+        # Trees restored from a mapped snapshot hold memoryviews, which
+        # report out-of-range ints as ValueError.
+        try:
+            self._set(idx, val)
+        except (TypeError, ValueError, OverflowError):
+            self.tree = list(self.tree)
+            self._set(idx, val)
+
+    def _set(self, idx, val):
+        tree = self.tree
+        i = idx + self.n
+        tree[i] = val
+        i >>= 1
+        while i:
+            tree[i] = tree[2 * i] + tree[2 * i + 1]
+            i >>= 1
+
+    def query(self, l, r):
+        # Sum of the inclusive range [l, r], same contract as SegmentTree.query
+        return self.query_range(l, r + 1)
+
+    def query_range(self, l, r):
+        # Sum of the half-open range [l, r). The two boundaries climb together;
+        # whenever one sits on a right (left) child, that node is taken whole.
+        tree = self.tree
+        res = 0
+        l += self.n
+        r += self.n
+        while l < r:
+            if l & 1:
+                res += tree[l]
+                l += 1
+            if r & 1:
+                r -= 1
+                res += tree[r]
+            l >>= 1
+            r >>= 1
+        return res
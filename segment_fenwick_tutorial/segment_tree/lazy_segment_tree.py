@@ -0,0 +1,252 @@
+import math
+
+
+class LazySegmentTree:
+    # A segment tree with lazy propagation for range updates.
+    # Supports range-add and range-assign, and answers range sum, min and max.
+    # All ranges are inclusive [l, r], like SegmentTree.query.
+    #
+    # The tree is bottom-up over a power-of-two number of leaves: node k has
+    # children 2k and 2k+1, leaves live at [size, 2*size). Pending updates sit
+    # in per-node tags and are pushed down with loops, not recursion, only
+    # along the two boundary paths an operation touches.
+    def __init__(self, arr):
+        self.n = len(arr)
+        self.log = max(1, (self.n - 1).bit_length())
+        self.size = 1 << self.log
+
+        size = self.size
+        # Padding leaves have length 0 so they never affect sums, mins or maxes
+        self.length = [0] * (2 * size)
+        self.sum = [0] * (2 * size)
+        self.min = [math.inf] * (2 * size)
+        self.max = [-math.inf] * (2 * size)
+        # Pending tags for internal nodes: "assign this value, then add this delta"
+        self.lazy_assign = [None] * size
+        self.lazy_add = [0] * size
+
+        self._build(arr)
+
+    def _build(self, values):
+        size = self.size
+        for i, value in enumerate(values):
+            self.length[size + i] = 1
+            self.sum[size + i] = self.min[size + i] = self.max[size + i] = value
+        for i in range(self.n, size):
+            self.length[size + i] = 0
+            self.sum[size + i] = 0
+            self.min[size + i] = math.inf
+            self.max[size + i] = -math.inf
+        for k in range(size - 1, 0, -1):
+            self.length[k] = self.length[2 * k] + self.length[2 * k + 1]
+            self._pull(k)
+            self.lazy_assign[k] = None
+            self.lazy_add[k] = 0
+
+    def _pull(self, k):
+        # Recompute node k from its children
+        left, right = 2 * k, 2 * k + 1
+        self.sum[k] = self.sum[left] + self.sum[right]
+        self.min[k] = self.min[left] if self.min[left] < self.min[right] else self.min[right]
+        self.max[k] = self.max[left] if self.max[left] > self.max[right] else self.max[right]
+
+    def _apply(self, k, assign, add):
+        # Apply "assign (optional), then add" to the whole segment of node k
+        length = self.length[k]
+        if not length:
+            return
+        if assign is not None:
+            self.sum[k] = assign * length
+            self.min[k] = self.max[k] = assign
+            if k < self.size:
+                self.lazy_assign[k] = assign
+                self.lazy_add[k] = 0
+        if add:
+            self.sum[k] += add * length
+            self.min[k] += add
+            self.max[k] += add
+            if k < self.size:
+                self.lazy_add[k] += add
+
+    def _push(self, k):
+        # Hand node k's pending tag to its children
+        assign, add = self.lazy_assign[k], self.lazy_add[k]
+        if assign is not None or add:
+            self._apply(2 * k, assign, add)
+            self._apply(2 * k + 1, assign, add)
+            self.lazy_assign[k] = None
+            self.lazy_add[k] = 0
+
+    def _push_boundaries(self, l, r):
+        # Push tags on the root-to-leaf paths above the half-open leaf range [l, r)
+        for i in range(self.log, 0, -1):
+            if ((l >> i) << i) != l:
+                self._push(l >> i)
+            if ((r >> i) << i) != r:
+                self._push((r - 1) >> i)
+
+    def _update(self, l, r, assign, add):
+        if l > r:
+            return
+        l += self.size
+        r += self.size + 1
+        self._push_boundaries(l, r)
+
+        lo, hi = l, r
+        while lo < hi:
+            if lo & 1:
+                self._apply(lo, assign, add)
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                self._apply(hi, assign, add)
+            lo >>= 1
+            hi >>= 1
+
+        for i in range(1, self.log + 1):
+            if ((l >> i) << i) != l:
+                self._pull(l >> i)
+            if ((r >> i) << i) != r:
+                self._pull((r - 1) >> i)
+
+    def range_add(self, l, r, delta):
+        # Add `delta` to every element in [l, r]
+        self._update(l, r, None, delta)
+
+    def range_assign(self, l, r, value):
+        # Set every element in [l, r] to `value`
+        self._update(l, r, value, 0)
+
+    def _query(self, l, r, values, combine, identity):
+        if l > r:
+            return identity
+        l += self.size
+        r += self.size + 1
+        self._push_boundaries(l, r)
+        res = identity
+        while l < r:
+            if l & 1:
+                res = combine(res, values[l])
+                l += 1
+            if r & 1:
+                r -= 1
+                res = combine(res, values[r])
+            l >>= 1
+            r >>= 1
+        return res
+
+    def query_sum(self, l, r):
+        return self._query(l, r, self.sum, lambda a, b: a + b, 0)
+
+    def query_min(self, l, r):
+        return self._query(l, r, self.min, min, math.inf)
+
+    def query_max(self, l, r):
+        return self._query(l, r, self.max, max, -math.inf)
+
+    def query(self, l, r):
+        # Range sum, the same default as SegmentTree.query
+        return self.query_sum(l, r)
+
+    def values(self):
+        # Push every pending tag down and return the current array
+        for k in range(1, self.size):
+            self._push(k)
+        return self.sum[self.size:self.size + self.n]
+
+    def apply_batch(self, updates):
+        # Apply many ("add" | "assign", l, r, value) updates, in order.
+        # Small batches go through the tree one by one. Large batches are
+        # resolved offline in a single sweep over the array and the tree is
+        # rebuilt once, instead of one root-to-leaf traversal per update.
+        updates = list(updates)
+        if len(updates) * self.log < self.n:
+            for kind, l, r, value in updates:
+                if kind == "add":
+                    self.range_add(l, r, value)
+                elif kind == "assign":
+                    self.range_assign(l, r, value)
+                else:
+                    raise ValueError(f"Unknown update kind: {kind!r}")
+            return
+
+        values = self.values()
+        if all(kind == "add" for kind, _, _, _ in updates):
+            values = _sweep_adds(values, updates)
+        else:
+            values = _sweep_mixed(values, updates)
+        self._build(values)
+
+
+def _sweep_adds(values, updates):
+    # Pure range-adds collapse into one difference array
+    diff = [0] * (len(values) + 1)
+    for _, l, r, delta in updates:
+        if l <= r:
+            diff[l] += delta
+            diff[r + 1] -= delta
+    running = 0
+    result = []
+    for value, d in zip(values, diff):
+        running += d
+        result.append(value + running)
+    return result
+
+
+def _sweep_mixed(values, updates):
+    n = len(values)
+    # 1. The last assign covering each position wins. Walking assigns from
+    #    newest to oldest with "next unpainted position" pointers paints each
+    #    position at most once.
+    assigned_at = [-1] * n
+    assigned_value = list(values)
+    next_free = list(range(n + 1))
+
+    def find(i):
+        root = i
+        while next_free[root] != root:
+            root = next_free[root]
+        while next_free[i] != root:
+            next_free[i], i = root, next_free[i]
+        return root
+
+    for t in range(len(updates) - 1, -1, -1):
+        kind, l, r, value = updates[t]
+        if kind == "assign":
+            i = find(l)
+            while i <= r:
+                assigned_at[i] = t
+                assigned_value[i] = value
+                next_free[i] = i + 1
+                i = find(i + 1)
+        elif kind != "add":
+            raise ValueError(f"Unknown update kind: {kind!r}")
+
+    # 2. Each position also gets every add issued after its assign. Sweep
+    #    positions left to right keeping the active adds in a Fenwick tree
+    #    indexed by time, and read the suffix sum after the assign time.
+    num_updates = len(updates)
+    starts = [[] for _ in range(n + 1)]
+    for t, (kind, l, r, delta) in enumerate(updates):
+        if kind == "add" and l <= r:
+            starts[l].append((t, delta))
+            starts[r + 1].append((t, -delta))
+
+    bit = [0] * (num_updates + 1)
+    total = 0
+    result = []
+    for p in range(n):
+        for t, delta in starts[p]:
+            total += delta
+            i = t + 1
+            while i <= num_updates:
+                bit[i] += delta
+                i += i & (-i)
+        # Sum of active adds with time <= assigned_at[p]
+        before = 0
+        i = assigned_at[p] + 1
+        while i > 0:
+            before += bit[i]
+            i -= i & (-i)
+        result.append(assigned_value[p] + total - before)
+    return result
@@ -0,0 +1,179 @@
+import math
+import operator
+
+try:
+    import numpy as np
+except ImportError:  # NumPy only speeds up the build; everything works without it
+    np = None
+
+
+# Built-in monoids get hand-inlined loops and, with NumPy, vectorized builds.
+# Each entry maps a combine function to (identity, NumPy ufunc name).
+_BUILTIN_MONOIDS = {
+    operator.add: (0, "add"),
+    min: (math.inf, "minimum"),
+    max: (-math.inf, "maximum"),
+    math.gcd: (0, "gcd"),
+}
+
+
+class MonoidSegmentTree:
+    # A bottom-up segment tree over any monoid: an associative `combine`
+    # plus an `identity` with combine(identity, x) == combine(x, identity) == x.
+    # Examples: (operator.add, 0), (min, math.inf), (max, -math.inf),
+    # (math.gcd, 0), or tuples like (sum, count, max) with a custom combine.
+    # `combine` does not have to be commutative; query order is preserved.
+    def __init__(self, arr, combine=operator.add, identity=None):
+        self.n = len(arr)
+        self.combine = combine
+        if identity is None:
+            if combine not in _BUILTIN_MONOIDS:
+                raise ValueError("identity is required for a custom combine function")
+            identity = _BUILTIN_MONOIDS[combine][0]
+        self.identity = identity
+        # Fast paths only apply when the identity is the standard one
+        # (operator.add over strings with identity "" is a different monoid)
+        builtin = _BUILTIN_MONOIDS.get(combine)
+        self._builtin = builtin if builtin is not None and identity == builtin[0] else None
+        self.tree = self._build(arr)
+
+        # Pick the specialized loops for the built-in monoids
+        if self._builtin is None:
+            self.query_range = self._query_generic
+        elif combine is operator.add:
+            self.query_range = self._query_sum
+        elif combine is min:
+            self.query_range = self._query_min
+        elif combine is max:
+            self.query_range = self._query_max
+        else:
+            self.query_range = self._query_generic
+
+    def _build(self, arr):
+        n = self.n
+        builtin = self._builtin
+        if np is not None and builtin is not None and n > 1:
+            values = np.asarray(arr)
+            kind = values.dtype.kind
+            if kind in "iu":
+                # Reduce in int64 whatever the input width (uint8 200 + 100
+                # would wrap to 44), and only when no node can pass int64:
+                # sums must stay below 2**62, like the NumPy Fenwick trees.
+                # Otherwise build exactly from Python ints.
+                if builtin[1] == "add":
+                    fits = float(np.abs(values.astype(np.float64)).sum()) < 2 ** 62
+                else:
+                    fits = kind == "i" or int(values.max()) < 2 ** 63
+                if fits:
+                    return self._build_numpy(values.astype(np.int64), getattr(np, builtin[1]))
+                arr = values.tolist()
+            elif kind == "f" and builtin[1] != "gcd":
+                return self._build_numpy(values.astype(np.float64), getattr(np, builtin[1]))
+
+        tree = [self.identity] * (2 * n)
+        tree[n:] = list(arr)
+        combine = self.combine
+        for i in range(n - 1, 0, -1):
+            tree[i] = combine(tree[2 * i], tree[2 * i + 1])
+        return tree
+
+    def _build_numpy(self, values, ufunc):
+        # Nodes [lo, hi) only depend on nodes >= hi when 2*lo >= hi, so each
+        # such block is one vectorized ufunc call: about log2(n) calls in total.
+        n = self.n
+        tree = np.empty(2 * n, dtype=values.dtype)
+        tree[n:] = values
+        hi = n
+        while hi > 1:
+            lo = (hi + 1) // 2
+            tree[lo:hi] = ufunc(tree[2 * lo:2 * hi:2], tree[2 * lo + 1:2 * hi:2])
+            hi = lo
+        tree = tree.tolist()
+        tree[0] = self.identity
+        return tree
+
+    def update(self, idx, val):
+        # Set the element at `idx` to `val` and refresh its ancestors
+        tree = self.tree
+        combine = self.combine
+        i = idx + self.n
+        tree[i] = val
+        i >>= 1
+        while i:
+            tree[i] = combine(tree[2 * i], tree[2 * i + 1])
+            i >>= 1
+
+    def query(self, l, r):
+        # Aggregate of the inclusive range [l, r]
+        return self.query_range(l, r + 1)
+
+    def _query_generic(self, l, r):
+        # Half-open [l, r). Left and right parts are accumulated separately
+        # so non-commutative combines see elements in order.
+        tree = self.tree
+        combine = self.combine
+        left = right = self.identity
+        l += self.n
+        r += self.n
+        while l < r:
+            if l & 1:
+                left = combine(left, tree[l])
+                l += 1
+            if r & 1:
+                r -= 1
+                right = combine(tree[r], right)
+            l >>= 1
+            r >>= 1
+        return combine(left, right)
+
+    def _query_sum(self, l, r):
+        tree = self.tree
+        res = 0
+        l += self.n
+        r += self.n
+        while l < r:
+            if l & 1:
+                res += tree[l]
+                l += 1
+            if r & 1:
+                r -= 1
+                res += tree[r]
+            l >>= 1
+            r >>= 1
+        return res
+
+    def _query_min(self, l, r):
+        tree = self.tree
+        res = self.identity
+        l += self.n
+        r += self.n
+        while l < r:
+            if l & 1:
+                if tree[l] < res:
+                    res = tree[l]
+                l += 1
+            if r & 1:
+                r -= 1
+                if tree[r] < res:
+                    res = tree[r]
+            l >>= 1
+            r >>= 1
+        return res
+
+    def _query_max(self, l, r):
+        tree = self.tree
+        res = self.identity
+        l += self.n
+        r += self.n
+        while l < r:
+            if l & 1:
+                if tree[l] > res:
+                    res = tree[l]
+                l += 1
+            if r & 1:
+                r -= 1
+                if tree[r] > res:
+                    res = tree[r]
+            l >>= 1
+            r >>= 1
+        return res
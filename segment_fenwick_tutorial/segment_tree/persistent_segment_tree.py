@@ -0,0 +1,170 @@
+from array import array
+
+
+class PersistentSegmentTree:
+    # A segment tree that keeps every version. An update never changes an
+    # existing node: it copies the O(log n) nodes on the path from the root
+    # to the leaf (path copying) and shares everything else with the previous
+    # version. A version is nothing more than a pointer to its root node.
+    #
+    # Nodes live in a preallocated pool of parallel arrays (left child, right
+    # child, sum) indexed by node id; the pool doubles when it fills up.
+    # Node 0 is the null node.
+    def __init__(self, arr, typecode=None, capacity=None):
+        self.n = len(arr)
+        if typecode is None:
+            typecode = 'd' if any(isinstance(x, float) for x in arr) else 'q'
+        self.typecode = typecode
+        depth = max(1, (self.n - 1).bit_length()) + 1
+        if capacity is None:
+            capacity = 2 * self.n + 1024 * depth # Room for ~1k updates before growing
+        self.left = array('q', [0]) * capacity
+        self.right = array('q', [0]) * capacity
+        self.sum = array(typecode, [0]) * capacity
+        self.size = 1 # Nodes in use; node 0 is null
+
+        self.first_version = 0 # Oldest version still kept (see compact)
+        self.roots = [self._build(list(arr), 0, self.n - 1) if self.n else 0]
+
+    def _new_node(self, left, right, total):
+        if self.size == len(self.sum):
+            grow = len(self.sum)
+            self.left.extend(array('q', [0]) * grow)
+            self.right.extend(array('q', [0]) * grow)
+            self.sum.extend(array(self.typecode, [0]) * grow)
+        k = self.size
+        self.left[k] = left
+        self.right[k] = right
+        self.sum[k] = total
+        self.size += 1
+        return k
+
+    def _build(self, arr, lo, hi):
+        if lo == hi:
+            return self._new_node(0, 0, arr[lo])
+        mid = (lo + hi) // 2
+        left = self._build(arr, lo, mid)
+        right = self._build(arr, mid + 1, hi)
+        return self._new_node(left, right, self.sum[left] + self.sum[right])
+
+    @property
+    def latest(self):
+        # Number of the newest version
+        return self.first_version + len(self.roots) - 1
+
+    def _root(self, version):
+        if version is None:
+            return self.roots[-1]
+        if not self.first_version <= version <= self.latest:
+            raise KeyError(f"Version {version} is not available")
+        return self.roots[version - self.first_version]
+
+    def _path(self, root, idx):
+        # Nodes from the root down to the leaf for `idx`
+        path = []
+        k, lo, hi = root, 0, self.n - 1
+        while True:
+            path.append(k)
+            if lo == hi:
+                return path
+            mid = (lo + hi) // 2
+            if idx <= mid:
+                k, hi = self.left[k], mid
+            else:
+                k, lo = self.right[k], mid + 1
+
+    def _commit(self, idx, value, add):
+        if not 0 <= idx < self.n:
+            raise IndexError(f"Index {idx} out of range")
+        # Walk down the latest version, remembering which way we went
+        path = []
+        k, lo, hi = self.roots[-1], 0, self.n - 1
+        while lo != hi:
+            mid = (lo + hi) // 2
+            if idx <= mid:
+                path.append((k, True))
+                k, hi = self.left[k], mid
+            else:
+                path.append((k, False))
+                k, lo = self.right[k], mid + 1
+        new = self._new_node(0, 0, self.sum[k] + value if add else value)
+        # Copy the path bottom-up, pointing each copy at the new child
+        for k, went_left in reversed(path):
+            left, right = (new, self.right[k]) if went_left else (self.left[k], new)
+            new = self._new_node(left, right, self.sum[left] + self.sum[right])
+        self.roots.append(new)
+        return self.latest
+
+    def update(self, idx, val):
+        # Set the element at `idx` to `val` in a new version; returns its number
+        return self._commit(idx, val, add=False)
+
+    def add(self, idx, delta):
+        # Add `delta` to the element at `idx` in a new version
+        return self._commit(idx, delta, add=True)
+
+    def query(self, l, r, version=None):
+        # Sum of the inclusive range [l, r] as of `version` (default: latest)
+        root = self._root(version)
+        l, r = max(l, 0), min(r, self.n - 1)
+        s = 0
+        stack = [(root, 0, self.n - 1)]
+        while stack:
+            k, lo, hi = stack.pop()
+            if not k or hi < l or lo > r:
+                continue
+            if l <= lo and hi <= r:
+                s += self.sum[k]
+                continue
+            mid = (lo + hi) // 2
+            stack.append((self.left[k], lo, mid))
+            stack.append((self.right[k], mid + 1, hi))
+        return s
+
+    def get(self, idx, version=None):
+        return self.sum[self._path(self._root(version), idx)[-1]]
+
+    def compact(self, keep_from_version):
+        # Drop every version older than `keep_from_version` and reclaim the
+        # nodes only they used. Live nodes are copied into a fresh, dense
+        # pool (shared nodes once); version numbers do not change.
+        # Returns the number of nodes freed.
+        keep_from_version = min(max(keep_from_version, self.first_version), self.latest)
+        roots = self.roots[keep_from_version - self.first_version:]
+
+        # Children always have smaller ids than their parents, so visiting
+        # live nodes in increasing id order rebuilds bottom-up
+        live = bytearray(self.size)
+        stack = list(roots)
+        while stack:
+            k = stack.pop()
+            if k and not live[k]:
+                live[k] = 1
+                stack.append(self.left[k])
+                stack.append(self.right[k])
+
+        remap = array('q', [0]) * self.size
+        left = array('q', [0]) * len(self.left)
+        right = array('q', [0]) * len(self.right)
+        total = array(self.typecode, [0]) * len(self.sum)
+        size = 1
+        for k in range(1, self.size):
+            if live[k]:
+                remap[k] = size
+                left[size] = remap[self.left[k]]
+                right[size] = remap[self.right[k]]
+                total[size] = self.sum[k]
+                size += 1
+
+        freed = self.size - size
+        self.left, self.right, self.sum, self.size = left, right, total, size
+        self.roots = [remap[root] for root in roots]
+        self.first_version = keep_from_version
+        return freed
+
+    def retain_last(self, num_versions):
+        # Keep only the newest `num_versions` versions
+        return self.compact(self.latest - num_versions + 1)
+
+    def num_nodes(self):
+        return self.size - 1
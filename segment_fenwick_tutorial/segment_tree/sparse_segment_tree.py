@@ -0,0 +1,169 @@
+from array import array
+
+
+class SparseSegmentTree:
+    # A dynamically allocated segment tree over a huge index space such as
+    # [0, 2**64): tick-level prices across a wide band, or user IDs up to 2**40.
+    # Nodes are created only along the paths that updates touch, so memory
+    # grows with (number of updates) * log2(range) instead of the range size.
+    #
+    # Nodes live in a pool of parallel arrays indexed by node id, not in
+    # per-node Python objects. Node 0 is the shared empty node: it stands for
+    # every subtree that has never been touched.
+    #
+    # Untouched positions hold no value: they count as 0 in sums and are
+    # skipped by min/max, which return None for a range with no values.
+    def __init__(self, lo=0, hi=1 << 64, typecode='q'):
+        if lo >= hi:
+            raise ValueError("Index space [lo, hi) must not be empty")
+        self.lo = lo
+        self.hi = hi
+        self.left = array('q', [0, 0])   # Child node ids (0 = empty)
+        self.right = array('q', [0, 0])
+        self.count = array('q', [0, 0])  # Positions holding a value in the subtree
+        self.sum = array(typecode, [0, 0])
+        self.min = array(typecode, [0, 0])
+        self.max = array(typecode, [0, 0])
+        # Node 1 is the root, covering [lo, hi)
+
+    def _new_node(self):
+        self.left.append(0)
+        self.right.append(0)
+        self.count.append(0)
+        self.sum.append(0)
+        self.min.append(0)
+        self.max.append(0)
+        return len(self.left) - 1
+
+    def _pull(self, k):
+        # Recompute node k from its children; empty children are skipped
+        a, b = self.left[k], self.right[k]
+        count_a, count_b = self.count[a], self.count[b]
+        self.count[k] = count_a + count_b
+        self.sum[k] = self.sum[a] + self.sum[b]
+        if count_a and count_b:
+            self.min[k] = self.min[a] if self.min[a] < self.min[b] else self.min[b]
+            self.max[k] = self.max[a] if self.max[a] > self.max[b] else self.max[b]
+        elif count_a or count_b:
+            child = a if count_a else b
+            self.min[k] = self.min[child]
+            self.max[k] = self.max[child]
+
+    def _descend(self, idx, create):
+        # Walk from the root to the leaf for `idx`, returning the path.
+        # With create=False, stops (returning None) at the first missing node.
+        if not self.lo <= idx < self.hi:
+            raise IndexError(f"Index {idx} outside [{self.lo}, {self.hi})")
+        path = [1]
+        k, lo, hi = 1, self.lo, self.hi
+        while hi - lo > 1:
+            mid = (lo + hi) >> 1
+            if idx < mid:
+                child = self.left[k]
+                if not child:
+                    if not create:
+                        return None
+                    child = self._new_node()
+                    self.left[k] = child
+                hi = mid
+            else:
+                child = self.right[k]
+                if not child:
+                    if not create:
+                        return None
+                    child = self._new_node()
+                    self.right[k] = child
+                lo = mid
+            k = child
+            path.append(k)
+        return path
+
+    def _write_leaf(self, path, value, present):
+        # Sets the leaf and recomputes its ancestors from their children, so
+        # a write that fails halfway can simply be redone. A value the typed
+        # pool can't hold (a float in a 'q' tree, a sum past 2**63) moves the
+        # sum/min/max columns to plain lists first, like IterativeSegmentTree.
+        try:
+            self._set_path(path, value, present)
+        except (TypeError, OverflowError):
+            self.sum, self.min, self.max = list(self.sum), list(self.min), list(self.max)
+            self._set_path(path, value, present)
+
+    def _set_path(self, path, value, present):
+        leaf = path[-1]
+        self.count[leaf] = 1 if present else 0
+        self.sum[leaf] = self.min[leaf] = self.max[leaf] = value
+        for k in reversed(path[:-1]):
+            self._pull(k)
+
+    def set(self, idx, value):
+        # Set the element at `idx` to `value`
+        self._write_leaf(self._descend(idx, True), value, True)
+
+    def update(self, idx, val):
+        # Same contract as SegmentTree.update: the element becomes `val`
+        self.set(idx, val)
+
+    def add(self, idx, delta):
+        # Add `delta` to the element at `idx` (an untouched element starts at 0)
+        path = self._descend(idx, True)
+        self._write_leaf(path, self.sum[path[-1]] + delta, True)
+
+    def remove(self, idx):
+        # Forget the element at `idx`; its nodes stay allocated for reuse
+        path = self._descend(idx, False)
+        if path is not None:
+            self._write_leaf(path, 0, False)
+
+    def get(self, idx):
+        # Value at `idx`, or None if it was never set
+        path = self._descend(idx, False)
+        if path is None or not self.count[path[-1]]:
+            return None
+        return self.sum[path[-1]]
+
+    def _covering_nodes(self, l, r):
+        # Non-empty nodes whose segments exactly tile [l, r] (inclusive), left
+        # to right. Uses an explicit stack instead of recursion.
+        l = max(l, self.lo)
+        r = min(r, self.hi - 1)
+        nodes = []
+        stack = [(1, self.lo, self.hi)]
+        count, left, right = self.count, self.left, self.right
+        while stack:
+            k, lo, hi = stack.pop()
+            if not count[k] or hi <= l or lo > r:
+                continue
+            if l <= lo and hi - 1 <= r:
+                nodes.append(k)
+                continue
+            mid = (lo + hi) >> 1
+            stack.append((right[k], mid, hi))
+            stack.append((left[k], lo, mid))
+        return nodes
+
+    def query_sum(self, l, r):
+        s = 0
+        for k in self._covering_nodes(l, r):
+            s += self.sum[k]
+        return s
+
+    def query_min(self, l, r):
+        nodes = self._covering_nodes(l, r)
+        return min(self.min[k] for k in nodes) if nodes else None
+
+    def query_max(self, l, r):
+        nodes = self._covering_nodes(l, r)
+        return max(self.max[k] for k in nodes) if nodes else None
+
+    def query(self, l, r):
+        # Range sum, the same default as SegmentTree.query
+        return self.query_sum(l, r)
+
+    def num_nodes(self):
+        return len(self.left) - 1 # Not counting the shared empty node
+
+    def nbytes(self):
+        # List columns (after a fallback) count 8-byte pointers only
+        pool = (self.left, self.right, self.count, self.sum, self.min, self.max)
+        return sum(getattr(a, "itemsize", 8) * len(a) for a in pool)
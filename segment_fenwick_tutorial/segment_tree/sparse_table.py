@@ -0,0 +1,94 @@
+import math
+import operator
+
+try:
+    import numpy as np
+except ImportError:  # NumPy speeds up the build and batch queries; everything works without it
+    np = None
+
+
+# Idempotent operations (op(x, x) == x) and their NumPy ufunc names. Only
+# these can answer a query from two overlapping blocks.
+_IDEMPOTENT_OPS = {
+    min: "minimum",
+    max: "maximum",
+    math.gcd: "gcd",
+    operator.and_: "bitwise_and",
+    operator.or_: "bitwise_or",
+}
+
+
+class SparseTable:
+    # Range queries over an array that never changes, in O(1).
+    # Row k of the table holds op(arr[i], ..., arr[i + 2**k - 1]) for every i,
+    # and row k is built from two halves in row k - 1, so the build is
+    # O(n log n). Any range [l, r] is covered by two (possibly overlapping)
+    # blocks of length 2**k, where 2**k is the largest power of two that
+    # fits; overlap is harmless because op is idempotent.
+    #
+    # `op` is one of min, max, math.gcd, operator.and_, operator.or_, or any
+    # other associative function with op(x, x) == x. There are no updates:
+    # for data that changes, use a segment tree.
+    def __init__(self, arr, op=min):
+        self.n = len(arr)
+        self.op = op
+        self.levels = max(1, self.n.bit_length())
+        self._ufunc = None
+        if np is not None and op in _IDEMPOTENT_OPS and self.n:
+            values = np.asarray(arr)
+            ufunc = getattr(np, _IDEMPOTENT_OPS[op])
+            if values.dtype.kind in "iub" or (values.dtype.kind == "f" and op in (min, max)):
+                self._ufunc = ufunc
+                self.table = self._build_numpy(values, ufunc)
+                # log2 of every possible range length, for batch queries
+                self._log = np.zeros(self.n + 1, dtype=np.intp)
+                for k in range(1, self.levels):
+                    self._log[1 << k:] += 1
+                return
+        self.table = self._build(list(arr))
+
+    def _build(self, arr):
+        op = self.op
+        table = [arr]
+        for k in range(1, self.levels):
+            prev, half = table[-1], 1 << (k - 1)
+            table.append([op(prev[i], prev[i + half]) for i in range(self.n - (1 << k) + 1)])
+        return table
+
+    def _build_numpy(self, values, ufunc):
+        # One (levels, n) block; row k only uses its first n - 2**k + 1 slots
+        table = np.empty((self.levels, self.n), dtype=values.dtype)
+        table[0] = values
+        for k in range(1, self.levels):
+            width, half = self.n - (1 << k) + 1, 1 << (k - 1)
+            ufunc(table[k - 1, :width], table[k - 1, half:half + width], out=table[k, :width])
+        return table
+
+    def query(self, l, r):
+        # Aggregate of the inclusive range [l, r], same contract as SegmentTree.query
+        if not 0 <= l <= r < self.n:
+            raise IndexError(f"Range [{l}, {r}] out of bounds for size {self.n}")
+        k = (r - l + 1).bit_length() - 1
+        r -= (1 << k) - 1
+        if self._ufunc is not None:
+            item = self.table.item
+            return self.op(item(k, l), item(k, r))
+        row = self.table[k]
+        return self.op(row[l], row[r])
+
+    def query_many(self, ls, rs):
+        # Aggregates of many inclusive ranges [ls[i], rs[i]] at once. With
+        # NumPy this is a handful of vectorized gathers, not a Python loop.
+        if self._ufunc is None:
+            return [self.query(l, r) for l, r in zip(ls, rs)]
+        ls = np.asarray(ls, dtype=np.intp)
+        rs = np.asarray(rs, dtype=np.intp)
+        if ls.size and ((ls < 0).any() or (rs >= self.n).any() or (ls > rs).any()):
+            raise IndexError("Ranges must satisfy 0 <= l <= r < n")
+        k = self._log[rs - ls + 1]
+        return self._ufunc(self.table[k, ls], self.table[k, rs - (1 << k) + 1])
+
+    def nbytes(self):
+        if self._ufunc is not None:
+            return self.table.nbytes
+        return sum(len(row) for row in self.table) * 8 # Pointers only; the values are shared